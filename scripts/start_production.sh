@@ -33,6 +33,13 @@ fi
 # 确保日志目录存在
 mkdir -p "$PROJECT_DIR/logs"
 
+# 部署时创建数据库索引，工作进程启动时不再重复创建
+echo "检查数据库索引..."
+if ! python src/scripts/manage_indexes.py ensure; then
+    echo "警告: 部分数据库索引创建失败，请查看上面的日志"
+fi
+export MONGO_AUTO_INDEX=False
+
 # 启动Gunicorn
 echo "启动XMonitor服务..."
 exec gunicorn \
@@ -3,20 +3,41 @@
 
 import os
 import json
+import time
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, render_template, redirect, url_for
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, stream_with_context
 from flask_cors import CORS
-import pymongo
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson import ObjectId
 
 # 导入项目内部模块
-from models.tweet import Tweet
-from models.project import Project
-from utils.ai_analyzer import analyze_tweet
-from utils.telegram_bot import send_notification
-from utils.notification_formatter import format_notification
+from models.tweet import Tweet, TWEET_PROJECTIONS, parse_time_bound
+from models.project import Project, project_registry, username_key
+from models.database import get_db
+from models.indexes import ensure_indexes_in_background
+from models.search_terms import search_fields
+from models.sentiment import ROLLUP_GRANULARITIES, get_sentiment_series
+from models.pagination import PAGE_SORT, apply_cursor, encode_cursor, fetch_page
+from utils.ai_analyzer import AI_PROVIDER, analyze_tweet, configure_analysis_cache, get_analysis_cache_stats
+from utils.telegram_bot import (
+    configure_outbox, configure_rate_limits, enqueue_notification, get_delivery_stats, start_delivery,
+    test_telegram_connection
+)
+from utils.notification_formatter import format_notification, format_early_notification
+from utils.ingest_queue import INGEST_LEASE_SECONDS, IngestQueue, RetrySweeper, claim_tweet, worker_id
+from utils.coalescer import NotificationCoalescer
+from utils.fanout import DEFAULT_SUBSCRIPTIONS, fan_out, normalize_subscription
+from utils.ai_hedge import get_provider_health
+from utils.prefilter import get_prefilter_stats
+from utils.dedup import SeenTweetCache
+from utils.json_stream import STREAM_BATCH_SIZE, stream_json_array
+from utils.status import (
+    STATUS_COUNTS_TTL, STATUS_MONGO_TTL, STATUS_TELEGRAM_TTL,
+    CachedProbe, StatusMonitor, format_uptime, uptime_seconds
+)
 
 # 加载环境变量
 load_dotenv()
@@ -41,14 +62,40 @@ app = Flask(__name__, template_folder='../templates', static_folder='../static')
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'default_secret_key')
 CORS(app)
 
-# 连接MongoDB
-try:
-    mongo_client = pymongo.MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-    db = mongo_client[os.getenv('MONGO_DB_NAME', 'xmonitor')]
-    logger.info("成功连接到MongoDB")
-except Exception as e:
-    logger.error(f"MongoDB连接失败: {str(e)}")
-    db = None
+# 启动时在后台确保索引存在（包括Webhook去重依赖的tweet_id唯一索引），数据库不可用时不阻塞启动；
+# 生产环境由start_production.sh在启动gunicorn前创建
+if os.getenv('MONGO_AUTO_INDEX', 'True').lower() == 'true':
+    ensure_indexes_in_background()
+
+# 分析结果缓存的持久化存储
+configure_analysis_cache(lambda: get_db().analysis_cache)
+
+# Telegram通知发件箱的持久化存储
+configure_outbox(lambda: get_db().telegram_outbox)
+# 所有工作进程共用的Telegram限流计数
+configure_rate_limits(lambda: get_db().telegram_rate_limits)
+# 启动投递线程，继续发送重启前发件箱中未完成的消息
+start_delivery()
+
+def ping_mongodb():
+    """MongoDB连通性探测"""
+    get_db().command('ping')
+    return True
+
+def count_documents():
+    """项目数和推文数，使用集合元数据估算，不扫描集合"""
+    db = get_db()
+    return {
+        'projects': db.projects.estimated_document_count(),
+        'tweets': db.tweets.estimated_document_count()
+    }
+
+# 健康探测在后台按TTL刷新，/api/status只读取缓存
+status_monitor = StatusMonitor([
+    CachedProbe('mongodb', ping_mongodb, STATUS_MONGO_TTL, default=False),
+    CachedProbe('telegram', test_telegram_connection, STATUS_TELEGRAM_TTL, default=False),
+    CachedProbe('counts', count_documents, STATUS_COUNTS_TTL)
+])
 
 # 路由：主页
 @app.route('/')
@@ -58,7 +105,7 @@ def index():
 # 路由：项目管理页面
 @app.route('/projects')
 def projects_page():
-    projects = list(db.projects.find())
+    projects = list(get_db().projects.find())
     for project in projects:
         project['_id'] = str(project['_id'])
     return render_template('projects.html', projects=projects)
@@ -67,79 +114,433 @@ def projects_page():
 @app.route('/tweets')
 def tweets_page():
     project_id = request.args.get('project_id')
-    query = {'project_id': project_id} if project_id else {}
-    tweets = list(db.tweets.find(query).sort('created_at', -1).limit(100))
+    impact_level = request.args.get('impact_level')
+    cursor = request.args.get('cursor')
+    query = Tweet.build_query(project_ids=project_id, impact_levels=impact_level)
+    try:
+        # 列表不展示关键因素和历史参照，详情由 /api/tweets/<id> 读取
+        tweets, next_cursor = fetch_page(get_db().tweets, query, 100, cursor, TWEET_PROJECTIONS['summary'])
+    except ValueError:
+        return redirect(url_for('tweets_page', project_id=project_id, impact_level=impact_level))
     for tweet in tweets:
         tweet['_id'] = str(tweet['_id'])
-    projects = list(db.projects.find())
+    projects = list(get_db().projects.find())
     for project in projects:
         project['_id'] = str(project['_id'])
-    return render_template('tweets.html', tweets=tweets, projects=projects, selected_project=project_id)
+    return render_template('tweets.html', tweets=tweets, projects=projects, selected_project=project_id,
+                           selected_impact_level=impact_level, next_cursor=next_cursor, is_first_page=not cursor)
+
+# 后台处理推文：AI分析、写回分析结果并发送通知
+def process_tweet_job(job):
+    """
+    处理队列中的单条推文
+
+    参数:
+        job (dict): 已入库的推文文档（含_id）
+    """
+    tweet_data = job
+    early_alert = {}
+    
+    # 领取租约：同一条推文可能被重新入队到多个进程，只有领取成功的线程分析和通知
+    lease_id = claim_tweet(get_db().tweets, tweet_data['_id'])
+    if lease_id is None:
+        logger.info(f"推文已被其他工作线程处理，跳过: {tweet_data.get('tweet_id')}")
+        return
+    tweet_data['lease_id'] = lease_id
+    # 租约过期后推文可能已被重新领取，此后不再发送快速预警
+    lease_deadline = time.monotonic() + INGEST_LEASE_SECONDS
+    
+    # 项目的订阅决定通知发往哪些聊天，未配置时发送到默认聊天
+    project = project_registry.get_by_id(tweet_data.get('project_id')) or {}
+    subscriptions = project.get('subscriptions') or DEFAULT_SUBSCRIPTIONS
+    
+    def notify(data, formatter, coalesce=True):
+        # 普通通知经合并窗口后放入Telegram发件箱；快速预警及其后续的完整分析直接放入发件箱，不等待窗口
+        if coalesce:
+            send = lambda chat_id, message, buttons: notification_coalescer.submit(data, message, chat_id, buttons)
+        else:
+            send = lambda chat_id, message, buttons: enqueue_notification(message, buttons=buttons, chat_id=chat_id)
+        return fan_out(data, subscriptions, formatter, send)
+    
+    def send_early_alert(fields):
+        # 流式分析中一得到影响等级就发送快速预警，完整分析稍后写回并补发
+        if time.monotonic() >= lease_deadline:
+            return
+        with ingest_queue.timed('notification'):
+            sent = notify(dict(tweet_data, analysis=fields), format_early_notification, coalesce=False)
+        if sent:
+            early_alert.update(fields)
+            logger.info(f"已向 {sent} 个聊天发送快速预警，影响级别: {fields['impact_level']}")
+    
+    # 分析推文内容
+    with ingest_queue.timed('analysis'):
+        analysis_result = analyze_tweet(tweet_data['text'], tweet_data['token_symbol'], on_early=send_early_alert)
+    if early_alert and analysis_result.get('analysis_failed'):
+        # 流式响应在发出预警后中断：保留已预警的事件类型和影响等级，不用默认结果覆盖
+        analysis_result = dict(analysis_result, **early_alert)
+    tweet_data['analysis'] = analysis_result
+    
+    # 写回分析结果，重新分析的推文同时修正情绪汇总
+    with ingest_queue.timed('update'):
+        saved = Tweet.save_analysis(tweet_data['_id'], tweet_data['project_id'], tweet_data['created_at'],
+                                    tweet_data['text'], analysis_result, lease_id=lease_id)
+    if not saved:
+        # 租约已失效，推文由重新领取的线程写回和通知，这里不再重复通知
+        logger.warning(f"推文的处理租约已失效，不发送通知: {tweet_data.get('tweet_id')}")
+        return
+    
+    # 根据分析结果决定是否发送通知
+    impact_level = analysis_result.get('impact_level', 'Non-Significant')
+    if early_alert:
+        if analysis_result.get('analysis_failed'):
+            logger.warning(f"快速预警后完整分析失败，无法补发完整通知，影响级别: {impact_level}")
+            return
+        # 快速预警只有事件类型和影响等级，补发包含关键因素、预期波动和历史参照的完整分析
+        with ingest_queue.timed('notification'):
+            sent = notify(tweet_data, format_notification, coalesce=False)
+        if sent:
+            logger.info(f"已向 {sent} 个聊天补发完整分析，影响级别: {impact_level}")
+        return
+    # 每种消息模板只格式化一次，再分发给所有匹配的订阅
+    with ingest_queue.timed('notification'):
+        sent = notify(tweet_data, format_notification)
+    if sent:
+        logger.info(f"已向 {sent} 个聊天发送通知，影响级别: {impact_level}")
+
+def mark_tweet_failed(job, error):
+    """
+    处理出错的推文标记为failed，由重试线程稍后重新入队
+
+    参数:
+        job (dict): 队列中的推文文档
+        error (Exception): 处理时抛出的异常
+    """
+    # 只更新仍由本线程持有租约的推文：分析结果已写回后才出错（如通知入队失败）或租约已被重新领取的推文不再标记，
+    # 避免重复分析和通知
+    get_db().tweets.update_one(
+        {'_id': job['_id'], 'analysis_status': 'processing', 'lease_id': job.get('lease_id')},
+        {
+            '$set': {'analysis_status': 'failed', 'analysis_error': str(error)[:500], 'status_changed_at': datetime.utcnow()},
+            '$unset': {'lease_id': '', 'lease_owner': '', 'lease_until': ''}
+        }
+    )
+
+ingest_queue = IngestQueue(process_tweet_job, on_error=mark_tweet_failed)
+# 定期重新入队长时间未完成的推文（进程退出时仍在队列中、处理出错或队列已满被拒绝），启动时立即检查一轮
+retry_sweeper = RetrySweeper(ingest_queue)
+# 各进程的心跳决定其队列中的pending推文是否仍在等待处理
+retry_sweeper.configure(lambda: get_db().tweets, lambda: get_db().ingest_workers)
+retry_sweeper.start()
+# 短时间内的多条通知合并为汇总消息，重大利好/利空立即发送
+notification_coalescer = NotificationCoalescer(
+    lambda chat_id, message, buttons: enqueue_notification(message, buttons=buttons, chat_id=chat_id)
+)
+# 合并窗口中的通知持久化保存，进程重启后由后台线程继续发送
+notification_coalescer.configure(lambda: get_db().notification_digests)
+notification_coalescer.start()
+seen_tweets = SeenTweetCache()
+
+# 批量Webhook单次最多接收的推文数
+WEBHOOK_BATCH_MAX = int(os.getenv('WEBHOOK_BATCH_MAX', 500))
+# /api/tweets?stream=1 单次最多返回的推文数
+STREAM_MAX_ROWS = int(os.getenv('STREAM_MAX_ROWS', 100000))
+
+def verify_webhook_secret():
+    """验证Webhook密钥"""
+    secret = request.headers.get('X-Webhook-Secret')
+    if secret != os.getenv('WEBHOOK_SECRET'):
+        logger.warning(f"接收到无效的Webhook请求，验证失败")
+        return False
+    return True
+
+def extract_tweet_fields(data):
+    """从Webhook负载中提取推文ID、项目ID和Twitter用户名"""
+    tweet_id = data.get('id_str') or data.get('id')
+    project_id = data.get('project_id')
+    twitter_username = (data.get('user') or {}).get('screen_name')
+    return (str(tweet_id) if tweet_id is not None else None), project_id, twitter_username
+
+def duplicate_tweet_response(document_id):
+    """重复推文直接返回首次处理的结果"""
+    return jsonify({
+        'status': 'success',
+        'message': '推文已处理过',
+        'tweet_id': str(document_id),
+        'duplicate': True
+    }), 200
+
+def resolve_duplicate_tweet(tweet_id):
+    """
+    处理唯一索引冲突的推文
+
+    返回原推文的数据库ID；如果原推文当时因队列已满未被分析，则重新入队。
+    """
+    existing = get_db().tweets.find_one({'tweet_id': tweet_id})
+    if not existing:
+        return None, False
+    if existing.get('analysis_status') == 'rejected':
+        # 先改为pending再入队，工作线程领取时才能取得租约；并发的重复请求只有一个能改成功
+        requeued = get_db().tweets.find_one_and_update(
+            {'_id': existing['_id'], 'analysis_status': 'rejected'},
+            {'$set': {'analysis_status': 'pending', 'status_changed_at': datetime.utcnow(), 'queued_by': worker_id()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if requeued is not None:
+            if ingest_queue.submit(requeued):
+                seen_tweets.add(tweet_id, existing['_id'])
+                return existing['_id'], True
+            get_db().tweets.update_one(
+                {'_id': existing['_id'], 'analysis_status': 'pending'},
+                {'$set': {'analysis_status': 'rejected', 'status_changed_at': datetime.utcnow()}}
+            )
+        return existing['_id'], False
+    if existing.get('analysis_status') != 'rejected':
+        seen_tweets.add(tweet_id, existing['_id'])
+    return existing['_id'], False
+
+def build_tweet_document(data, tweet_id, twitter_username, project):
+    """构建待分析的推文文档，分析结果由后台队列写回"""
+    return {
+        'tweet_id': tweet_id,
+        'project_id': str(project['_id']),
+        'twitter_username': twitter_username,
+        'token_symbol': project.get('token_symbol'),
+        'text': data.get('text', ''),
+        'created_at': datetime.utcnow(),
+        'analysis': {},
+        'analysis_status': 'pending',
+        'status_changed_at': datetime.utcnow(),
+        # 入队的进程，进程存活时重试线程不会重新入队
+        'queued_by': worker_id(),
+        # 分析完成后补充事件类型和关键因素的检索词
+        'search': search_fields(data.get('text', ''))
+    }
 
 # API路由：接收推文webhook
 @app.route('/api/webhook/tweet', methods=['POST'])
 def receive_tweet():
     # 验证Webhook密钥
-    secret = request.headers.get('X-Webhook-Secret')
-    if secret != os.getenv('WEBHOOK_SECRET'):
-        logger.warning(f"接收到无效的Webhook请求，验证失败")
+    if not verify_webhook_secret():
         return jsonify({'status': 'error', 'message': '验证失败'}), 401
     
     try:
         data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': '请求体必须是JSON对象'}), 400
         logger.info(f"接收到新推文: {data.get('text', '')[:50]}...")
         
         # 提取所需信息
-        tweet_id = data.get('id_str') or data.get('id')
-        project_id = data.get('project_id')
-        twitter_username = data.get('user', {}).get('screen_name')
-        token_symbol = None
-        
-        # 查找关联的项目
-        if project_id:
-            project = db.projects.find_one({'_id': ObjectId(project_id)})
-        else:
-            project = db.projects.find_one({'twitter_username': twitter_username})
+        tweet_id, project_id, twitter_username = extract_tweet_fields(data)
+        
+        # 重复投递的推文直接返回首次处理的结果，不再分析和通知
+        original_id = seen_tweets.get(tweet_id)
+        if original_id:
+            logger.info(f"忽略重复推文: {tweet_id}")
+            return duplicate_tweet_response(original_id)
+        
+        # 查找关联的项目（进程内缓存，无需访问数据库）
+        with ingest_queue.timed('project_lookup'):
+            project = project_registry.resolve(project_id, twitter_username)
         
         if not project:
             logger.warning(f"找不到匹配的项目: {twitter_username}")
             return jsonify({'status': 'error', 'message': '找不到匹配的项目'}), 404
         
-        token_symbol = project.get('token_symbol')
-        project_id = str(project['_id'])
-        
-        # 分析推文内容
-        tweet_text = data.get('text', '')
-        analysis_result = analyze_tweet(tweet_text, token_symbol)
+        # 先保存原始推文，分析结果由后台队列写回
+        tweet_data = build_tweet_document(data, tweet_id, twitter_username, project)
         
-        # 保存到数据库
-        tweet_data = {
-            'tweet_id': tweet_id,
-            'project_id': project_id,
-            'twitter_username': twitter_username,
-            'token_symbol': token_symbol,
-            'text': tweet_text,
-            'created_at': datetime.utcnow(),
-            'analysis': analysis_result
-        }
-        
-        inserted_id = db.tweets.insert_one(tweet_data).inserted_id
+        try:
+            with ingest_queue.timed('persist'):
+                inserted_id = get_db().tweets.insert_one(tweet_data).inserted_id
+        except DuplicateKeyError:
+            original_id, requeued = resolve_duplicate_tweet(tweet_id)
+            if requeued:
+                return jsonify({'status': 'accepted', 'message': '推文已重新排队分析', 'tweet_id': str(original_id)}), 202
+            logger.info(f"忽略重复推文: {tweet_id}")
+            return duplicate_tweet_response(original_id)
         logger.info(f"推文已保存到数据库，ID: {inserted_id}")
         
-        # 根据分析结果决定是否发送通知
-        impact_level = analysis_result.get('impact_level', 'Non-Significant')
-        if impact_level in ['Extremely Bullish', 'Bullish', 'Extremely Bearish', 'Bearish']:
-            # 格式化并发送通知
-            notification_text = format_notification(tweet_data)
-            send_notification(notification_text)
-            logger.info(f"已发送通知，影响级别: {impact_level}")
+        # 交给后台队列进行分析和通知
+        if not ingest_queue.submit(tweet_data):
+            get_db().tweets.update_one(
+                {'_id': inserted_id},
+                {'$set': {'analysis_status': 'rejected', 'status_changed_at': datetime.utcnow()}}
+            )
+            return jsonify({
+                'status': 'error',
+                'message': '处理队列已满，请稍后重试',
+                'tweet_id': str(inserted_id)
+            }), 503
         
-        return jsonify({'status': 'success', 'message': '推文已处理', 'tweet_id': str(inserted_id)}), 200
+        seen_tweets.add(tweet_id, inserted_id)
+        return jsonify({'status': 'accepted', 'message': '推文已接收，正在分析', 'tweet_id': str(inserted_id)}), 202
     
     except Exception as e:
         logger.error(f"处理推文时出错: {str(e)}")
         return jsonify({'status': 'error', 'message': f'处理失败: {str(e)}'}), 500
 
+# API路由：批量接收推文webhook
+@app.route('/api/webhook/tweets/batch', methods=['POST'])
+def receive_tweets_batch():
+    # 验证Webhook密钥
+    if not verify_webhook_secret():
+        return jsonify({'status': 'error', 'message': '验证失败'}), 401
+    
+    try:
+        data = request.json
+        items = data.get('tweets') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({'status': 'error', 'message': '请求体必须是推文数组'}), 400
+        if len(items) > WEBHOOK_BATCH_MAX:
+            return jsonify({'status': 'error', 'message': f'单批最多 {WEBHOOK_BATCH_MAX} 条推文'}), 413
+        
+        logger.info(f"接收到批量推文: {len(items)} 条")
+        
+        results = [None] * len(items)
+        parsed = []
+        batch_tweet_ids = {}
+        
+        # 提取每条推文的信息
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'status': 'error', 'message': '推文必须是JSON对象'}
+                continue
+            tweet_id, project_id, twitter_username = extract_tweet_fields(item)
+            
+            # 已处理过或同一批次内重复的推文直接跳过
+            original_id = seen_tweets.get(tweet_id)
+            if original_id:
+                results[index] = {'index': index, 'status': 'duplicate', 'tweet_id': original_id}
+                continue
+            if tweet_id and tweet_id in batch_tweet_ids:
+                results[index] = {'index': index, 'status': 'duplicate', 'duplicate_of': batch_tweet_ids[tweet_id]}
+                continue
+            if tweet_id:
+                batch_tweet_ids[tweet_id] = index
+            
+            parsed.append((index, item, tweet_id, project_id, twitter_username))
+        
+        # 构建待保存的推文文档，项目从进程内缓存解析
+        documents = []
+        document_indexes = []
+        for index, item, tweet_id, project_id, twitter_username in parsed:
+            with ingest_queue.timed('project_lookup'):
+                project = project_registry.resolve(project_id, twitter_username)
+            if not project:
+                results[index] = {'index': index, 'status': 'error', 'message': '找不到匹配的项目'}
+                continue
+            documents.append(build_tweet_document(item, tweet_id, twitter_username, project))
+            document_indexes.append(index)
+        
+        # 批量写入，单条失败不影响其他推文
+        failed = {}
+        duplicates = set()
+        if documents:
+            with ingest_queue.timed('persist'):
+                try:
+                    get_db().tweets.insert_many(documents, ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get('writeErrors', []):
+                        if error.get('code') == 11000:
+                            duplicates.add(error['index'])
+                        else:
+                            failed[error['index']] = error.get('errmsg', '写入失败')
+        
+        # 唯一索引冲突的推文，一次查询取回首次处理时的数据库ID
+        existing_ids = {}
+        if duplicates:
+            duplicate_tweet_ids = [documents[position]['tweet_id'] for position in duplicates]
+            for existing in get_db().tweets.find({'tweet_id': {'$in': duplicate_tweet_ids}}, {'tweet_id': 1}):
+                existing_ids[existing['tweet_id']] = existing['_id']
+                seen_tweets.add(existing['tweet_id'], existing['_id'])
+        
+        rejected_ids = []
+        for position, (index, document) in enumerate(zip(document_indexes, documents)):
+            if position in failed:
+                results[index] = {'index': index, 'status': 'error', 'message': f'保存失败: {failed[position]}'}
+                continue
+            if position in duplicates:
+                original_id = existing_ids.get(document['tweet_id'])
+                results[index] = {
+                    'index': index,
+                    'status': 'duplicate',
+                    'tweet_id': str(original_id) if original_id else None
+                }
+                continue
+            
+            # 交给后台队列进行分析和通知
+            if ingest_queue.submit(document):
+                seen_tweets.add(document['tweet_id'], document['_id'])
+                results[index] = {'index': index, 'status': 'accepted', 'tweet_id': str(document['_id'])}
+            else:
+                rejected_ids.append(document['_id'])
+                results[index] = {
+                    'index': index,
+                    'status': 'error',
+                    'message': '处理队列已满，请稍后重试',
+                    'tweet_id': str(document['_id'])
+                }
+        
+        if rejected_ids:
+            get_db().tweets.update_many(
+                {'_id': {'$in': rejected_ids}},
+                {'$set': {'analysis_status': 'rejected', 'status_changed_at': datetime.utcnow()}}
+            )
+        
+        accepted = sum(1 for result in results if result['status'] == 'accepted')
+        duplicated = sum(1 for result in results if result['status'] == 'duplicate')
+        failed_count = len(results) - accepted - duplicated
+        logger.info(f"批量推文已保存，成功 {accepted} 条，重复 {duplicated} 条，失败 {failed_count} 条")
+        
+        return jsonify({
+            'status': 'accepted',
+            'message': f'已接收 {accepted}/{len(results)} 条推文',
+            'accepted': accepted,
+            'duplicates': duplicated,
+            'failed': failed_count,
+            'results': results
+        }), 202
+    
+    except Exception as e:
+        logger.error(f"批量处理推文时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'处理失败: {str(e)}'}), 500
+
+# API路由：推文处理队列状态
+@app.route('/api/ingest/stats', methods=['GET'])
+def get_ingest_stats():
+    return jsonify({
+        'status': 'success',
+        'ingest': ingest_queue.stats(),
+        'retry': retry_sweeper.stats(),
+        'dedup': seen_tweets.stats(),
+        'project_cache': project_registry.stats(),
+        'analysis_cache': get_analysis_cache_stats(),
+        'ai_providers': get_provider_health(),
+        'prefilter': get_prefilter_stats(),
+        'telegram': get_delivery_stats(),
+        'notifications': notification_coalescer.stats()
+    }), 200
+
+# API路由：系统状态，数据来自后台探测的缓存，不会访问数据库或Telegram
+@app.route('/api/status', methods=['GET'])
+def get_status():
+    probes = status_monitor.snapshot()
+    counts = probes['counts']['value'] or {}
+    checked = [probe['checked_at'] for probe in probes.values() if probe['checked_at']]
+    
+    return jsonify({
+        'status': 'success',
+        'mongodb_connected': bool(probes['mongodb']['value']),
+        'telegram_connected': bool(probes['telegram']['value']),
+        'ai_provider': AI_PROVIDER,
+        'project_count': counts.get('projects'),
+        'tweet_count': counts.get('tweets'),
+        'uptime': format_uptime(uptime_seconds()),
+        'uptime_seconds': int(uptime_seconds()),
+        'last_updated': max(checked) if checked else None,
+        'probes': probes
+    }), 200
+
 # API路由：添加项目
 @app.route('/api/projects', methods=['POST'])
 def add_project():
@@ -151,16 +552,27 @@ def add_project():
             if field not in data:
                 return jsonify({'status': 'error', 'message': f'缺少必填字段: {field}'}), 400
         
+        try:
+            subscriptions = [normalize_subscription(item) for item in data.get('subscriptions', [])]
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
         project_data = {
             'name': data['name'],
             'token_symbol': data['token_symbol'],
             'twitter_username': data['twitter_username'],
+            'twitter_username_key': username_key(data['twitter_username']),
             'description': data.get('description', ''),
+            'subscriptions': subscriptions,
             'created_at': datetime.utcnow(),
             'active': True
         }
         
-        inserted_id = db.projects.insert_one(project_data).inserted_id
+        try:
+            inserted_id = get_db().projects.insert_one(project_data).inserted_id
+        except DuplicateKeyError:
+            return jsonify({'status': 'error', 'message': f"Twitter用户名已被其他项目使用: {data['twitter_username']}"}), 409
+        project_registry.invalidate()
         logger.info(f"已添加新项目: {data['name']}, ID: {inserted_id}")
         
         return jsonify({
@@ -177,7 +589,7 @@ def add_project():
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
     try:
-        projects = list(db.projects.find())
+        projects = list(get_db().projects.find())
         for project in projects:
             project['_id'] = str(project['_id'])
         
@@ -205,16 +617,22 @@ def update_project(project_id):
         if not update_data:
             return jsonify({'status': 'error', 'message': '没有提供可更新的字段'}), 400
         
+        if 'twitter_username' in update_data:
+            update_data['twitter_username_key'] = username_key(update_data['twitter_username'])
         update_data['updated_at'] = datetime.utcnow()
         
-        result = db.projects.update_one(
-            {'_id': ObjectId(project_id)},
-            {'$set': update_data}
-        )
+        try:
+            result = get_db().projects.update_one(
+                {'_id': ObjectId(project_id)},
+                {'$set': update_data}
+            )
+        except DuplicateKeyError:
+            return jsonify({'status': 'error', 'message': f"Twitter用户名已被其他项目使用: {update_data['twitter_username']}"}), 409
         
         if result.matched_count == 0:
             return jsonify({'status': 'error', 'message': '项目不存在'}), 404
-            
+        
+        project_registry.invalidate()
         logger.info(f"已更新项目, ID: {project_id}")
         
         return jsonify({
@@ -230,11 +648,12 @@ def update_project(project_id):
 @app.route('/api/projects/<project_id>', methods=['DELETE'])
 def delete_project(project_id):
     try:
-        result = db.projects.delete_one({'_id': ObjectId(project_id)})
+        result = get_db().projects.delete_one({'_id': ObjectId(project_id)})
         
         if result.deleted_count == 0:
             return jsonify({'status': 'error', 'message': '项目不存在'}), 404
-            
+        
+        project_registry.invalidate()
         logger.info(f"已删除项目, ID: {project_id}")
         
         return jsonify({
@@ -246,31 +665,274 @@ def delete_project(project_id):
         logger.error(f"删除项目时出错: {str(e)}")
         return jsonify({'status': 'error', 'message': f'删除失败: {str(e)}'}), 500
 
+# API路由：获取项目的通知订阅
+@app.route('/api/projects/<project_id>/subscriptions', methods=['GET'])
+def get_subscriptions(project_id):
+    try:
+        project = get_db().projects.find_one({'_id': ObjectId(project_id)}, {'subscriptions': 1})
+        if not project:
+            return jsonify({'status': 'error', 'message': '项目不存在'}), 404
+        
+        return jsonify({
+            'status': 'success',
+            'subscriptions': project.get('subscriptions', [])
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"获取订阅时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'获取失败: {str(e)}'}), 500
+
+# API路由：替换项目的通知订阅
+@app.route('/api/projects/<project_id>/subscriptions', methods=['PUT'])
+def set_subscriptions(project_id):
+    try:
+        data = request.json
+        items = data.get('subscriptions') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({'status': 'error', 'message': 'subscriptions必须是数组'}), 400
+        
+        try:
+            subscriptions = [normalize_subscription(item) for item in items]
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        result = get_db().projects.update_one(
+            {'_id': ObjectId(project_id)},
+            {'$set': {'subscriptions': subscriptions, 'updated_at': datetime.utcnow()}}
+        )
+        
+        if result.matched_count == 0:
+            return jsonify({'status': 'error', 'message': '项目不存在'}), 404
+        
+        project_registry.invalidate()
+        logger.info(f"已更新项目订阅, ID: {project_id}, 订阅数: {len(subscriptions)}")
+        
+        return jsonify({
+            'status': 'success',
+            'message': '订阅已更新',
+            'subscriptions': subscriptions
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"更新订阅时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'更新失败: {str(e)}'}), 500
+
+# API路由：删除项目的某个聊天订阅
+@app.route('/api/projects/<project_id>/subscriptions/<chat_id>', methods=['DELETE'])
+def delete_subscription(project_id, chat_id):
+    try:
+        result = get_db().projects.update_one(
+            {'_id': ObjectId(project_id)},
+            {'$pull': {'subscriptions': {'chat_id': chat_id}}}
+        )
+        
+        if result.matched_count == 0:
+            return jsonify({'status': 'error', 'message': '项目不存在'}), 404
+        if result.modified_count == 0:
+            return jsonify({'status': 'error', 'message': '订阅不存在'}), 404
+        
+        project_registry.invalidate()
+        logger.info(f"已删除项目订阅, ID: {project_id}, chat_id: {chat_id}")
+        
+        return jsonify({
+            'status': 'success',
+            'message': '订阅已删除'
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"删除订阅时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'删除失败: {str(e)}'}), 500
+
+# /api/tweets 允许通过fields参数返回的字段
+TWEET_FIELDS = ['tweet_id', 'project_id', 'twitter_username', 'token_symbol', 'text',
+                'created_at', 'analysis', 'analysis_status', 'analyzed_at']
+
+def parse_fields_param(fields):
+    """
+    将fields参数转换为MongoDB投影：full/summary/compact为预定义的投影，
+    其他值为逗号分隔的字段列表，支持analysis.impact_level这类子字段；未指定时返回全部字段
+    """
+    if not fields:
+        return TWEET_PROJECTIONS['full']
+    if fields in TWEET_PROJECTIONS:
+        return TWEET_PROJECTIONS[fields]
+    projection = {}
+    for field in fields.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field.split('.')[0] not in TWEET_FIELDS:
+            raise ValueError(f'不支持的字段: {field}')
+        projection[field] = 1
+    return projection or TWEET_PROJECTIONS['full']
+
+def parse_list_param(name):
+    """读取可重复或逗号分隔的查询参数，如 ?impact_level=Bearish,Extremely%20Bearish"""
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(item.strip() for item in value.split(',') if item.strip())
+    return values
+
+def stream_tweets(query, limit, cursor=None, projection=None):
+    """
+    流式返回推文列表，单次最多STREAM_MAX_ROWS条，远大于普通分页的条数上限
+
+    达到条数上限时响应末尾的next_cursor可用于继续读取（恰好读完时下一页可能为空）。
+
+    参数:
+        query (dict): 查询条件
+        limit (int|str): 最大条数，0或超过STREAM_MAX_ROWS时使用STREAM_MAX_ROWS
+        cursor (str, optional): 上一次响应返回的分页游标
+        projection (dict, optional): 字段投影
+
+    返回:
+        Response: 分批输出JSON的流式响应
+
+    异常:
+        ValueError: limit为负数或分页游标无效
+    """
+    limit = int(limit or 0)
+    if limit < 0:
+        raise ValueError('limit不能为负数')
+    limit = min(limit, STREAM_MAX_ROWS) if limit else STREAM_MAX_ROWS
+    if projection and all(value for value in projection.values()):
+        # 生成下一页游标需要这两个字段
+        projection = dict(projection, created_at=1, _id=1)
+    documents = (get_db().tweets.find(apply_cursor(query, cursor), projection)
+                 .sort(PAGE_SORT).limit(limit).batch_size(STREAM_BATCH_SIZE))
+    
+    def tail(last, count):
+        return {'next_cursor': encode_cursor(last) if last is not None and count >= limit else None}
+    
+    return Response(stream_with_context(stream_json_array(documents, 'tweets', tail=tail)), mimetype='application/json')
+
 # API路由：获取推文历史
 @app.route('/api/tweets', methods=['GET'])
 def get_tweets():
     try:
-        project_id = request.args.get('project_id')
-        limit = int(request.args.get('limit', 100))
+        limit = request.args.get('limit', 100)
+        cursor = request.args.get('cursor')
         
-        query = {}
-        if project_id:
-            query['project_id'] = project_id
+        try:
+            # 所有条件组合为一条可以使用复合索引的查询
+            query = Tweet.build_query(
+                project_ids=parse_list_param('project_id'),
+                impact_levels=parse_list_param('impact_level'),
+                event_type=request.args.get('event_type'),
+                twitter_username=parse_list_param('username'),
+                since=request.args.get('since'),
+                until=request.args.get('until')
+            )
+            projection = parse_fields_param(request.args.get('fields'))
+            if request.args.get('stream', '').lower() in ('1', 'true'):
+                return stream_tweets(query, request.args.get('limit', 0), cursor, projection)
+            tweets, next_cursor = fetch_page(get_db().tweets, query, limit, cursor, projection)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
         
-        tweets = list(db.tweets.find(query).sort('created_at', -1).limit(limit))
         for tweet in tweets:
             tweet['_id'] = str(tweet['_id'])
             tweet['created_at'] = tweet['created_at'].isoformat()
         
         return jsonify({
             'status': 'success',
-            'tweets': tweets
+            'tweets': tweets,
+            'next_cursor': next_cursor
         }), 200
     
     except Exception as e:
         logger.error(f"获取推文历史时出错: {str(e)}")
         return jsonify({'status': 'error', 'message': f'获取失败: {str(e)}'}), 500
 
+# API路由：获取单条推文的完整分析结果（推文列表页的详情）
+@app.route('/api/tweets/<tweet_id>', methods=['GET'])
+def get_tweet(tweet_id):
+    try:
+        # 支持数据库ID和Twitter推文ID
+        query = {'_id': ObjectId(tweet_id)} if ObjectId.is_valid(tweet_id) else {'tweet_id': tweet_id}
+        tweet_data = get_db().tweets.find_one(query, TWEET_PROJECTIONS['full'])
+        if not tweet_data:
+            return jsonify({'status': 'error', 'message': '推文不存在'}), 404
+        
+        return jsonify({
+            'status': 'success',
+            'tweet': Tweet.from_document(tweet_data).to_dict()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"获取推文详情时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'获取失败: {str(e)}'}), 500
+
+# API路由：全文检索推文
+@app.route('/api/tweets/search', methods=['GET'])
+def search_tweets():
+    keywords = request.args.get('q', '').strip()
+    if not keywords:
+        return jsonify({'status': 'error', 'message': '缺少检索关键词q'}), 400
+    
+    try:
+        try:
+            limit = int(request.args.get('limit', 20))
+            results = Tweet.search(
+                keywords,
+                limit=limit,
+                projection=parse_fields_param(request.args.get('fields')),
+                project_ids=parse_list_param('project_id'),
+                impact_levels=parse_list_param('impact_level'),
+                since=request.args.get('since'),
+                until=request.args.get('until')
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        tweets = []
+        for tweet, score in results:
+            tweet_dict = tweet.to_dict()
+            tweet_dict['score'] = round(score, 4)
+            tweets.append(tweet_dict)
+        
+        return jsonify({
+            'status': 'success',
+            'query': keywords,
+            'tweets': tweets
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"检索推文时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'检索失败: {str(e)}'}), 500
+
+# API路由：情绪汇总时间序列，只读取sentiment_rollups集合
+@app.route('/api/stats/sentiment', methods=['GET'])
+def get_sentiment_stats():
+    try:
+        granularity = request.args.get('granularity', 'hour')
+        if granularity not in ROLLUP_GRANULARITIES:
+            return jsonify({'status': 'error', 'message': f'无效的时间粒度: {granularity}'}), 400
+        
+        try:
+            # 默认范围：小时粒度最近24小时，天粒度最近30天
+            since = parse_time_bound(request.args.get('since') or ('24h' if granularity == 'hour' else '30d'))
+            until = parse_time_bound(request.args.get('until'))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        series = get_sentiment_series(parse_list_param('project_id'), granularity, since, until)
+        for points in series.values():
+            for point in points:
+                point['bucket'] = point['bucket'].isoformat()
+        
+        return jsonify({
+            'status': 'success',
+            'granularity': granularity,
+            'since': since.isoformat() if since else None,
+            'until': until.isoformat() if until else None,
+            'series': series
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"获取情绪统计时出错: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'获取失败: {str(e)}'}), 500
+
 # 主函数
 if __name__ == '__main__':
     port = int(os.getenv('FLASK_PORT', 5000))
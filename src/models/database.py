@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import threading
+import pymongo
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# MongoDB连接配置
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'xmonitor')
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 30000))
+
+# 每个进程共享一个MongoClient（自带连接池）
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """
+    获取当前进程共享的MongoClient
+
+    首次调用时才创建客户端，且不会立即建立连接（connect=False），
+    因此导入模型不产生任何网络开销。gunicorn fork出的子进程会重新创建客户端，
+    不会复用父进程的连接池。
+
+    返回:
+        pymongo.MongoClient: MongoDB客户端
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = pymongo.MongoClient(
+                MONGO_URI,
+                connect=False,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS
+            )
+            _client_pid = os.getpid()
+            logger.debug(f"已创建MongoDB客户端，连接池上限: {MONGO_MAX_POOL_SIZE}")
+    return _client
+
+
+def get_db():
+    """
+    获取XMonitor数据库
+
+    返回:
+        pymongo.database.Database: 数据库对象，客户端创建失败时返回None
+    """
+    try:
+        return get_client()[MONGO_DB_NAME]
+    except Exception as e:
+        logger.error(f"MongoDB连接失败: {str(e)}")
+        return None
+
+
+def close_client():
+    """关闭当前进程的MongoDB客户端"""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def _reset_after_fork():
+    # 子进程中丢弃父进程的客户端引用，下次访问时重新创建
+    global _client, _client_pid, _lock
+    _client = None
+    _client_pid = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
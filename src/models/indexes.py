@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import threading
+from datetime import datetime
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from .database import get_db
+from .pagination import PAGE_SORT
+from .project import backfill_username_keys
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 分析结果缓存的过期时间（秒），与utils.ai_analyzer中的配置一致
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+# 推文处理进程的心跳在停止更新后保留的时间（秒）
+INGEST_WORKER_TTL = int(os.getenv('INGEST_WORKER_TTL', 24 * 3600))
+# 已发送的Telegram通知在发件箱中保留的时间（秒）
+TELEGRAM_OUTBOX_TTL = int(os.getenv('TELEGRAM_OUTBOX_TTL', 7 * 24 * 3600))
+
+# 各集合需要的索引，应用启动或manage_indexes.py ensure时创建
+INDEX_SPECS = {
+    "tweets": [
+        # Webhook去重的最终依据
+        IndexModel(
+            [("tweet_id", ASCENDING)],
+            name="tweet_id_unique",
+            unique=True,
+            partialFilterExpression={"tweet_id": {"$type": "string"}}
+        ),
+        # get_recent_tweets / 推文列表（含 (created_at, _id) 键集分页）
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id_desc"),
+        # get_project_tweets / 按项目筛选的推文列表
+        IndexModel(
+            [("project_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="project_created_at_id"
+        ),
+        # get_by_impact_level
+        IndexModel(
+            [("analysis.impact_level", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="impact_level_created_at_id"
+        ),
+        # Tweet.build_query: 项目集合 + 影响等级集合，等值字段在前、排序字段在后
+        IndexModel(
+            [("project_id", ASCENDING), ("analysis.impact_level", ASCENDING),
+             ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="project_impact_level_created_at_id"
+        ),
+        # Tweet.build_query: 按Twitter用户名筛选
+        IndexModel(
+            [("twitter_username", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="twitter_username_created_at_id"
+        ),
+        # RetrySweeper: 按状态领取长时间未完成分析的推文
+        IndexModel([("analysis_status", ASCENDING), ("status_changed_at", ASCENDING)], name="analysis_status_changed_at"),
+        # Tweet.search: 全文检索，search字段是预先切分好的检索词（见search_terms.py），
+        # 因此不使用MongoDB的语言分词和词干提取；每个集合只能有一个文本索引
+        IndexModel(
+            [("search.text", TEXT), ("search.event_type", TEXT), ("search.key_factors", TEXT)],
+            name="search_text",
+            weights={"search.event_type": 10, "search.key_factors": 3, "search.text": 5},
+            default_language="none"
+        ),
+    ],
+    "projects": [
+        # get_by_twitter_username / ProjectRegistry: 规范化（小写）的用户名，大小写不同的用户名视为同一个
+        IndexModel(
+            [("twitter_username_key", ASCENDING)],
+            name="twitter_username_key_unique",
+            unique=True,
+            partialFilterExpression={"twitter_username_key": {"$type": "string"}}
+        ),
+    ],
+    "analysis_cache": [
+        # 过期的分析结果由MongoDB自动清理
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=ANALYSIS_CACHE_TTL),
+    ],
+    "sentiment_rollups": [
+        # record_impact按该键upsert；get_sentiment_series按项目和粒度读取时间范围
+        IndexModel(
+            [("project_id", ASCENDING), ("granularity", ASCENDING), ("bucket", DESCENDING)],
+            name="project_granularity_bucket_unique",
+            unique=True
+        ),
+    ],
+    "telegram_outbox": [
+        # 投递线程领取到期消息
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        # 只有已发送的消息带sent_at，过期后自动清理；失败的消息保留以便排查
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=TELEGRAM_OUTBOX_TTL),
+    ],
+    "notification_digests": [
+        # 每个 (聊天, 代币) 同时只有一个打开的合并窗口，并发提交时由唯一索引保证
+        IndexModel(
+            [("chat_id", ASCENDING), ("token", ASCENDING)],
+            name="chat_token_open_unique",
+            unique=True,
+            partialFilterExpression={"status": "open"}
+        ),
+        # 后台线程领取到期的窗口
+        IndexModel([("status", ASCENDING), ("flush_at", ASCENDING)], name="status_flush_at"),
+    ],
+    "ingest_workers": [
+        # 已退出的进程不再更新心跳，过期后自动清理
+        IndexModel([("heartbeat_at", ASCENDING)], name="heartbeat_at_ttl", expireAfterSeconds=INGEST_WORKER_TTL),
+    ],
+    "telegram_rate_limits": [
+        # 跨进程限流的时间窗计数器，时间窗结束后自动清理
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# 模型中的热点查询，用于explain检查: (名称, 集合, 查询条件, 排序)
+MODEL_QUERIES = [
+    ("Tweet.get_recent_tweets", "tweets", {}, PAGE_SORT),
+    ("Tweet.get_project_tweets", "tweets", {"project_id": "000000000000000000000000"}, PAGE_SORT),
+    ("Tweet.get_by_impact_level", "tweets", {"analysis.impact_level": "Bullish"}, PAGE_SORT),
+    ("Tweet.find(projects, impact_levels)", "tweets",
+     {"project_id": {"$in": ["000000000000000000000000", "000000000000000000000001"]},
+      "analysis.impact_level": {"$in": ["Bearish", "Extremely Bearish"]}}, PAGE_SORT),
+    ("Tweet.find(twitter_username)", "tweets", {"twitter_username": "_"}, PAGE_SORT),
+    ("Tweet.get_by_twitter_id", "tweets", {"tweet_id": "0"}, None),
+    ("RetrySweeper.sweep", "tweets", {"analysis_status": {"$in": ["pending", "failed", "rejected", "processing"]}},
+     [("status_changed_at", 1)]),
+    # 按相关度排序的全文检索本身就需要内存排序，这里只检查是否使用了文本索引
+    ("Tweet.search", "tweets", {"$text": {"$search": "_"}}, None),
+    ("Project.get_by_twitter_username", "projects", {"twitter_username_key": "_"}, None),
+    ("get_sentiment_series", "sentiment_rollups", {"project_id": "*", "granularity": "hour"}, [("bucket", -1)]),
+]
+
+
+def ensure_indexes(db=None):
+    """
+    创建所有声明的索引，已存在的索引不会重复创建
+
+    参数:
+        db (Database, optional): 数据库对象，默认使用共享连接
+
+    返回:
+        dict: 每个集合成功创建（或已存在）的索引名称列表
+    """
+    db = db if db is not None else get_db()
+    if db is None:
+        logger.error("无法创建索引：MongoDB连接未初始化")
+        return {}
+
+    # 旧项目文档补充规范化的用户名，之后才能创建twitter_username_key_unique
+    backfill_username_keys(db)
+
+    created = {}
+    for collection_name, indexes in INDEX_SPECS.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+        # 逐个创建，某个索引失败（例如历史数据违反唯一约束）不影响其他索引
+        for index in indexes:
+            try:
+                created[collection_name].extend(collection.create_indexes([index]))
+            except OperationFailure as e:
+                logger.error(f"创建索引失败 {collection_name}.{index.document['name']}: {str(e)}")
+                if e.code == 11000 and collection_name == "tweets":
+                    logger.error("已有数据违反唯一约束，请先运行: python src/scripts/manage_indexes.py dedupe")
+                elif e.code == 11000 and collection_name == "projects":
+                    logger.error("存在只有大小写不同的Twitter用户名，请合并或删除重复的项目后重试")
+    logger.info(f"索引检查完成: {created}")
+    return created
+
+
+def ensure_indexes_in_background(db=None):
+    """
+    在后台线程中创建索引，应用启动时调用，不会因等待数据库或构建索引而阻塞导入
+
+    参数:
+        db (Database, optional): 数据库对象，默认使用共享连接
+
+    返回:
+        threading.Thread: 已启动的线程
+    """
+    def run():
+        try:
+            ensure_indexes(db)
+        except Exception as e:
+            logger.error(f"创建数据库索引失败: {str(e)}")
+
+    thread = threading.Thread(target=run, name="ensure-indexes", daemon=True)
+    thread.start()
+    return thread
+
+
+def _keep_rank(tweet):
+    # 优先保留已分析完成的推文，其次是最早写入的一条
+    return (tweet.get("analysis_status") != "done", tweet.get("created_at") or datetime.max, str(tweet["_id"]))
+
+
+def dedupe_tweets(db=None, dry_run=False):
+    """
+    删除tweet_id重复的推文，每个tweet_id只保留一条，之后才能创建tweet_id_unique索引
+
+    保留已分析完成的推文，都未完成时保留最早写入的一条。被删除的推文如果计入过情绪汇总，
+    需要再运行 backfill_sentiment.py 重建汇总。
+
+    参数:
+        db (Database, optional): 数据库对象，默认使用共享连接
+        dry_run (bool): 只统计不删除
+
+    返回:
+        tuple: (重复的tweet_id数, 删除（或将删除）的推文数)
+    """
+    db = db if db is not None else get_db()
+    if db is None:
+        logger.error("无法清理重复推文：MongoDB连接未初始化")
+        return 0, 0
+
+    pipeline = [
+        {"$match": {"tweet_id": {"$type": "string"}}},
+        {"$group": {
+            "_id": "$tweet_id",
+            "tweets": {"$push": {
+                "_id": "$_id",
+                # 早期的推文没有analysis_status字段
+                "analysis_status": {"$ifNull": ["$analysis_status", None]},
+                "created_at": "$created_at"
+            }},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    groups = 0
+    removed = 0
+    for group in db.tweets.aggregate(pipeline, allowDiskUse=True):
+        groups += 1
+        extra_ids = [tweet["_id"] for tweet in sorted(group["tweets"], key=_keep_rank)[1:]]
+        if not dry_run:
+            db.tweets.delete_many({"_id": {"$in": extra_ids}})
+        removed += len(extra_ids)
+    logger.info(f"重复的tweet_id: {groups} 个，{'将删除' if dry_run else '已删除'} {removed} 条推文")
+    return groups, removed
+
+
+def plan_stages(plan):
+    """递归收集执行计划中的所有阶段名称"""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def check_query_plans(db=None, limit=100):
+    """
+    对模型中的热点查询执行explain()，标记全表扫描和内存排序
+
+    参数:
+        db (Database, optional): 数据库对象，默认使用共享连接
+        limit (int): explain时使用的limit
+
+    返回:
+        list: 每个查询的检查结果，包含name、collection、stages、collscan、in_memory_sort
+    """
+    db = db if db is not None else get_db()
+    if db is None:
+        logger.error("无法检查查询计划：MongoDB连接未初始化")
+        return []
+
+    results = []
+    for name, collection_name, query, sort in MODEL_QUERIES:
+        cursor = db[collection_name].find(query).limit(limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = plan_stages(winning_plan)
+        results.append({
+            "name": name,
+            "collection": collection_name,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return results
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import base64
+import binascii
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# 单页最大条数，超过时按此值截断
+MAX_PAGE_SIZE = int(os.getenv('TWEETS_MAX_PAGE_SIZE', 500))
+
+# 分页排序：created_at倒序，相同时间按_id倒序保证顺序稳定
+PAGE_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def clamp_page_size(limit, default=100):
+    """将请求的条数限制在 1..MAX_PAGE_SIZE 之间"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(document):
+    """
+    根据一页中最后一条文档生成游标
+
+    参数:
+        document (dict): 推文文档，需包含created_at和_id
+
+    返回:
+        str: 不透明的URL安全游标字符串
+    """
+    payload = json.dumps({
+        "t": document["created_at"].isoformat(),
+        "i": str(document["_id"])
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    解析游标
+
+    参数:
+        cursor (str): encode_cursor生成的游标
+
+    返回:
+        tuple: (created_at, _id)
+
+    异常:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId, binascii.Error, UnicodeEncodeError):
+        raise ValueError("无效的分页游标")
+
+
+def apply_cursor(query, cursor):
+    """
+    在查询条件上追加"位于游标之后"的条件
+
+    参数:
+        query (dict): 原查询条件
+        cursor (str, optional): 分页游标，为空时原样返回
+
+    返回:
+        dict: 新的查询条件
+    """
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}}
+    ]}
+    if not query:
+        return after_cursor
+    return {"$and": [query, after_cursor]}
+
+
+def fetch_page(collection, query, limit, cursor=None, projection=None):
+    """
+    按 (created_at, _id) 键集分页读取一页文档，深页与首页代价相同
+
+    参数:
+        collection (Collection): MongoDB集合
+        query (dict): 查询条件
+        limit (int): 每页条数（会被限制在MAX_PAGE_SIZE以内）
+        cursor (str, optional): 上一页返回的游标
+        projection (dict, optional): 字段投影
+
+    返回:
+        tuple: (文档列表, 下一页游标或None)
+    """
+    limit = clamp_page_size(limit)
+    if projection:
+        # 生成下一页游标需要这两个字段
+        projection = dict(projection)
+        if all(value for value in projection.values()):
+            projection.update({"created_at": 1, "_id": 1})
+    documents = list(
+        collection.find(apply_cursor(query, cursor), projection)
+        .sort(PAGE_SORT)
+        .limit(limit + 1)
+    )
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1])
+    return documents, next_cursor
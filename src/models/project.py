@@ -3,33 +3,68 @@
 
 import os
 import json
+import time
 import logging
+import threading
 from datetime import datetime
 from bson import ObjectId
-import pymongo
 from dotenv import load_dotenv
 
+from .database import get_db
+
 # 加载环境变量
 load_dotenv()
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-# MongoDB连接
-try:
-    mongo_client = pymongo.MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-    db = mongo_client[os.getenv('MONGO_DB_NAME', 'xmonitor')]
-    projects_collection = db.projects
-    logger.debug("项目模型已连接到MongoDB")
-except Exception as e:
-    logger.error(f"项目模型MongoDB连接失败: {str(e)}")
-    db = None
-    projects_collection = None
+def _projects_collection():
+    """获取项目集合，数据库连接由共享的database模块统一管理"""
+    db = get_db()
+    return db.projects if db is not None else None
+
+def _versions_collection():
+    """获取缓存版本号集合，各进程据此判断项目缓存是否需要刷新"""
+    db = get_db()
+    return db.cache_versions if db is not None else None
+
+def username_key(twitter_username):
+    """Twitter用户名的规范化形式（小写），用于不区分大小写的查找和唯一索引"""
+    return twitter_username.lower() if twitter_username else None
+
+def backfill_username_keys(db=None):
+    """
+    为缺少twitter_username_key的项目补充规范化的用户名，创建唯一索引前需要执行
+
+    参数:
+        db (Database, optional): 数据库对象，默认使用共享连接
+
+    返回:
+        int: 更新的项目数
+    """
+    db = db if db is not None else get_db()
+    if db is None:
+        logger.error("无法补充项目用户名：MongoDB连接未初始化")
+        return 0
+    updated = 0
+    for project_data in db.projects.find({"twitter_username_key": {"$exists": False}}, {"twitter_username": 1}):
+        db.projects.update_one(
+            {"_id": project_data["_id"]},
+            {"$set": {"twitter_username_key": username_key(project_data.get("twitter_username"))}}
+        )
+        updated += 1
+    if updated:
+        logger.info(f"已为 {updated} 个项目补充规范化的Twitter用户名")
+    return updated
 
 class Project:
     """项目模型类，用于管理加密货币项目"""
     
-    def __init__(self, name, token_symbol, twitter_username, description="", active=True, _id=None):
+    __slots__ = ("name", "token_symbol", "twitter_username", "description", "active", "_id",
+                 "subscriptions", "created_at")
+    
+    def __init__(self, name, token_symbol, twitter_username, description="", active=True, _id=None,
+                 subscriptions=None):
         """
         初始化项目
         
@@ -40,6 +75,7 @@ class Project:
             description (str): 项目描述
             active (bool): 是否激活监控
             _id (ObjectId, optional): MongoDB的ObjectId
+            subscriptions (list, optional): 通知订阅，每项包含chat_id、min_impact_level和buttons
         """
         self.name = name
         self.token_symbol = token_symbol
@@ -47,11 +83,35 @@ class Project:
         self.description = description
         self.active = active
         self._id = _id
+        self.subscriptions = subscriptions or []
         self.created_at = datetime.utcnow()
+    
+    @classmethod
+    def from_document(cls, project_data):
+        """
+        由MongoDB文档构造项目对象
+        
+        参数:
+            project_data (dict): 项目文档
+        
+        返回:
+            Project: 项目对象，保留文档中的创建时间
+        """
+        project = cls.__new__(cls)
+        project.name = project_data.get("name")
+        project.token_symbol = project_data.get("token_symbol")
+        project.twitter_username = project_data.get("twitter_username")
+        project.description = project_data.get("description", "")
+        project.active = project_data.get("active", True)
+        project._id = project_data.get("_id")
+        project.subscriptions = project_data.get("subscriptions", [])
+        project.created_at = project_data.get("created_at")
+        return project
         
     def save(self):
         """保存项目到数据库"""
-        if not projects_collection:
+        projects_collection = _projects_collection()
+        if projects_collection is None:
             logger.error("无法保存项目：MongoDB连接未初始化")
             return None
             
@@ -59,8 +119,10 @@ class Project:
             "name": self.name,
             "token_symbol": self.token_symbol,
             "twitter_username": self.twitter_username,
+            "twitter_username_key": username_key(self.twitter_username),
             "description": self.description,
             "active": self.active,
+            "subscriptions": self.subscriptions,
             "created_at": self.created_at,
         }
         
@@ -86,13 +148,16 @@ class Project:
             "twitter_username": self.twitter_username,
             "description": self.description,
             "active": self.active,
-            "created_at": self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else str(self.created_at)
+            "subscriptions": self.subscriptions,
+            "created_at": self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else (
+                str(self.created_at) if self.created_at is not None else None)
         }
     
     @classmethod
     def get_by_id(cls, project_id):
         """根据ID获取项目"""
-        if not projects_collection:
+        projects_collection = _projects_collection()
+        if projects_collection is None:
             logger.error("无法获取项目：MongoDB连接未初始化")
             return None
             
@@ -100,65 +165,246 @@ class Project:
         if not project_data:
             return None
             
-        return cls(
-            name=project_data["name"],
-            token_symbol=project_data["token_symbol"],
-            twitter_username=project_data["twitter_username"],
-            description=project_data.get("description", ""),
-            active=project_data.get("active", True),
-            _id=project_data["_id"]
-        )
+        return cls.from_document(project_data)
     
     @classmethod
     def get_by_twitter_username(cls, twitter_username):
-        """根据Twitter用户名获取项目"""
-        if not projects_collection:
+        """根据Twitter用户名获取项目（不区分大小写）"""
+        projects_collection = _projects_collection()
+        if projects_collection is None:
             logger.error("无法获取项目：MongoDB连接未初始化")
             return None
             
-        project_data = projects_collection.find_one({"twitter_username": twitter_username})
+        project_data = projects_collection.find_one({"twitter_username_key": username_key(twitter_username)})
         if not project_data:
             return None
             
-        return cls(
-            name=project_data["name"],
-            token_symbol=project_data["token_symbol"],
-            twitter_username=project_data["twitter_username"],
-            description=project_data.get("description", ""),
-            active=project_data.get("active", True),
-            _id=project_data["_id"]
-        )
+        return cls.from_document(project_data)
     
     @classmethod
     def get_all(cls, active_only=False):
         """获取所有项目"""
-        if not projects_collection:
+        projects_collection = _projects_collection()
+        if projects_collection is None:
             logger.error("无法获取项目：MongoDB连接未初始化")
             return []
             
         query = {"active": True} if active_only else {}
         projects_data = projects_collection.find(query)
         
-        projects = []
-        for project_data in projects_data:
-            project = cls(
-                name=project_data["name"],
-                token_symbol=project_data["token_symbol"],
-                twitter_username=project_data["twitter_username"],
-                description=project_data.get("description", ""),
-                active=project_data.get("active", True),
-                _id=project_data["_id"]
-            )
-            projects.append(project)
-            
-        return projects
+        return [cls.from_document(project_data) for project_data in projects_data]
+    
+    @classmethod
+    def get_many(cls, project_ids):
+        """
+        一次查询获取多个项目
+        
+        参数:
+            project_ids (iterable): 项目ID列表（字符串或ObjectId），无效的ID会被忽略
+        
+        返回:
+            dict: 字符串形式的项目ID到项目对象的映射
+        """
+        projects_collection = _projects_collection()
+        if projects_collection is None:
+            logger.error("无法获取项目：MongoDB连接未初始化")
+            return {}
+        
+        object_ids = {ObjectId(project_id) for project_id in project_ids if project_id and ObjectId.is_valid(project_id)}
+        if not object_ids:
+            return {}
+        
+        return {
+            str(project_data["_id"]): cls.from_document(project_data)
+            for project_data in projects_collection.find({"_id": {"$in": list(object_ids)}})
+        }
     
     @classmethod
     def delete(cls, project_id):
         """删除项目"""
-        if not projects_collection:
+        projects_collection = _projects_collection()
+        if projects_collection is None:
             logger.error("无法删除项目：MongoDB连接未初始化")
             return False
             
         result = projects_collection.delete_one({"_id": ObjectId(project_id)})
-        return result.deleted_count > 0 
\ No newline at end of file
+        return result.deleted_count > 0
+
+
+# 项目缓存配置
+PROJECT_CACHE_TTL = float(os.getenv('PROJECT_CACHE_TTL', 300))
+# 两次检查项目版本号（其他进程是否增删改了项目）之间的最小间隔（秒）
+PROJECT_CACHE_VERSION_CHECK = float(os.getenv('PROJECT_CACHE_VERSION_CHECK', 2))
+# 查不到的项目ID或用户名在该时间（秒）内直接返回None，不再访问数据库
+PROJECT_CACHE_NEGATIVE_TTL = float(os.getenv('PROJECT_CACHE_NEGATIVE_TTL', 60))
+# cache_versions集合中项目版本号文档的_id
+PROJECTS_VERSION_ID = "projects"
+
+
+class ProjectRegistry:
+    """
+    进程内的项目缓存，供Webhook热路径按用户名或ID解析项目
+
+    项目列表很小且很少变动，因此整体加载后按TTL刷新。增删改项目时调用invalidate()，
+    它会递增cache_versions中的版本号，各进程至多每PROJECT_CACHE_VERSION_CHECK秒读取一次版本号，
+    发现变化后重新加载。查不到的ID或用户名只按主键或索引查询一次数据库，结果在负缓存中保留
+    PROJECT_CACHE_NEGATIVE_TTL秒，不会触发整体重新加载。
+    """
+
+    def __init__(self, ttl=PROJECT_CACHE_TTL, version_check=PROJECT_CACHE_VERSION_CHECK,
+                 negative_ttl=PROJECT_CACHE_NEGATIVE_TTL):
+        """
+        初始化项目缓存
+
+        参数:
+            ttl (float): 缓存有效期（秒）
+            version_check (float): 检查项目版本号的最小间隔（秒）
+            negative_ttl (float): 未命中结果的缓存时间（秒）
+        """
+        self.ttl = ttl
+        self.version_check = version_check
+        self.negative_ttl = negative_ttl
+        self._by_id = {}
+        self._by_username = {}
+        self._negative = {}
+        self._version = None
+        self._loaded_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _read_version(self):
+        versions_collection = _versions_collection()
+        if versions_collection is None:
+            return None
+        try:
+            document = versions_collection.find_one({"_id": PROJECTS_VERSION_ID})
+        except Exception as e:
+            logger.warning(f"读取项目版本号失败: {str(e)}")
+            return self._version
+        return document.get("version") if document else 0
+
+    def refresh(self):
+        """从数据库重新加载所有项目"""
+        projects_collection = _projects_collection()
+        if projects_collection is None:
+            logger.error("无法加载项目缓存：MongoDB连接未初始化")
+            return
+        with self._lock:
+            # 先读版本号再加载，加载期间发生的修改会在下次检查时被发现
+            version = self._read_version()
+            by_id = {}
+            by_username = {}
+            for project_data in projects_collection.find():
+                by_id[str(project_data["_id"])] = project_data
+                key = username_key(project_data.get("twitter_username"))
+                if key:
+                    by_username[key] = project_data
+            # 整体替换，读取方无需加锁
+            self._by_id = by_id
+            self._by_username = by_username
+            self._negative = {}
+            self._version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+            self.refreshes += 1
+            logger.debug(f"项目缓存已刷新，共 {len(by_id)} 个项目，版本: {version}")
+
+    def invalidate(self):
+        """使所有进程的缓存失效：本进程下次查询时重新加载，其他进程在下次检查版本号时重新加载"""
+        self._loaded_at = None
+        versions_collection = _versions_collection()
+        if versions_collection is None:
+            return
+        try:
+            versions_collection.update_one({"_id": PROJECTS_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            logger.error(f"更新项目版本号失败，其他进程将在TTL后刷新: {str(e)}")
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.ttl:
+            self.refresh()
+            return
+        if now - self._checked_at > self.version_check:
+            self._checked_at = now
+            if self._read_version() != self._version:
+                self.refresh()
+
+    def _fetch_one(self, index_name, key):
+        """按主键或规范化用户名查询单个项目，用于缓存加载后才出现、但未调用invalidate的项目"""
+        projects_collection = _projects_collection()
+        if projects_collection is None:
+            return None
+        if index_name == "_by_id":
+            if not ObjectId.is_valid(key):
+                return None
+            return projects_collection.find_one({"_id": ObjectId(key)})
+        return projects_collection.find_one({"twitter_username_key": key})
+
+    def _lookup(self, index_name, key):
+        self._ensure_fresh()
+        project_data = getattr(self, index_name).get(key)
+        if project_data is None:
+            expires_at = self._negative.get((index_name, key))
+            if expires_at is None or expires_at < time.monotonic():
+                project_data = self._fetch_one(index_name, key)
+                with self._lock:
+                    if project_data is None:
+                        self._negative[(index_name, key)] = time.monotonic() + self.negative_ttl
+                    else:
+                        self._negative.pop((index_name, key), None)
+                        # 复制后整体替换，与refresh一致，读取方无需加锁
+                        by_id = dict(self._by_id)
+                        by_id[str(project_data["_id"])] = project_data
+                        self._by_id = by_id
+                        username = username_key(project_data.get("twitter_username"))
+                        if username:
+                            by_username = dict(self._by_username)
+                            by_username[username] = project_data
+                            self._by_username = by_username
+        if project_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return project_data
+
+    def get_by_id(self, project_id):
+        """
+        根据ID获取项目文档
+
+        参数:
+            project_id (str|ObjectId): 项目ID
+
+        返回:
+            dict: 项目文档，找不到时返回None
+        """
+        if not project_id:
+            return None
+        return self._lookup("_by_id", str(project_id))
+
+    def get_by_twitter_username(self, twitter_username):
+        """根据Twitter用户名获取项目文档（不区分大小写）"""
+        if not twitter_username:
+            return None
+        return self._lookup("_by_username", username_key(twitter_username))
+
+    def resolve(self, project_id=None, twitter_username=None):
+        """优先按项目ID，否则按Twitter用户名解析项目文档"""
+        if project_id:
+            return self.get_by_id(project_id)
+        return self.get_by_twitter_username(twitter_username)
+
+    def stats(self):
+        return {
+            "projects": len(self._by_id),
+            "negative": len(self._negative),
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+
+project_registry = ProjectRegistry()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+
+# 英文单词和数字
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+# 连续的中日韩文字
+CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]+')
+URL_PATTERN = re.compile(r'https?://\S+')
+
+# 查询时忽略的常见词：英文停用词整体去掉，中文虚词作为分隔符（不参与组成相邻两字）
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to', 'was', 'we', 'will', 'with', 'you'
+))
+CJK_STOP_CHARS = re.compile(r'[的了是在和与及或也都就而之]')
+
+
+def tokenize(text):
+    """
+    将文本切分为检索词：英文按单词，中文按相邻两字（单字词保留单字）
+
+    MongoDB文本索引只按空白和标点分词，无法切分中文，
+    因此写入和查询时都先用这里的规则切分，再交给文本索引。
+
+    参数:
+        text (str): 原始文本
+
+    返回:
+        list: 检索词列表
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = URL_PATTERN.sub(' ', text)
+    tokens = WORD_PATTERN.findall(text)
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def search_fields(text, analysis=None):
+    """
+    生成推文文档中供文本索引使用的search字段
+
+    参数:
+        text (str): 推文内容
+        analysis (dict, optional): 分析结果，使用其中的event_type和key_factors
+
+    返回:
+        dict: {"text": ..., "event_type": ..., "key_factors": ...}，值为空格分隔的检索词
+    """
+    analysis = analysis or {}
+    key_factors = analysis.get('key_factors') or []
+    if isinstance(key_factors, str):
+        key_factors = [key_factors]
+    return {
+        'text': ' '.join(tokenize(text)),
+        'event_type': ' '.join(tokenize(analysis.get('event_type'))),
+        'key_factors': ' '.join(token for factor in key_factors for token in tokenize(str(factor)))
+    }
+
+
+def search_query(query):
+    """
+    将用户输入的关键词转换为$text的$search字符串
+
+    $search中空格分隔的词是“任一命中”，关键词一长召回量和排序开销就会急剧增加；
+    这里把每个检索词加上引号，变为所有检索词都必须命中。去掉停用词，重复的检索词只保留一个；
+    关键词全部是停用词时保留原检索词。
+
+    参数:
+        query (str): 用户输入的关键词
+
+    返回:
+        str: $search字符串，没有检索词时为空字符串
+    """
+    tokens = [token for token in tokenize(CJK_STOP_CHARS.sub(' ', query or '')) if token not in STOPWORDS]
+    if not tokens:
+        tokens = tokenize(query)
+    return ' '.join(f'"{token}"' for token in dict.fromkeys(tokens))
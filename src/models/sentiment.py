@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .database import get_db
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 汇总的时间粒度
+ROLLUP_GRANULARITIES = ("hour", "day")
+# 各时间粒度的时间桶长度
+BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# 所有项目合计的汇总使用的project_id
+ALL_PROJECTS = "*"
+# 计入情绪汇总的推文：分析完成的推文，以及没有analysis_status字段、已有影响等级的早期推文
+COUNTED_TWEETS = {"$or": [
+    {"analysis_status": "done", "analysis.impact_level": {"$type": "string"}},
+    {"analysis_status": {"$exists": False}, "analysis.impact_level": {"$type": "string"}}
+]}
+# /api/stats/sentiment 单个项目单次最多返回的时间桶数
+SENTIMENT_MAX_BUCKETS = int(os.getenv('SENTIMENT_MAX_BUCKETS', 24 * 90))
+
+
+def _rollups_collection():
+    """获取情绪汇总集合，数据库连接由共享的database模块统一管理"""
+    db = get_db()
+    return db.sentiment_rollups if db is not None else None
+
+
+def bucket_start(moment, granularity):
+    """
+    计算时间所在的汇总时间桶（UTC）
+
+    参数:
+        moment (datetime): 推文时间
+        granularity (str): hour 或 day
+
+    返回:
+        datetime: 时间桶的起点
+    """
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollup_key(project_id, granularity, bucket):
+    return {"project_id": project_id, "granularity": granularity, "bucket": bucket}
+
+
+def fill_buckets(points, granularity, since=None, until=None, max_buckets=None):
+    """
+    为没有推文的时间桶补上计数为0的点，使时间序列连续
+
+    参数:
+        points (list): 按时间升序的 {"bucket", "counts", "total"} 列表
+        granularity (str): hour 或 day
+        since (datetime, optional): 起始时间（含），默认从第一个有数据的时间桶开始
+        until (datetime, optional): 结束时间（不含），默认到当前时间所在的时间桶
+        max_buckets (int, optional): 最多返回的时间桶数，超出时保留最近的时间桶
+
+    返回:
+        list: 连续的时间序列
+    """
+    if since is None and not points:
+        return []
+    step = BUCKET_STEPS[granularity]
+    start = bucket_start(since, granularity) if since else points[0]["bucket"]
+    end = until or bucket_start(datetime.utcnow(), granularity) + step
+    count = max(0, -(-(end - start) // step))
+    if max_buckets and count > max_buckets:
+        start += (count - max_buckets) * step
+    existing = {point["bucket"]: point for point in points}
+    filled = []
+    bucket = start
+    while bucket < end:
+        filled.append(existing.get(bucket) or {"bucket": bucket, "counts": {}, "total": 0})
+        bucket += step
+    return filled
+
+
+def counted_level(document):
+    """
+    推文此前计入情绪汇总的影响等级，规则与COUNTED_TWEETS一致
+
+    参数:
+        document (dict): 推文文档，需包含analysis_status和analysis.impact_level
+
+    返回:
+        str: 影响等级，未计入汇总时为None
+    """
+    if document.get("analysis_status") not in ("done", None):
+        return None
+    impact_level = (document.get("analysis") or {}).get("impact_level")
+    return impact_level if isinstance(impact_level, str) else None
+
+
+def record_impact(project_id, created_at, impact_level, previous_level=None):
+    """
+    推文分析结果写入后，原子地累加项目和全部项目的小时/天汇总
+
+    同一条推文重新分析时传入previous_level，旧等级减一、新等级加一，计数不会重复。
+
+    参数:
+        project_id (str): 项目ID
+        created_at (datetime): 推文时间，决定所在的时间桶
+        impact_level (str): 新的影响等级
+        previous_level (str, optional): 此前写入的影响等级，首次分析时为None
+
+    返回:
+        bool: 是否已更新
+    """
+    if not impact_level or impact_level == previous_level:
+        return False
+    rollups_collection = _rollups_collection()
+    if rollups_collection is None:
+        logger.error("无法更新情绪汇总：MongoDB连接未初始化")
+        return False
+
+    increments = {f"counts.{impact_level}": 1}
+    if previous_level:
+        increments[f"counts.{previous_level}"] = -1
+    else:
+        increments["total"] = 1
+
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            _rollup_key(key_project, granularity, bucket_start(created_at, granularity)),
+            {"$inc": increments, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for key_project in (str(project_id), ALL_PROJECTS)
+        for granularity in ROLLUP_GRANULARITIES
+    ]
+    try:
+        rollups_collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # 并发upsert同一个新时间桶时唯一索引会拒绝其中一个插入，此时文档已存在，重试即为普通的$inc
+        failed = [operations[error["index"]] for error in e.details.get("writeErrors", []) if error.get("code") == 11000]
+        if len(failed) != len(e.details.get("writeErrors", [])):
+            logger.error(f"更新情绪汇总时出错: {str(e)}")
+            return False
+        rollups_collection.bulk_write(failed, ordered=False)
+    return True
+
+
+def get_sentiment_series(project_ids=None, granularity="hour", since=None, until=None):
+    """
+    读取情绪汇总时间序列，只查询sentiment_rollups集合
+
+    参数:
+        project_ids (list, optional): 项目ID列表，为空时返回全部项目的合计
+        granularity (str): hour 或 day
+        since (datetime, optional): 起始时间（含）
+        until (datetime, optional): 结束时间（不含）
+
+    返回:
+        dict: 项目ID到时间序列的映射，每个点为 {"bucket", "counts", "total"}，按时间升序；
+            没有推文的时间桶计数为0，序列在查询范围内连续
+
+    异常:
+        ValueError: 时间粒度无效
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"无效的时间粒度: {granularity}")
+    rollups_collection = _rollups_collection()
+    if rollups_collection is None:
+        logger.error("无法读取情绪汇总：MongoDB连接未初始化")
+        return {}
+
+    series = {}
+    for project_id in project_ids or [ALL_PROJECTS]:
+        query = {"project_id": project_id, "granularity": granularity}
+        if since or until:
+            query["bucket"] = {}
+            if since:
+                query["bucket"]["$gte"] = bucket_start(since, granularity)
+            if until:
+                query["bucket"]["$lt"] = until
+        # 取最近的SENTIMENT_MAX_BUCKETS个时间桶，再按时间升序返回
+        documents = rollups_collection.find(
+            query, {"_id": 0, "bucket": 1, "counts": 1, "total": 1}
+        ).sort("bucket", -1).limit(SENTIMENT_MAX_BUCKETS)
+        points = [
+            {"bucket": document["bucket"], "counts": document.get("counts", {}), "total": document.get("total", 0)}
+            for document in reversed(list(documents))
+        ]
+        series[project_id] = fill_buckets(points, granularity, since, until, SENTIMENT_MAX_BUCKETS)
+    return series
+
+
+def rebuild_rollups(since=None, until=None, batch_size=1000):
+    """
+    由tweets集合重新计算指定时间范围内的情绪汇总，用于启用汇总前的历史数据或修正计数
+
+    范围按天对齐；范围内重新计算的时间桶整体覆盖，不再有推文的时间桶会被删除。
+    重建期间新写入的推文仍由record_impact累加，但与聚合同时发生的更新可能被覆盖，
+    建议在低峰期执行。
+
+    参数:
+        since (datetime, optional): 起始时间，默认从最早的推文开始
+        until (datetime, optional): 结束时间（不含），默认到当前时间
+        batch_size (int): 每批写入的汇总文档数
+
+    返回:
+        int: 写入的汇总文档数
+    """
+    db = get_db()
+    if db is None:
+        logger.error("无法重建情绪汇总：MongoDB连接未初始化")
+        return 0
+
+    started = datetime.utcnow()
+    since = bucket_start(since, "day") if since else None
+    if until:
+        aligned = bucket_start(until, "day")
+        until = aligned if aligned == until else aligned + timedelta(days=1)
+
+    match = dict(COUNTED_TWEETS)
+    if since or until:
+        match["created_at"] = {}
+        if since:
+            match["created_at"]["$gte"] = since
+        if until:
+            match["created_at"]["$lt"] = until
+
+    # 数据库按 项目 × 小时 × 影响等级 分组，天汇总和全部项目合计在本地由小时结果累加
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "project_id": "$project_id",
+                "impact_level": "$analysis.impact_level",
+                "bucket": {"$dateFromParts": {
+                    "year": {"$year": "$created_at"},
+                    "month": {"$month": "$created_at"},
+                    "day": {"$dayOfMonth": "$created_at"},
+                    "hour": {"$hour": "$created_at"}
+                }}
+            },
+            "count": {"$sum": 1}
+        }}
+    ]
+    rollups = {}
+    for group in db.tweets.aggregate(pipeline, allowDiskUse=True):
+        key = group["_id"]
+        for project_id in (str(key["project_id"]), ALL_PROJECTS):
+            for granularity in ROLLUP_GRANULARITIES:
+                rollup = rollups.setdefault(
+                    (project_id, granularity, bucket_start(key["bucket"], granularity)), {"counts": {}, "total": 0}
+                )
+                rollup["counts"][key["impact_level"]] = rollup["counts"].get(key["impact_level"], 0) + group["count"]
+                rollup["total"] += group["count"]
+
+    rollups_collection = db.sentiment_rollups
+    written = 0
+    operations = []
+    for (project_id, granularity, bucket), rollup in rollups.items():
+        operations.append(UpdateOne(
+            _rollup_key(project_id, granularity, bucket),
+            {"$set": dict(rollup, updated_at=datetime.utcnow())},
+            upsert=True
+        ))
+        if len(operations) >= batch_size:
+            rollups_collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+            logger.info(f"已写入 {written} 条情绪汇总")
+    if operations:
+        rollups_collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    # 本次没有写入、重建开始后也没有被record_impact更新过的时间桶已没有对应的推文
+    stale = {"updated_at": {"$lt": started}}
+    if since or until:
+        stale["bucket"] = {}
+        if since:
+            stale["bucket"]["$gte"] = since
+        if until:
+            stale["bucket"]["$lt"] = until
+    removed = rollups_collection.delete_many(stale).deleted_count
+    if removed:
+        logger.info(f"已删除 {removed} 条过期的情绪汇总")
+    return written
@@ -2,33 +2,112 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
-import pymongo
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 
+from .database import get_db
+from .pagination import fetch_page
+from .indexes import plan_stages
+from .project import Project
+from .search_terms import search_fields, search_query
+from .sentiment import counted_level, record_impact
+
 # 加载环境变量
 load_dotenv()
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-# MongoDB连接
-try:
-    mongo_client = pymongo.MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-    db = mongo_client[os.getenv('MONGO_DB_NAME', 'xmonitor')]
-    tweets_collection = db.tweets
-    logger.debug("推文模型已连接到MongoDB")
-except Exception as e:
-    logger.error(f"推文模型MongoDB连接失败: {str(e)}")
-    db = None
-    tweets_collection = None
+def _tweets_collection():
+    """获取推文集合，数据库连接由共享的database模块统一管理"""
+    db = get_db()
+    return db.tweets if db is not None else None
+
+# 全文检索单次返回的最大条数
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 100))
+# 全文检索在服务器端的最长执行时间（毫秒），超时抛出ExecutionTimeout
+SEARCH_MAX_TIME_MS = int(os.getenv('SEARCH_MAX_TIME_MS', 2000))
+# 全文检索的目标延迟（毫秒），manage_indexes.py search-check据此检查
+SEARCH_TARGET_MS = int(os.getenv('SEARCH_TARGET_MS', 100))
+
+# 常用的字段投影，列表查询可以只读取需要的字段；search字段只供文本索引使用，默认不读取
+TWEET_PROJECTIONS = {
+    # 全部字段
+    "full": {"search": 0},
+    # 不含篇幅较长的关键因素和历史参照
+    "summary": {"search": 0, "analysis.key_factors": 0, "analysis.historical_reference": 0},
+    # 只含列表展示需要的字段，不含推文正文
+    "compact": {
+        "tweet_id": 1, "project_id": 1, "twitter_username": 1, "token_symbol": 1, "created_at": 1,
+        "analysis.impact_level": 1, "analysis.event_type": 1, "analysis.expected_volatility": 1
+    }
+}
+
+def resolve_projection(projection):
+    """
+    将投影名称或字典转换为MongoDB投影
+    
+    参数:
+        projection (str|dict|None): TWEET_PROJECTIONS中的名称，或MongoDB投影字典，None等同于full
+    
+    返回:
+        dict: MongoDB投影
+    """
+    if projection is None:
+        return TWEET_PROJECTIONS["full"]
+    if isinstance(projection, dict):
+        return projection
+    if projection not in TWEET_PROJECTIONS:
+        raise ValueError(f"未知的字段投影: {projection}")
+    return TWEET_PROJECTIONS[projection]
+
+# 相对时间的单位，如 6h 表示6小时前
+_RELATIVE_TIME_PATTERN = re.compile(r'^(\d+)\s*([mhdw])$', re.IGNORECASE)
+_RELATIVE_TIME_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+def parse_time_bound(value):
+    """
+    解析时间范围的边界
+    
+    参数:
+        value (str|datetime): ISO格式时间（如 2024-01-01、2024-01-01T08:00:00），
+            或相对当前UTC时间的时长（如 30m、6h、7d、2w）
+    
+    返回:
+        datetime: UTC时间，value为空时返回None
+    
+    异常:
+        ValueError: 无法解析时
+    """
+    if not value or isinstance(value, datetime):
+        return value or None
+    value = value.strip()
+    match = _RELATIVE_TIME_PATTERN.match(value)
+    if match:
+        amount, unit = match.groups()
+        return datetime.utcnow() - timedelta(**{_RELATIVE_TIME_UNITS[unit.lower()]: int(amount)})
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"无效的时间: {value}")
+    # 数据库中保存的是不带时区的UTC时间
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
 
 class Tweet:
     """推文模型类，用于管理Twitter推文和分析结果"""
     
+    # 固定属性，列表查询一次构造成百上千个对象时比__dict__更省内存
+    __slots__ = ("tweet_id", "project_id", "twitter_username", "text", "token_symbol",
+                 "analysis", "created_at", "_id", "project")
+    
     def __init__(self, tweet_id, project_id, twitter_username, text, token_symbol=None, 
                  analysis=None, created_at=None, _id=None):
         """
@@ -52,10 +131,39 @@ class Tweet:
         self.analysis = analysis or {}
         self.created_at = created_at or datetime.utcnow()
         self._id = _id
+        # 关联的项目对象，由hydrate_projects批量填充
+        self.project = None
+    
+    @classmethod
+    def from_document(cls, tweet_data):
+        """
+        由MongoDB文档构造推文对象
+        
+        使用投影查询时缺少的字段为None（analysis为空字典），不会填充默认的创建时间；
+        这样得到的对象只用于读取，不应再调用save。
+        
+        参数:
+            tweet_data (dict): 推文文档
+        
+        返回:
+            Tweet: 推文对象
+        """
+        tweet = cls.__new__(cls)
+        tweet.tweet_id = tweet_data.get("tweet_id")
+        tweet.project_id = tweet_data.get("project_id")
+        tweet.twitter_username = tweet_data.get("twitter_username")
+        tweet.text = tweet_data.get("text")
+        tweet.token_symbol = tweet_data.get("token_symbol")
+        tweet.analysis = tweet_data.get("analysis") or {}
+        tweet.created_at = tweet_data.get("created_at")
+        tweet._id = tweet_data.get("_id")
+        tweet.project = None
+        return tweet
         
     def save(self):
         """保存推文到数据库"""
-        if not tweets_collection:
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
             logger.error("无法保存推文：MongoDB连接未初始化")
             return None
             
@@ -67,6 +175,7 @@ class Tweet:
             "token_symbol": self.token_symbol,
             "analysis": self.analysis,
             "created_at": self.created_at,
+            "search": search_fields(self.text, self.analysis),
         }
         
         if self._id:  # 更新现有推文
@@ -77,11 +186,67 @@ class Tweet:
             logger.info(f"已更新推文, ID: {self.tweet_id}")
             return self._id
         else:  # 创建新推文
-            result = tweets_collection.insert_one(tweet_data)
+            try:
+                result = tweets_collection.insert_one(tweet_data)
+            except DuplicateKeyError:
+                # tweet_id已存在时返回已有推文，避免重复保存
+                existing = tweets_collection.find_one({"tweet_id": self.tweet_id}, {"_id": 1})
+                self._id = existing["_id"] if existing else None
+                logger.info(f"推文已存在，跳过保存, ID: {self.tweet_id}")
+                return self._id
             self._id = result.inserted_id
             logger.info(f"已保存新推文, ID: {self.tweet_id}")
             return self._id
     
+    @staticmethod
+    def save_analysis(document_id, project_id, created_at, text, analysis, lease_id=None):
+        """
+        写回分析结果，标记分析完成并更新情绪汇总
+        
+        写入前的文档由find_one_and_update原子地返回，重新分析的推文据此修正情绪汇总，计数不会重复。
+        
+        参数:
+            document_id (ObjectId): 推文的数据库ID
+            project_id (str): 项目ID
+            created_at (datetime): 推文时间
+            text (str): 推文内容，用于生成检索字段
+            analysis (dict): 分析结果
+            lease_id (str, optional): 处理队列领取推文时的租约ID，指定时只有仍持有租约才写回
+        
+        返回:
+            bool: 是否已写回；推文不存在或租约已失效（已被重新领取）时返回False
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
+            logger.error("无法写回分析结果：MongoDB连接未初始化")
+            return False
+        
+        now = datetime.utcnow()
+        query = {"_id": document_id}
+        if lease_id is not None:
+            query.update(lease_id=lease_id, analysis_status="processing")
+        previous = tweets_collection.find_one_and_update(
+            query,
+            {"$set": {
+                "analysis": analysis,
+                "analysis_status": "done",
+                "analyzed_at": now,
+                "status_changed_at": now,
+                "search": search_fields(text, analysis)
+            }, "$unset": {"analysis_error": "", "lease_id": "", "lease_owner": "", "lease_until": "", "queued_by": ""}},
+            projection={"analysis.impact_level": 1, "analysis_status": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            return False
+        # 只有此前已分析完成的推文（包括没有analysis_status字段的早期推文）计入过汇总
+        previous_level = counted_level(previous)
+        try:
+            record_impact(project_id, created_at, analysis.get("impact_level"), previous_level)
+        except Exception as e:
+            logger.error(f"更新情绪汇总时出错: {str(e)}")
+        return True
+    
     def to_dict(self):
         """将推文转换为字典"""
         return {
@@ -92,13 +257,15 @@ class Tweet:
             "text": self.text,
             "token_symbol": self.token_symbol,
             "analysis": self.analysis,
-            "created_at": self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else str(self.created_at)
+            "created_at": self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else (
+                str(self.created_at) if self.created_at is not None else None)
         }
     
     @classmethod
     def get_by_id(cls, tweet_id):
         """根据ID获取推文"""
-        if not tweets_collection:
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
             logger.error("无法获取推文：MongoDB连接未初始化")
             return None
             
@@ -106,21 +273,13 @@ class Tweet:
         if not tweet_data:
             return None
             
-        return cls(
-            tweet_id=tweet_data["tweet_id"],
-            project_id=tweet_data["project_id"],
-            twitter_username=tweet_data["twitter_username"],
-            text=tweet_data["text"],
-            token_symbol=tweet_data.get("token_symbol"),
-            analysis=tweet_data.get("analysis", {}),
-            created_at=tweet_data["created_at"],
-            _id=tweet_data["_id"]
-        )
+        return cls.from_document(tweet_data)
     
     @classmethod
     def get_by_twitter_id(cls, twitter_id):
         """根据Twitter ID获取推文"""
-        if not tweets_collection:
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
             logger.error("无法获取推文：MongoDB连接未初始化")
             return None
             
@@ -128,88 +287,289 @@ class Tweet:
         if not tweet_data:
             return None
             
-        return cls(
-            tweet_id=tweet_data["tweet_id"],
-            project_id=tweet_data["project_id"],
-            twitter_username=tweet_data["twitter_username"],
-            text=tweet_data["text"],
-            token_symbol=tweet_data.get("token_symbol"),
-            analysis=tweet_data.get("analysis", {}),
-            created_at=tweet_data["created_at"],
-            _id=tweet_data["_id"]
-        )
+        return cls.from_document(tweet_data)
     
     @classmethod
-    def get_project_tweets(cls, project_id, limit=100):
-        """获取项目的所有推文"""
-        if not tweets_collection:
-            logger.error("无法获取推文：MongoDB连接未初始化")
+    def get_project_tweets(cls, project_id, limit=100, cursor=None, with_projects=False, projection=None):
+        """
+        获取项目的推文，按时间倒序分页
+        
+        参数:
+            project_id (str): 项目ID
+            limit (int): 每页条数，不超过TWEETS_MAX_PAGE_SIZE
+            cursor (str, optional): 上一页返回的分页游标
+            with_projects (bool): 是否批量填充tweet.project
+            projection (str|dict, optional): 字段投影，见TWEET_PROJECTIONS
+        
+        返回:
+            tuple: (推文列表, 下一页游标或None)
+        """
+        return cls._list_page({"project_id": project_id}, limit, cursor, with_projects, projection)
+    
+    @classmethod
+    def get_recent_tweets(cls, limit=100, cursor=None, with_projects=False, projection=None):
+        """
+        获取最近的推文，按时间倒序分页，参数和返回值同get_project_tweets
+        """
+        return cls._list_page({}, limit, cursor, with_projects, projection)
+    
+    @classmethod
+    def get_by_impact_level(cls, impact_level, limit=100, cursor=None, with_projects=False, projection=None):
+        """
+        根据影响等级获取推文，按时间倒序分页，参数和返回值同get_project_tweets
+        """
+        return cls._list_page({"analysis.impact_level": impact_level}, limit, cursor, with_projects, projection)
+    
+    @classmethod
+    def _list_page(cls, query, limit, cursor, with_projects, projection):
+        tweets, next_cursor = cls.get_page(query, limit, cursor, projection)
+        if with_projects:
+            cls.hydrate_projects(tweets)
+        return tweets, next_cursor
+    
+    @classmethod
+    def hydrate_projects(cls, tweets):
+        """
+        用一次$in查询为一批推文填充关联的项目，避免逐条查询
+        
+        参数:
+            tweets (list): 推文对象列表，找不到项目的推文tweet.project为None
+        
+        返回:
+            dict: 字符串形式的项目ID到项目对象的映射
+        """
+        projects = Project.get_many({str(tweet.project_id) for tweet in tweets if tweet.project_id})
+        for tweet in tweets:
+            tweet.project = projects.get(str(tweet.project_id)) if tweet.project_id else None
+        return projects
+    
+    @classmethod
+    def export_cursor(cls, query=None, after_id=None, batch_size=1000):
+        """
+        按_id升序遍历推文原始文档，供流式导出使用
+        
+        参数:
+            query (dict, optional): 查询条件
+            after_id (str|ObjectId, optional): 只返回_id大于该值的推文，用于断点续传
+            batch_size (int): 游标每次从服务器获取的文档数
+        
+        返回:
+            Cursor: MongoDB游标，连接未初始化时返回空列表
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
+            logger.error("无法导出推文：MongoDB连接未初始化")
             return []
-            
-        tweets_data = tweets_collection.find({"project_id": project_id}).sort("created_at", -1).limit(limit)
-        
-        tweets = []
-        for tweet_data in tweets_data:
-            tweet = cls(
-                tweet_id=tweet_data["tweet_id"],
-                project_id=tweet_data["project_id"],
-                twitter_username=tweet_data["twitter_username"],
-                text=tweet_data["text"],
-                token_symbol=tweet_data.get("token_symbol"),
-                analysis=tweet_data.get("analysis", {}),
-                created_at=tweet_data["created_at"],
-                _id=tweet_data["_id"]
-            )
-            tweets.append(tweet)
-            
-        return tweets
+        
+        query = dict(query or {})
+        if after_id:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        return tweets_collection.find(query, {"search": 0}).sort("_id", 1).batch_size(batch_size)
+    
+    @staticmethod
+    def build_query(project_ids=None, impact_levels=None, event_type=None, twitter_username=None,
+                    since=None, until=None):
+        """
+        将组合筛选条件转换为一条MongoDB查询
+        
+        等值条件（项目、影响等级、用户名）与 (created_at, _id) 排序可以由indexes.py中的
+        复合索引直接满足；event_type是AI生成的自由文本，按不区分大小写的子串匹配，在索引筛选后的结果上过滤。
+        
+        参数:
+            project_ids (str|list, optional): 项目ID或项目ID列表
+            impact_levels (str|list, optional): 影响等级或影响等级列表
+            event_type (str, optional): 事件类型关键词
+            twitter_username (str|list, optional): Twitter用户名或用户名列表
+            since (str|datetime, optional): 起始时间（含），支持parse_time_bound的格式
+            until (str|datetime, optional): 结束时间（不含），支持parse_time_bound的格式
+        
+        返回:
+            dict: MongoDB查询条件
+        
+        异常:
+            ValueError: 时间格式无效
+        """
+        def match_any(values):
+            values = [values] if isinstance(values, str) else [value for value in values if value]
+            return values[0] if len(values) == 1 else {"$in": values}
+        
+        query = {}
+        if project_ids:
+            query["project_id"] = match_any(project_ids)
+        if impact_levels:
+            query["analysis.impact_level"] = match_any(impact_levels)
+        if twitter_username:
+            query["twitter_username"] = match_any(twitter_username)
+        if event_type:
+            query["analysis.event_type"] = {"$regex": re.escape(event_type), "$options": "i"}
+        
+        since, until = parse_time_bound(since), parse_time_bound(until)
+        if since or until:
+            query["created_at"] = {}
+            if since:
+                query["created_at"]["$gte"] = since
+            if until:
+                query["created_at"]["$lt"] = until
+        return query
     
     @classmethod
-    def get_recent_tweets(cls, limit=100):
-        """获取最近的推文"""
-        if not tweets_collection:
-            logger.error("无法获取推文：MongoDB连接未初始化")
+    def find(cls, limit=100, cursor=None, projection=None, with_projects=False, **filters):
+        """
+        按组合条件分页查询推文，例如最近6小时内若干项目的看跌及以下推文:
+        Tweet.find(project_ids=[...], impact_levels=["Bearish", "Extremely Bearish"], since="6h")
+        
+        参数:
+            limit (int): 每页条数
+            cursor (str, optional): 上一页返回的分页游标
+            projection (str|dict, optional): 字段投影，见TWEET_PROJECTIONS
+            with_projects (bool): 是否批量填充tweet.project
+            **filters: build_query的筛选条件
+        
+        返回:
+            tuple: (推文列表, 下一页游标或None)
+        """
+        return cls._list_page(cls.build_query(**filters), limit, cursor, with_projects, projection)
+    
+    @classmethod
+    def search(cls, keywords, limit=20, projection=None, with_projects=False, **filters):
+        """
+        全文检索推文正文、事件类型和关键因素，按相关度排序，相关度相同时较新的在前
+        
+        关键词按search_terms.search_query切分并去掉停用词后，所有检索词都命中才返回，
+        命中的字段权重越高（事件类型 > 推文正文 > 关键因素）排名越靠前。
+        
+        参数:
+            keywords (str): 检索关键词，中英文均可
+            limit (int): 返回条数，不超过SEARCH_MAX_RESULTS
+            projection (str|dict, optional): 字段投影，见TWEET_PROJECTIONS
+            with_projects (bool): 是否批量填充tweet.project
+            **filters: build_query的筛选条件，例如project_ids、since、until
+        
+        返回:
+            list: (推文, 相关度得分) 列表
+        
+        异常:
+            ValueError: 时间格式无效
+            ExecutionTimeout: 检索超过SEARCH_MAX_TIME_MS
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
+            logger.error("无法检索推文：MongoDB连接未初始化")
             return []
-            
-        tweets_data = tweets_collection.find().sort("created_at", -1).limit(limit)
-        
-        tweets = []
-        for tweet_data in tweets_data:
-            tweet = cls(
-                tweet_id=tweet_data["tweet_id"],
-                project_id=tweet_data["project_id"],
-                twitter_username=tweet_data["twitter_username"],
-                text=tweet_data["text"],
-                token_symbol=tweet_data.get("token_symbol"),
-                analysis=tweet_data.get("analysis", {}),
-                created_at=tweet_data["created_at"],
-                _id=tweet_data["_id"]
-            )
-            tweets.append(tweet)
-            
-        return tweets
+        
+        tweets_data = cls._search_cursor(tweets_collection, keywords, limit, projection, filters)
+        if tweets_data is None:
+            return []
+        
+        results = [(cls.from_document(tweet_data), tweet_data.get("score", 0)) for tweet_data in tweets_data]
+        if with_projects:
+            cls.hydrate_projects([tweet for tweet, _ in results])
+        return results
+    
+    @classmethod
+    def _search_cursor(cls, tweets_collection, keywords, limit, projection, filters):
+        """构建检索游标，没有检索词时返回None"""
+        terms = search_query(keywords)
+        if not terms:
+            return None
+        query = cls.build_query(**filters)
+        query["$text"] = {"$search": terms}
+        fields = dict(resolve_projection(projection), score={"$meta": "textScore"})
+        return (tweets_collection.find(query, fields)
+                .sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+                .limit(max(1, min(limit, SEARCH_MAX_RESULTS)))
+                .max_time_ms(SEARCH_MAX_TIME_MS))
     
     @classmethod
-    def get_by_impact_level(cls, impact_level, limit=100):
-        """根据影响等级获取推文"""
-        if not tweets_collection:
+    def explain_search(cls, keywords, limit=20, **filters):
+        """
+        以executionStats模式explain一次检索，用于对照SEARCH_TARGET_MS检查延迟
+        
+        按相关度排序需要在内存中对所有命中的推文打分排序，耗时随命中数增长，
+        因此检索词过于常见或时间范围过大时可能超过目标延迟，可通过叠加筛选条件缩小范围。
+        
+        参数:
+            keywords (str): 检索关键词
+            limit (int): 返回条数
+            **filters: build_query的筛选条件
+        
+        返回:
+            dict: {"terms", "stages", "execution_ms", "docs_examined", "keys_examined", "returned"}，
+                  没有检索词或数据库不可用时返回None
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
+            logger.error("无法检查检索：MongoDB连接未初始化")
+            return None
+        cursor = cls._search_cursor(tweets_collection, keywords, limit, None, filters)
+        if cursor is None:
+            return None
+        explain = cursor.explain()
+        stats = explain.get("executionStats", {})
+        return {
+            "terms": search_query(keywords),
+            "stages": plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})),
+            "execution_ms": stats.get("executionTimeMillis"),
+            "docs_examined": stats.get("totalDocsExamined"),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "returned": stats.get("nReturned")
+        }
+    
+    @classmethod
+    def rebuild_search_fields(cls, batch_size=1000, only_missing=True):
+        """
+        为已有推文生成search字段，启用全文检索前的历史数据需要执行一次
+        
+        参数:
+            batch_size (int): 每批写回的推文数
+            only_missing (bool): 只处理缺少search字段的推文，False时全部重建（切词规则变化后使用）
+        
+        返回:
+            int: 更新的推文数
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
+            logger.error("无法重建检索字段：MongoDB连接未初始化")
+            return 0
+        
+        query = {"search": {"$exists": False}} if only_missing else {}
+        fields = {"text": 1, "analysis.event_type": 1, "analysis.key_factors": 1}
+        updated = 0
+        operations = []
+        for tweet_data in tweets_collection.find(query, fields).sort("_id", 1).batch_size(batch_size):
+            operations.append(UpdateOne(
+                {"_id": tweet_data["_id"]},
+                {"$set": {"search": search_fields(tweet_data.get("text"), tweet_data.get("analysis"))}}
+            ))
+            if len(operations) >= batch_size:
+                updated += tweets_collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+                logger.info(f"已重建 {updated} 条推文的检索字段")
+        if operations:
+            updated += tweets_collection.bulk_write(operations, ordered=False).modified_count
+        return updated
+    
+    @classmethod
+    def get_page(cls, query=None, limit=100, cursor=None, projection=None):
+        """
+        按键集分页获取推文
+        
+        参数:
+            query (dict, optional): 查询条件
+            limit (int): 每页条数，不超过TWEETS_MAX_PAGE_SIZE
+            cursor (str, optional): 上一页返回的分页游标
+            projection (str|dict, optional): 字段投影，见TWEET_PROJECTIONS
+        
+        返回:
+            tuple: (推文列表, 下一页游标或None)
+        """
+        tweets_collection = _tweets_collection()
+        if tweets_collection is None:
             logger.error("无法获取推文：MongoDB连接未初始化")
-            return []
-            
-        tweets_data = tweets_collection.find({"analysis.impact_level": impact_level}).sort("created_at", -1).limit(limit)
-        
-        tweets = []
-        for tweet_data in tweets_data:
-            tweet = cls(
-                tweet_id=tweet_data["tweet_id"],
-                project_id=tweet_data["project_id"],
-                twitter_username=tweet_data["twitter_username"],
-                text=tweet_data["text"],
-                token_symbol=tweet_data.get("token_symbol"),
-                analysis=tweet_data.get("analysis", {}),
-                created_at=tweet_data["created_at"],
-                _id=tweet_data["_id"]
-            )
-            tweets.append(tweet)
-            
-        return tweets 
\ No newline at end of file
+            return [], None
+        
+        tweets_data, next_cursor = fetch_page(tweets_collection, query or {}, limit, cursor, resolve_projection(projection))
+        
+        tweets = [cls.from_document(tweet_data) for tweet_data in tweets_data]
+        
+        return tweets, next_cursor
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.tweet import parse_time_bound
+from src.models.sentiment import rebuild_rollups
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='由已有推文重建按小时/天的情绪汇总（sentiment_rollups）')
+    parser.add_argument('--since', help='起始时间，按天对齐，如 2024-01-01 或 30d；默认从最早的推文开始')
+    parser.add_argument('--until', help='结束时间（不含），按天对齐，格式同 --since；默认到当前时间')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的汇总文档数')
+    args = parser.parse_args()
+
+    try:
+        since, until = parse_time_bound(args.since), parse_time_bound(args.until)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    try:
+        written = rebuild_rollups(since, until, args.batch_size)
+    except Exception as e:
+        logger.error(f"重建情绪汇总时出错: {str(e)}")
+        sys.exit(1)
+    logger.info(f"情绪汇总重建完成，共写入 {written} 条汇总")
+
+if __name__ == '__main__':
+    main()
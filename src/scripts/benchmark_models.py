@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import argparse
+import logging
+import tracemalloc
+from datetime import datetime, timedelta
+from bson import ObjectId, encode, decode
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.tweet import Tweet, TWEET_PROJECTIONS
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+class DictTweet:
+    """对照组：与Tweet字段相同、使用普通__dict__的模型"""
+
+    def __init__(self, tweet_id, project_id, twitter_username, text, token_symbol=None,
+                 analysis=None, created_at=None, _id=None):
+        self.tweet_id = tweet_id
+        self.project_id = project_id
+        self.twitter_username = twitter_username
+        self.text = text
+        self.token_symbol = token_symbol
+        self.analysis = analysis or {}
+        self.created_at = created_at or datetime.utcnow()
+        self._id = _id
+        self.project = None
+
+def sample_document(i):
+    """生成一条字段长度接近真实数据的推文文档"""
+    return {
+        "_id": ObjectId(),
+        "tweet_id": str(1700000000000000000 + i),
+        "project_id": "65a1b2c3d4e5f60718293a4b",
+        "twitter_username": "example_project",
+        "token_symbol": "EXM",
+        "text": ("We are thrilled to announce our strategic partnership with a tier-1 exchange. "
+                 "Mainnet upgrade ships next week, staking rewards go live right after. ") * 2,
+        "created_at": datetime(2024, 1, 1) + timedelta(minutes=i),
+        "analysis_status": "done",
+        "analysis": {
+            "event_type": "战略合作与主网升级",
+            "impact_level": "Bullish",
+            "expected_volatility": "±5-10%",
+            "key_factors": [
+                "与头部交易所建立战略合作，提升流动性和曝光度",
+                "主网升级按路线图交付，增强市场对团队执行力的信心",
+                "质押奖励上线减少流通供应，短期内形成买盘支撑"
+            ],
+            "historical_reference": "过去一年中类似的交易所合作公告发布后，相关代币24小时内平均上涨6%，"
+                                    "但在一周内多数回吐了一半涨幅，市场对后续落地进度较为敏感。"
+        }
+    }
+
+def apply_projection(document, projection):
+    """在本地模拟MongoDB投影，只保留服务器会返回的字段"""
+    if not projection:
+        return document
+    if all(value == 0 for value in projection.values()):
+        result = dict(document)
+        for path in projection:
+            parent, _, field = path.rpartition('.')
+            if parent:
+                result[parent] = {k: v for k, v in result[parent].items() if k != field}
+            else:
+                result.pop(field, None)
+        return result
+    result = {"_id": document["_id"]}
+    for path in projection:
+        parent, _, field = path.rpartition('.')
+        if parent:
+            result.setdefault(parent, {})[field] = document[parent][field]
+        else:
+            result[field] = document[field]
+    return result
+
+def build_dict_tweet(document):
+    return DictTweet(
+        tweet_id=document["tweet_id"],
+        project_id=document["project_id"],
+        twitter_username=document["twitter_username"],
+        text=document["text"],
+        token_symbol=document.get("token_symbol"),
+        analysis=document.get("analysis", {}),
+        created_at=document["created_at"],
+        _id=document["_id"]
+    )
+
+def measure(name, payloads, build):
+    """解码BSON并构造对象，返回每条耗时和保留对象的内存占用"""
+    # 计时和内存统计分开进行，tracemalloc会显著拖慢分配
+    started = time.perf_counter()
+    objects = [build(decode(payload)) for payload in payloads]
+    elapsed = time.perf_counter() - started
+    del objects
+    tracemalloc.start()
+    objects = [build(decode(payload)) for payload in payloads]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_doc_us = elapsed / len(objects) * 1e6
+    per_doc_bytes = retained / len(objects)
+    logger.info(f"{name:<28} {per_doc_us:>8.2f} µs/条 {per_doc_bytes:>10.0f} B/条")
+    del objects
+    return per_doc_us, per_doc_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description='推文模型构造的微基准测试（不需要数据库）')
+    parser.add_argument('--count', '-n', type=int, default=20000, help='文档数量')
+    parser.add_argument('--rounds', '-r', type=int, default=3, help='重复次数，取最好成绩')
+    args = parser.parse_args()
+
+    documents = [sample_document(i) for i in range(args.count)]
+    # 按投影编码为BSON，模拟从服务器收到的数据
+    cases = [
+        ("__dict__ 模型, 全部字段", None, build_dict_tweet),
+        ("__slots__ 模型, 全部字段", "full", Tweet.from_document),
+        ("__slots__ 模型, summary", "summary", Tweet.from_document),
+        ("__slots__ 模型, compact", "compact", Tweet.from_document),
+    ]
+
+    logger.info(f"文档数: {args.count}，重复 {args.rounds} 次取最好成绩")
+    results = {}
+    for name, projection, build in cases:
+        payloads = [encode(apply_projection(document, TWEET_PROJECTIONS.get(projection))) for document in documents]
+        best = min((measure(name, payloads, build) for _ in range(args.rounds)), key=lambda item: item[0])
+        results[name] = (best, sum(len(payload) for payload in payloads) / len(payloads))
+
+    baseline_time, baseline_memory = results[cases[0][0]][0]
+    logger.info("-" * 70)
+    logger.info(f"{'场景':<28} {'耗时':>10} {'内存':>10} {'BSON大小':>10}")
+    for name, ((elapsed, memory), size) in results.items():
+        logger.info(f"{name:<28} {elapsed / baseline_time:>9.0%} {memory / baseline_memory:>9.0%} {size:>8.0f} B")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.indexes import INDEX_SPECS, ensure_indexes, check_query_plans, dedupe_tweets
+from src.models.tweet import Tweet, SEARCH_TARGET_MS
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def list_indexes(args):
+    """列出声明的索引"""
+    for collection_name, indexes in INDEX_SPECS.items():
+        logger.info(f"{collection_name}:")
+        for index in indexes:
+            document = index.document
+            options = ", ".join(f"{key}={value}" for key, value in document.items() if key not in ('key', 'name'))
+            logger.info(f"  {document['name']}: {dict(document['key'])} {options}")
+    return True
+
+def dedupe(args):
+    """删除tweet_id重复的推文"""
+    try:
+        groups, removed = dedupe_tweets(dry_run=args.dry_run)
+    except Exception as e:
+        logger.error(f"清理重复推文时出错: {str(e)}")
+        return False
+    if removed and not args.dry_run:
+        logger.info("如果被删除的推文已计入情绪汇总，请运行: python src/scripts/backfill_sentiment.py")
+    return True
+
+def ensure(args):
+    """创建所有声明的索引"""
+    if args.dedupe and not dedupe(argparse.Namespace(dry_run=False)):
+        return False
+    created = ensure_indexes()
+    if not created:
+        return False
+    for collection_name, names in created.items():
+        logger.info(f"{collection_name}: {', '.join(names) if names else '无'}")
+    return True
+
+def check(args):
+    """检查模型查询的执行计划"""
+    results = check_query_plans()
+    if not results:
+        return False
+    
+    problems = 0
+    for result in results:
+        flags = []
+        if result['collscan']:
+            flags.append("COLLSCAN")
+        if result['in_memory_sort']:
+            flags.append("内存排序")
+        status = "⚠️ " + "/".join(flags) if flags else "✅ 使用索引"
+        logger.info(f"{result['name']:<36} {status}  ({' -> '.join(result['stages'])})")
+        if flags:
+            problems += 1
+    
+    if problems:
+        logger.warning(f"{problems} 个查询未能使用索引，请运行: python src/scripts/manage_indexes.py ensure")
+        return False
+    logger.info("所有查询均已命中索引")
+    return True
+
+def search_check(args):
+    """explain一次全文检索，对照目标延迟检查耗时"""
+    try:
+        result = Tweet.explain_search(args.keywords, limit=args.limit, project_ids=args.project_id, since=args.since)
+    except Exception as e:
+        logger.error(f"检查全文检索时出错: {str(e)}")
+        return False
+    if not result:
+        logger.error("没有可检索的关键词")
+        return False
+    
+    logger.info(f"检索词: {result['terms']}")
+    logger.info(f"执行计划: {' -> '.join(result['stages'])}")
+    logger.info(f"扫描索引键 {result['keys_examined']}，扫描文档 {result['docs_examined']}，返回 {result['returned']}")
+    if result['execution_ms'] is None or result['execution_ms'] > args.target_ms:
+        logger.warning(f"耗时 {result['execution_ms']} ms，超过目标 {args.target_ms} ms；可缩小时间范围或增加项目筛选")
+        return False
+    logger.info(f"耗时 {result['execution_ms']} ms，目标 {args.target_ms} ms 以内")
+    return True
+
+def rebuild_search(args):
+    """为已有推文生成全文检索字段"""
+    try:
+        updated = Tweet.rebuild_search_fields(batch_size=args.batch_size, only_missing=not args.all)
+    except Exception as e:
+        logger.error(f"重建检索字段时出错: {str(e)}")
+        return False
+    logger.info(f"已更新 {updated} 条推文的检索字段")
+    return True
+
+def main():
+    # 创建主解析器
+    parser = argparse.ArgumentParser(description='XMonitor数据库索引管理工具')
+    subparsers = parser.add_subparsers(dest='command', help='可用命令')
+    
+    list_parser = subparsers.add_parser('list', help='列出声明的索引')
+    list_parser.set_defaults(func=list_indexes)
+    
+    ensure_parser = subparsers.add_parser('ensure', help='创建所有声明的索引')
+    ensure_parser.add_argument('--dedupe', action='store_true', help='创建前先删除tweet_id重复的推文')
+    ensure_parser.set_defaults(func=ensure)
+    
+    dedupe_parser = subparsers.add_parser('dedupe', help='删除tweet_id重复的推文（创建唯一索引前需要）')
+    dedupe_parser.add_argument('--dry-run', action='store_true', help='只统计不删除')
+    dedupe_parser.set_defaults(func=dedupe)
+    
+    check_parser = subparsers.add_parser('check', help='explain模型查询并标记全表扫描')
+    check_parser.set_defaults(func=check)
+    
+    search_check_parser = subparsers.add_parser('search-check', help='explain全文检索并检查耗时')
+    search_check_parser.add_argument('keywords', help='检索关键词')
+    search_check_parser.add_argument('--project-id', '-p', action='append', help='项目ID，可重复指定')
+    search_check_parser.add_argument('--since', help='起始时间，如 2024-01-01 或 7d')
+    search_check_parser.add_argument('--limit', type=int, default=20, help='返回条数')
+    search_check_parser.add_argument('--target-ms', type=int, default=SEARCH_TARGET_MS, help='目标耗时（毫秒）')
+    search_check_parser.set_defaults(func=search_check)
+    
+    search_parser = subparsers.add_parser('rebuild-search', help='为已有推文生成全文检索字段')
+    search_parser.add_argument('--all', action='store_true', help='重建所有推文（默认只处理缺少检索字段的推文）')
+    search_parser.add_argument('--batch-size', type=int, default=1000, help='每批写回的推文数')
+    search_parser.set_defaults(func=rebuild_search)
+    
+    # 解析命令行参数
+    args = parser.parse_args()
+    
+    if not args.command:
+        parser.print_help()
+        return
+    
+    # 执行相应的功能
+    if not args.func(args):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+from collections import Counter
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.database import get_db
+from src.utils.prefilter import PREFILTER_SKIP_THRESHOLD, SIGNIFICANT_PATTERN, score_tweet
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_thresholds(value):
+    """解析逗号分隔的阈值列表"""
+    return [float(item) for item in value.split(',') if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='评估本地预过滤与历史AI分析结果的一致性')
+    parser.add_argument('--limit', '-l', type=int, default=0, help='最多检查的推文数，0表示全部')
+    parser.add_argument('--thresholds', '-t', type=parse_thresholds, default=[PREFILTER_SKIP_THRESHOLD],
+                        help=f'逗号分隔的跳过阈值，默认: {PREFILTER_SKIP_THRESHOLD}')
+    parser.add_argument('--examples', '-e', type=int, default=5, help='每个阈值展示的误判样例数')
+    args = parser.parse_args()
+    
+    db = get_db()
+    if db is None:
+        logger.error("无法生成报告：MongoDB连接未初始化")
+        sys.exit(1)
+    
+    # 只使用真正由AI给出结论的历史推文
+    query = {
+        'analysis.impact_level': {'$exists': True},
+        'analysis.source': {'$ne': 'prefilter'}
+    }
+    cursor = db.tweets.find(query, {'text': 1, 'analysis.impact_level': 1}).batch_size(1000)
+    if args.limit:
+        cursor = cursor.limit(args.limit)
+    
+    # 每条推文只计算一次得分，再按不同阈值统计
+    scored = []
+    for tweet in cursor:
+        text = tweet.get('text') or ''
+        score, _ = score_tweet(text)
+        significant = bool(SIGNIFICANT_PATTERN.search(text))
+        scored.append((score, significant, tweet['analysis']['impact_level'], text))
+    
+    total = len(scored)
+    if not total:
+        logger.info("没有找到带AI分析结果的推文")
+        return
+    
+    llm_levels = Counter(level for _, _, level, _ in scored)
+    logger.info(f"共检查 {total} 条推文，AI标注分布: {dict(llm_levels)}")
+    
+    for threshold in args.thresholds:
+        skipped = [item for item in scored if item[0] <= threshold and not item[1]]
+        disagreements = [item for item in skipped if item[2] != 'Non-Significant']
+        agreement = 1 - len(disagreements) / len(skipped) if skipped else 1.0
+        
+        logger.info("=" * 70)
+        logger.info(f"阈值 {threshold}: 跳过 {len(skipped)}/{total} 条 ({len(skipped) / total:.1%})，"
+                    f"与AI结论一致率 {agreement:.1%}")
+        if disagreements:
+            logger.info(f"被跳过但AI认为有影响的推文: {dict(Counter(item[2] for item in disagreements))}")
+            for score, _, level, text in disagreements[:args.examples]:
+                logger.info(f"  [{level}] 得分 {score}: {text[:100]}")
+
+if __name__ == '__main__':
+    main()
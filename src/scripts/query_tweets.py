@@ -14,6 +14,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from src.models.tweet import Tweet
 from src.models.project import Project
+from src.utils.exporter import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_COMPRESSIONS,
+    EXPORT_FORMATS,
+    default_output_path,
+    export_documents
+)
 
 # 加载环境变量
 load_dotenv()
@@ -43,11 +50,12 @@ def format_impact_level(impact_level):
     else:
         return impact_level
 
-def print_tweet_info(tweet):
-    """打印推文信息"""
-    # 查找项目信息
-    project = Project.get_by_id(tweet.project_id)
-    project_name = project.name if project else "未知项目"
+def print_tweet_info(tweet, score=None, full=False):
+    """
+    打印推文信息，tweet.project需已由Tweet.hydrate_projects填充；score为全文检索的相关度，
+    full为True时打印关键因素和历史参照（需要以full投影读取推文）
+    """
+    project_name = tweet.project.name if tweet.project else "未知项目"
     
     # 格式化时间
     created_at = tweet.created_at
@@ -73,6 +81,8 @@ def print_tweet_info(tweet):
     # 打印信息
     logger.info("=" * 70)
     logger.info(f"推文ID: {tweet.tweet_id}")
+    if score is not None:
+        logger.info(f"相关度: {score:.2f}")
     logger.info(f"项目: {project_name} ({tweet.token_symbol})")
     logger.info(f"Twitter账号: @{tweet.twitter_username}")
     logger.info(f"发布时间: {created_at_str}")
@@ -81,19 +91,30 @@ def print_tweet_info(tweet):
     logger.info(f"事件类型: {event_type}")
     logger.info(f"推文内容:\n{tweet.text}")
     
-    if key_factors:
-        logger.info("\n关键因素:")
-        for i, factor in enumerate(key_factors, 1):
-            logger.info(f"{i}. {factor}")
-    
-    logger.info(f"\n历史参照: {historical_reference}")
+    if full:
+        if key_factors:
+            logger.info("\n关键因素:")
+            for i, factor in enumerate(key_factors, 1):
+                logger.info(f"{i}. {factor}")
+        
+        logger.info(f"\n历史参照: {historical_reference}")
     logger.info("-" * 70)
 
+def list_projection(args):
+    """列表只读取summary投影，指定 --full 时读取关键因素和历史参照"""
+    return 'full' if args.full else 'summary'
+
+def log_next_cursor(next_cursor):
+    """还有下一页时提示翻页参数"""
+    if next_cursor:
+        logger.info(f"查看下一页请加参数: --cursor {next_cursor}")
+
 def query_recent_tweets(args):
     """查询最近的推文"""
     try:
         limit = args.limit
-        tweets = Tweet.get_recent_tweets(limit=limit)
+        tweets, next_cursor = Tweet.get_recent_tweets(limit=limit, cursor=args.cursor, with_projects=True,
+                                                        projection=list_projection(args))
         
         if not tweets:
             logger.info("没有找到任何推文")
@@ -102,7 +123,8 @@ def query_recent_tweets(args):
         logger.info(f"最近 {len(tweets)} 条推文:")
         
         for tweet in tweets:
-            print_tweet_info(tweet)
+            print_tweet_info(tweet, full=args.full)
+        log_next_cursor(next_cursor)
         
         return True
     except Exception as e:
@@ -146,8 +168,11 @@ def query_project_tweets(args):
         
         logger.info(f"查询项目: {project.name} ({project.token_symbol})")
         
-        # 查询项目推文
-        tweets = Tweet.get_project_tweets(project_id, limit=limit)
+        # 查询项目推文，所有推文都属于同一个项目，无需再查询
+        tweets, next_cursor = Tweet.get_project_tweets(project_id, limit=limit, cursor=args.cursor,
+                                                         projection=list_projection(args))
+        for tweet in tweets:
+            tweet.project = project
         
         if not tweets:
             logger.info("该项目没有任何推文记录")
@@ -156,7 +181,8 @@ def query_project_tweets(args):
         logger.info(f"找到 {len(tweets)} 条推文:")
         
         for tweet in tweets:
-            print_tweet_info(tweet)
+            print_tweet_info(tweet, full=args.full)
+        log_next_cursor(next_cursor)
         
         return True
     except Exception as e:
@@ -196,7 +222,8 @@ def query_impact_tweets(args):
                 return False
         
         # 查询推文
-        tweets = Tweet.get_by_impact_level(impact_level, limit=limit)
+        tweets, next_cursor = Tweet.get_by_impact_level(impact_level, limit=limit, cursor=args.cursor, with_projects=True,
+                                                          projection=list_projection(args))
         
         if not tweets:
             logger.info(f"没有找到影响等级为 {format_impact_level(impact_level)} 的推文")
@@ -205,46 +232,141 @@ def query_impact_tweets(args):
         logger.info(f"找到 {len(tweets)} 条影响等级为 {format_impact_level(impact_level)} 的推文:")
         
         for tweet in tweets:
-            print_tweet_info(tweet)
+            print_tweet_info(tweet, full=args.full)
+        log_next_cursor(next_cursor)
         
         return True
     except Exception as e:
         logger.error(f"查询影响等级推文时出错: {str(e)}")
         return False
 
-def export_tweets(args):
-    """导出推文数据为JSON文件"""
+def query_filtered_tweets(args):
+    """按组合条件查询推文"""
     try:
-        output_file = args.output
-        project_id = args.project_id
-        limit = args.limit
-        
-        # 查询推文
-        if project_id:
-            tweets = Tweet.get_project_tweets(project_id, limit=limit)
-            file_prefix = f"project_{project_id}"
-        else:
-            tweets = Tweet.get_recent_tweets(limit=limit)
-            file_prefix = "all_tweets"
+        tweets, next_cursor = Tweet.find(
+            limit=args.limit,
+            cursor=args.cursor,
+            projection=list_projection(args),
+            with_projects=True,
+            project_ids=args.project_id,
+            impact_levels=args.impact_level,
+            event_type=args.event_type,
+            twitter_username=args.username,
+            since=args.since,
+            until=args.until
+        )
         
         if not tweets:
-            logger.info("没有找到任何推文")
+            logger.info("没有找到符合条件的推文")
+            return True
+        
+        logger.info(f"找到 {len(tweets)} 条符合条件的推文:")
+        
+        for tweet in tweets:
+            print_tweet_info(tweet, full=args.full)
+        log_next_cursor(next_cursor)
+        
+        return True
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+    except Exception as e:
+        logger.error(f"按条件查询推文时出错: {str(e)}")
+        return False
+
+def search_tweets(args):
+    """全文检索推文正文和分析结果"""
+    try:
+        results = Tweet.search(
+            args.keywords,
+            limit=args.limit,
+            projection=list_projection(args),
+            with_projects=True,
+            project_ids=args.project_id,
+            impact_levels=args.impact_level,
+            since=args.since,
+            until=args.until
+        )
+        
+        if not results:
+            logger.info(f"没有找到与 \"{args.keywords}\" 相关的推文")
             return True
         
+        logger.info(f"找到 {len(results)} 条与 \"{args.keywords}\" 相关的推文:")
+        
+        for tweet, score in results:
+            print_tweet_info(tweet, score, full=args.full)
+        
+        return True
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+    except Exception as e:
+        logger.error(f"检索推文时出错: {str(e)}")
+        return False
+
+def parse_date(value):
+    """解析命令行中的日期，支持 YYYY-MM-DD 和 ISO 格式"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的日期: {value}")
+
+def export_tweets(args):
+    """流式导出推文数据，支持断点续传"""
+    try:
+        # 导出条件
+        query = {}
+        if args.project_id:
+            query["project_id"] = {"$in": args.project_id}
+        if args.since or args.until:
+            query["created_at"] = {}
+            if args.since:
+                query["created_at"]["$gte"] = args.since
+            if args.until:
+                query["created_at"]["$lt"] = args.until
+        
         # 如果没有指定输出文件，则自动生成一个
+        output_file = args.output
         if not output_file:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = f"{file_prefix}_{timestamp}.json"
+            file_prefix = f"project_{'_'.join(args.project_id)}" if args.project_id else "all_tweets"
+            output_file = default_output_path(file_prefix, args.format, args.compress)
+        
+        # 项目名称按批次补充，已查询过的项目不再重复查询
+        project_names = {}
         
-        # 转换为字典列表
-        tweets_data = [tweet.to_dict() for tweet in tweets]
+        def add_project_names(batch):
+            missing = {tweet_data.get("project_id") for tweet_data in batch} - set(project_names)
+            if missing:
+                projects = Project.get_many(missing)
+                for project_id in missing:
+                    project = projects.get(str(project_id))
+                    project_names[project_id] = project.name if project else None
+            for tweet_data in batch:
+                tweet_data["project_name"] = project_names.get(tweet_data.get("project_id"))
         
-        # 写入文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(tweets_data, f, ensure_ascii=False, indent=2)
+        fingerprint = {
+            "project_id": args.project_id or [],
+            "since": args.since.isoformat() if args.since else None,
+            "until": args.until.isoformat() if args.until else None
+        }
+        result = export_documents(
+            lambda after_id, batch_size: Tweet.export_cursor(query, after_id=after_id, batch_size=batch_size),
+            output_file,
+            fmt=args.format,
+            compression=args.compress,
+            batch_size=args.batch_size,
+            resume=not args.restart,
+            fingerprint=fingerprint,
+            enrich=add_project_names
+        )
         
-        logger.info(f"已将 {len(tweets)} 条推文导出到 {output_file}")
+        logger.info(f"本次导出 {result['exported']} 条推文，累计 {result['total']} 条，输出: {output_file}")
+        logger.info(f"中断后使用相同参数和 -o {output_file} 重新运行即可从断点继续")
         return True
+    except ValueError as e:
+        logger.error(str(e))
+        return False
     except Exception as e:
         logger.error(f"导出推文时出错: {str(e)}")
         return False
@@ -257,25 +379,61 @@ def main():
     # 查询最近推文子命令
     recent_parser = subparsers.add_parser('recent', help='查询最近的推文')
     recent_parser.add_argument('--limit', '-l', type=int, default=10, help='最大返回数量')
+    recent_parser.add_argument('--cursor', help='上一页输出的分页游标')
+    recent_parser.add_argument('--full', action='store_true', help='同时显示关键因素和历史参照')
     recent_parser.set_defaults(func=query_recent_tweets)
     
     # 查询项目推文子命令
     project_parser = subparsers.add_parser('project', help='查询特定项目的推文')
     project_parser.add_argument('--project-id', '-p', help='项目ID')
     project_parser.add_argument('--limit', '-l', type=int, default=10, help='最大返回数量')
+    project_parser.add_argument('--cursor', help='上一页输出的分页游标')
+    project_parser.add_argument('--full', action='store_true', help='同时显示关键因素和历史参照')
     project_parser.set_defaults(func=query_project_tweets)
     
     # 查询影响等级推文子命令
     impact_parser = subparsers.add_parser('impact', help='查询特定影响等级的推文')
     impact_parser.add_argument('--impact-level', '-i', help='影响等级')
     impact_parser.add_argument('--limit', '-l', type=int, default=10, help='最大返回数量')
+    impact_parser.add_argument('--cursor', help='上一页输出的分页游标')
+    impact_parser.add_argument('--full', action='store_true', help='同时显示关键因素和历史参照')
     impact_parser.set_defaults(func=query_impact_tweets)
     
+    # 组合条件查询子命令
+    query_parser = subparsers.add_parser('query', help='按项目、影响等级、事件类型、用户名和时间范围组合查询推文')
+    query_parser.add_argument('--project-id', '-p', action='append', help='项目ID，可重复指定')
+    query_parser.add_argument('--impact-level', '-i', action='append', help='影响等级，可重复指定')
+    query_parser.add_argument('--event-type', '-e', help='事件类型关键词（不区分大小写的子串匹配）')
+    query_parser.add_argument('--username', '-u', action='append', help='Twitter用户名，可重复指定')
+    query_parser.add_argument('--since', help='起始时间（含），如 2024-01-01 或 6h、7d 表示最近6小时、7天')
+    query_parser.add_argument('--until', help='结束时间（不含），格式同 --since')
+    query_parser.add_argument('--limit', '-l', type=int, default=10, help='最大返回数量')
+    query_parser.add_argument('--cursor', help='上一页输出的分页游标')
+    query_parser.add_argument('--full', action='store_true', help='同时显示关键因素和历史参照')
+    query_parser.set_defaults(func=query_filtered_tweets)
+    
+    # 全文检索子命令
+    search_parser = subparsers.add_parser('search', help='全文检索推文正文、事件类型和关键因素，按相关度排序')
+    search_parser.add_argument('keywords', help='检索关键词，中英文均可，如 "主网上线" 或 "mainnet launch"')
+    search_parser.add_argument('--project-id', '-p', action='append', help='项目ID，可重复指定')
+    search_parser.add_argument('--impact-level', '-i', action='append', help='影响等级，可重复指定')
+    search_parser.add_argument('--since', help='起始时间（含），如 2024-01-01 或 6h、7d 表示最近6小时、7天')
+    search_parser.add_argument('--until', help='结束时间（不含），格式同 --since')
+    search_parser.add_argument('--limit', '-l', type=int, default=10, help='最大返回数量')
+    search_parser.add_argument('--full', action='store_true', help='同时显示关键因素和历史参照')
+    search_parser.set_defaults(func=search_tweets)
+    
     # 导出推文子命令
-    export_parser = subparsers.add_parser('export', help='导出推文数据为JSON文件')
-    export_parser.add_argument('--output', '-o', help='输出文件名')
-    export_parser.add_argument('--project-id', '-p', help='项目ID，如不指定则导出所有推文')
-    export_parser.add_argument('--limit', '-l', type=int, default=100, help='最大导出数量')
+    export_parser = subparsers.add_parser('export', help='流式导出推文数据，支持断点续传')
+    export_parser.add_argument('--output', '-o', help='输出文件名（Parquet为目录），断点保存在同名的.state文件')
+    export_parser.add_argument('--project-id', '-p', action='append', help='项目ID，可重复指定，如不指定则导出所有推文')
+    export_parser.add_argument('--since', type=parse_date, help='起始时间（含），如 2024-01-01')
+    export_parser.add_argument('--until', type=parse_date, help='结束时间（不含），如 2024-02-01')
+    export_parser.add_argument('--format', '-f', choices=EXPORT_FORMATS, default='ndjson', help='导出格式')
+    export_parser.add_argument('--compress', '-c', choices=EXPORT_COMPRESSIONS, default='none',
+                               help='压缩方式，Parquet使用内置的列压缩')
+    export_parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help='每批读取和写出的推文数')
+    export_parser.add_argument('--restart', action='store_true', help='忽略断点，重新导出')
     export_parser.set_defaults(func=export_tweets)
     
     # 解析命令行参数
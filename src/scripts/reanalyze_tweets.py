@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.database import get_db
+from src.models.pagination import MAX_PAGE_SIZE, fetch_page
+from src.models.tweet import Tweet
+from src.utils.ai_analyzer import analyze_tweets_batch, configure_analysis_cache
+from src.utils.ai_async import analyze_tweets_concurrently
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# 读取待分析推文时只需要的字段
+REANALYZE_FIELDS = {"text": 1, "token_symbol": 1, "project_id": 1, "created_at": 1}
+
+def build_reanalyze_query(args):
+    """按命令行参数构建待分析推文的查询条件"""
+    query = Tweet.build_query(
+        project_ids=args.project_id,
+        impact_levels=args.impact_level,
+        since=args.since,
+        until=args.until
+    )
+    if not args.all:
+        statuses = args.status or ['failed']
+        query["analysis_status"] = statuses[0] if len(statuses) == 1 else {"$in": statuses}
+    return query
+
+def analyze_chunk(documents, args):
+    """分析一批推文，返回与documents顺序一致的分析结果"""
+    items = [(document.get("text", ""), document.get("token_symbol")) for document in documents]
+    if args.mode == 'batch':
+        # 每次请求打包多条推文，分摊prompt的指令token
+        return analyze_tweets_batch(items, batch_size=args.batch_size)
+    # 每条推文单独请求，多个请求并发执行
+    return analyze_tweets_concurrently(items, provider=args.provider)
+
+def reanalyze(args):
+    """分析积压或失败的推文并写回结果，不发送通知"""
+    tweets_collection = get_db().tweets
+    query = build_reanalyze_query(args)
+
+    analyzed = 0
+    failed = 0
+    cursor = None
+    while args.limit is None or analyzed + failed < args.limit:
+        chunk_size = args.chunk_size if args.limit is None else min(args.chunk_size, args.limit - analyzed - failed)
+        # 写回后的推文可能不再满足状态条件，键集分页不受影响
+        documents, cursor = fetch_page(tweets_collection, query, chunk_size, cursor, REANALYZE_FIELDS)
+        if not documents:
+            break
+
+        if args.dry_run:
+            analyzed += len(documents)
+        else:
+            for document, result in zip(documents, analyze_chunk(documents, args)):
+                if result.get('analysis_failed'):
+                    # 分析失败的推文保持原状态，稍后由处理队列或再次运行时重试
+                    failed += 1
+                    continue
+                Tweet.save_analysis(document["_id"], document.get("project_id"), document.get("created_at"),
+                                    document.get("text", ""), result)
+                analyzed += 1
+            logger.info(f"已分析 {analyzed} 条推文，失败 {failed} 条")
+
+        if not cursor:
+            break
+
+    if args.dry_run:
+        logger.info(f"符合条件的推文: {analyzed} 条（未分析）")
+    else:
+        logger.info(f"重新分析完成，成功 {analyzed} 条，失败 {failed} 条")
+    return failed == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='批量分析积压、失败或需要重新分析的推文（不发送通知）')
+    parser.add_argument('--status', '-s', action='append', choices=['pending', 'failed', 'rejected', 'done'],
+                        help='分析状态，可重复指定，默认只处理failed')
+    parser.add_argument('--all', action='store_true', help='不限分析状态，例如更换模型或prompt后全部重新分析')
+    parser.add_argument('--project-id', '-p', action='append', help='项目ID，可重复指定')
+    parser.add_argument('--impact-level', '-i', action='append', help='影响等级，可重复指定')
+    parser.add_argument('--since', help='起始时间（含），如 2024-01-01 或 7d')
+    parser.add_argument('--until', help='结束时间（不含），格式同 --since')
+    parser.add_argument('--limit', '-l', type=int, help='最多分析的推文数，默认不限')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help=f'每轮读取并并发分析的推文数，不超过 {MAX_PAGE_SIZE}')
+    parser.add_argument('--mode', choices=['concurrent', 'batch'], default='concurrent',
+                        help='concurrent: 单条prompt并发请求；batch: 多条推文打包为一个prompt')
+    parser.add_argument('--provider', help='AI提供商或chain，默认使用AI_PROVIDER（仅concurrent模式）')
+    parser.add_argument('--batch-size', type=int, help='batch模式下每次请求的推文数，默认使用ANALYSIS_BATCH_SIZE')
+    parser.add_argument('--dry-run', action='store_true', help='只统计符合条件的推文，不调用AI')
+    args = parser.parse_args()
+    if args.mode == 'batch' and args.provider:
+        parser.error('batch模式使用AI_PROVIDER配置的提供商，不支持 --provider')
+
+    if get_db() is None:
+        logger.error("MongoDB连接未初始化")
+        sys.exit(1)
+    # 与应用共用分析结果缓存
+    configure_analysis_cache(lambda: get_db().analysis_cache)
+
+    try:
+        succeeded = reanalyze(args)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"重新分析推文时出错: {str(e)}")
+        sys.exit(1)
+    if not succeeded:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
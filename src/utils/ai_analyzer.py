@@ -2,12 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import json
+import copy
+import time
+import hashlib
 import logging
-import requests
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
 from dotenv import load_dotenv
-import anthropic
-import openai
+
+from .ai_clients import (
+    DEEPSEEK_BASE_URL,
+    deepseek_timeout,
+    get_anthropic_client,
+    get_deepseek_session,
+    get_openai_client
+)
+from .ai_hedge import AI_PROVIDER_CHAIN, hedged_call
+from .prefilter import PREFILTER_ENABLED, prefilter_tweet
+from .stream_fields import StreamingFieldParser
 
 # 加载环境变量
 load_dotenv()
@@ -24,32 +40,226 @@ ANTHROPIC_MODEL = os.getenv('ANTHROPIC_MODEL', 'claude-3-opus-20240229')
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
 
-def analyze_tweet(tweet_text, token_symbol):
+# 分析结果缓存配置
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', 10000))
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+
+# 流式模式：影响等级一输出就回调，不必等待完整的分析结果
+AI_STREAMING = os.getenv('AI_STREAMING', 'False').lower() == 'true'
+# 流式响应中提前提取的字段
+EARLY_FIELDS = ('event_type', 'impact_level')
+
+# 批量分析：每次请求打包的推文数，以及每条推文预留的输出token
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', 10))
+BATCH_MAX_TOKENS_PER_ITEM = int(os.getenv('BATCH_MAX_TOKENS_PER_ITEM', 600))
+
+# 系统提示词
+SYSTEM_PROMPT = "你是一个专业的加密货币市场分析师，请以JSON格式输出分析结果。"
+
+# 修改prompt内容时递增，使旧的缓存结果失效
+PROMPT_VERSION = '2'
+# 批量prompt的版本，批量分析的结果与单条分析的结果分开缓存
+BATCH_PROMPT_VERSION = 'batch-1'
+
+# 分析结果必须包含的字段
+REQUIRED_FIELDS = ['event_type', 'impact_level', 'expected_volatility', 'key_factors', 'historical_reference']
+# 有效的影响等级
+IMPACT_LEVELS = ['Extremely Bullish', 'Bullish', 'Non-Significant', 'Bearish', 'Extremely Bearish']
+
+PROVIDER_MODELS = {
+    'openai': OPENAI_MODEL,
+    'anthropic': ANTHROPIC_MODEL,
+    'deepseek': DEEPSEEK_MODEL,
+    'chain': ','.join(AI_PROVIDER_CHAIN)
+}
+
+class AnalysisCache:
+    """
+    两级分析结果缓存：进程内LRU + MongoDB持久化存储
+
+    键由规范化后的推文内容、代币符号、AI提供商、模型和prompt版本共同决定，
+    相同公告被多个项目账号转发或日后重发时直接复用分析结果。
+    """
+
+    def __init__(self, maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._collection_getter = None
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def configure(self, collection_getter):
+        """
+        启用MongoDB存储层
+
+        参数:
+            collection_getter (callable): 返回缓存集合的函数，每次访问时调用以保证fork安全
+        """
+        self._collection_getter = collection_getter
+
+    def _collection(self):
+        if not self._collection_getter:
+            return None
+        try:
+            return self._collection_getter()
+        except Exception as e:
+            logger.warning(f"获取分析缓存集合失败: {str(e)}")
+            return None
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get(self, key):
+        """查询缓存，命中时返回分析结果的副本，否则返回None"""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._items.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(entry[1])
+            if entry:
+                del self._items[key]
+
+        collection = self._collection()
+        if collection is not None:
+            try:
+                document = collection.find_one({'_id': key})
+            except Exception as e:
+                logger.warning(f"读取分析缓存失败: {str(e)}")
+                document = None
+            if document and document.get('result'):
+                self._remember(key, document['result'])
+                with self._lock:
+                    self.store_hits += 1
+                return copy.deepcopy(document['result'])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, result, **metadata):
+        """写入缓存，metadata会一并保存到MongoDB便于排查"""
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            document = {'result': result, 'created_at': datetime.utcnow()}
+            document.update(metadata)
+            collection.replace_one({'_id': key}, document, upsert=True)
+        except Exception as e:
+            logger.warning(f"写入分析缓存失败: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            return {
+                'size': len(self._items),
+                'capacity': self.maxsize,
+                'memory_hits': self.memory_hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+                'persistent': self._collection_getter is not None
+            }
+
+analysis_cache = AnalysisCache()
+
+def configure_analysis_cache(collection_getter):
+    """启用分析结果缓存的MongoDB存储层，collection_getter返回缓存集合"""
+    analysis_cache.configure(collection_getter)
+
+def get_analysis_cache_stats():
+    """返回分析缓存的命中统计"""
+    return analysis_cache.stats()
+
+def normalize_tweet_text(tweet_text):
+    """规范化推文内容：统一Unicode形式和大小写，去掉t.co短链接并合并空白"""
+    text = unicodedata.normalize('NFKC', tweet_text or '').casefold()
+    text = re.sub(r'https?://t\.co/\S+', '', text)
+    return ' '.join(text.split())
+
+def analysis_cache_key(tweet_text, token_symbol, provider=None, model=None, prompt_version=PROMPT_VERSION):
+    """
+    计算分析结果缓存键
+
+    参数:
+        tweet_text (str): 推文内容
+        token_symbol (str): 代币符号
+        provider (str, optional): AI提供商，默认使用AI_PROVIDER
+        model (str, optional): 模型名称，默认使用提供商配置的模型
+        prompt_version (str): prompt版本，批量分析使用BATCH_PROMPT_VERSION
+
+    返回:
+        str: SHA-256十六进制摘要
+    """
+    provider = provider or AI_PROVIDER
+    model = model or PROVIDER_MODELS.get(provider, '')
+    parts = [normalize_tweet_text(tweet_text), (token_symbol or '').upper(), provider, model, prompt_version]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def analyze_tweet(tweet_text, token_symbol, on_early=None):
     """
     使用AI分析推文内容，评估对币价的潜在影响
     
+    明显无关紧要的推文由本地预过滤直接判定，不调用AI；相同内容的推文直接返回缓存的分析结果；
+    AI分析失败时返回的默认结果不会被缓存。
+    
     参数:
         tweet_text (str): 推文内容
         token_symbol (str): 代币符号，如BTC、ETH等
+        on_early (callable, optional): 流式模式下，响应中出现impact_level时以
+            {event_type, impact_level} 调用一次；命中预过滤或缓存时不会调用
         
     返回:
         dict: 分析结果，包含影响等级、预期波动等信息
     """
-    try:
-        # 构建prompt
-        prompt = f"""
-你是一个加密货币市场分析师，请根据[推文内容]，评估其对代币 [{token_symbol}] 价格的潜在影响:
+    if PREFILTER_ENABLED:
+        prefiltered = prefilter_tweet(tweet_text)
+        if prefiltered is not None:
+            logger.info("本地预过滤判定为无显著影响，跳过AI调用")
+            return prefiltered
+    
+    cache_key = analysis_cache_key(tweet_text, token_symbol)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        logger.info("命中分析缓存，跳过AI调用")
+        return cached
+    
+    if on_early is not None and AI_STREAMING and AI_PROVIDER in PROVIDER_STREAMERS:
+        result = analyze_tweet_streaming(tweet_text, token_symbol, on_early)
+    else:
+        result = analyze_tweet_uncached(tweet_text, token_symbol)
+    if result is None:
+        return default_analysis_result(token_symbol)
+    
+    analysis_cache.set(
+        cache_key,
+        result,
+        token_symbol=token_symbol,
+        provider=AI_PROVIDER,
+        model=PROVIDER_MODELS.get(AI_PROVIDER, ''),
+        prompt_version=PROMPT_VERSION
+    )
+    return result
 
-评估依据包括：
+# 单条和批量分析共用的评估依据
+PROMPT_CRITERIA = """评估依据包括：
 1. 是否涉及合作伙伴关系、监管批准、技术突破等关键事件
 2. 市场情绪关键词（如"重大进展""首次""唯一"等）
 3. 对比历史事件：历史上有无类似事件，以及当时对应代币价格的市场反应
-4. 使用加密货币行业专用情感词典
-
-推文内容: {tweet_text}
+4. 使用加密货币行业专用情感词典"""
 
-输出格式：
-   1. 简短总结事件类型
+# 单条和批量分析共用的输出格式（每条推文）
+PROMPT_OUTPUT_FORMAT = """   1. 简短总结事件类型
    2. 影响等级（按以下等级分类）：
 - Extremely Bullish（重大利好）
 - Bullish（利好）
@@ -58,76 +268,327 @@ def analyze_tweet(tweet_text, token_symbol):
 - Extremely Bearish（重大利空）
    3. 预期波动：±百分比范围
    4. 关键因素：列举3个影响点
-   5. 历史参照：历史类似事件发生后，当时对应代币价格的市场反应
+   5. 历史参照：历史类似事件发生后，当时对应代币价格的市场反应"""
+
+def build_prompt(tweet_text, token_symbol):
+    """构建分析单条推文的prompt"""
+    return f"""
+你是一个加密货币市场分析师，请根据[推文内容]，评估其对代币 [{token_symbol}] 价格的潜在影响:
 
-请以JSON格式输出，包含以下字段：event_type, impact_level, expected_volatility, key_factors (数组), historical_reference
+{PROMPT_CRITERIA}
+
+推文内容: {tweet_text}
+
+输出格式：
+{PROMPT_OUTPUT_FORMAT}
+
+请以JSON格式输出，按以下顺序包含字段：event_type, impact_level, expected_volatility, key_factors (数组), historical_reference
 """
+
+def parse_analysis_response(response_content):
+    """
+    解析并校验AI返回的分析结果
+    
+    参数:
+        response_content (str): AI返回的文本
+    
+    返回:
+        dict: 补齐必要字段后的分析结果，无法解析为JSON时返回None
+    """
+    try:
+        # 尝试直接解析JSON
+        result = json.loads(response_content)
+    except (json.JSONDecodeError, TypeError):
+        # 如果直接解析失败，尝试从文本中提取JSON部分
+        try:
+            json_str = extract_json_from_text(response_content)
+            result = json.loads(json_str)
+        except:
+            logger.error("无法解析AI响应为JSON格式")
+            return None
+    
+    if not isinstance(result, dict):
+        logger.error("AI响应不是JSON对象")
+        return None
+    
+    # 验证结果格式
+    for field in REQUIRED_FIELDS:
+        if field not in result:
+            logger.warning(f"AI响应中缺少必要字段: {field}")
+            result[field] = "未提供" if field != 'key_factors' else []
+    
+    return result
+
+def analyze_tweet_uncached(tweet_text, token_symbol):
+    """
+    直接调用AI分析推文（不经过缓存）
+    
+    返回:
+        dict: 分析结果，AI调用或解析失败时返回None
+    """
+    try:
+        # 构建prompt
+        prompt = build_prompt(tweet_text, token_symbol)
+        return complete_prompt(prompt, parse_analysis_response)
         
-        # 根据配置的AI提供商调用相应的API
-        response_content = None
-        
-        if AI_PROVIDER == 'openai':
-            response_content = analyze_with_openai(prompt)
-        elif AI_PROVIDER == 'anthropic':
-            response_content = analyze_with_anthropic(prompt)
-        elif AI_PROVIDER == 'deepseek':
-            response_content = analyze_with_deepseek(prompt)
+    except Exception as e:
+        logger.error(f"分析推文时出错: {str(e)}")
+        return None
+
+def analyze_tweet_streaming(tweet_text, token_symbol, on_early):
+    """
+    以流式方式调用AI分析推文，影响等级一出现就回调on_early
+    
+    参数:
+        tweet_text (str): 推文内容
+        token_symbol (str): 代币符号
+        on_early (callable): 以 {event_type, impact_level} 调用一次
+    
+    返回:
+        dict: 完整的分析结果，失败时返回None
+    """
+    parser = StreamingFieldParser(EARLY_FIELDS)
+    notified = False
+    chunks = []
+    try:
+        prompt = build_prompt(tweet_text, token_symbol)
+        for chunk in PROVIDER_STREAMERS[AI_PROVIDER](prompt):
+            chunks.append(chunk)
+            if notified or not parser.feed(chunk).get('impact_level'):
+                continue
+            notified = True
+            if parser.values['impact_level'] not in IMPACT_LEVELS:
+                continue
+            logger.info(f"流式响应中已得到影响等级: {parser.values['impact_level']}")
+            try:
+                on_early(dict(parser.values))
+            except Exception as e:
+                logger.error(f"处理提前返回的分析字段时出错: {str(e)}")
+        return parse_analysis_response(''.join(chunks))
+    except Exception as e:
+        logger.error(f"流式分析推文时出错: {str(e)}")
+        return None
+
+def complete_prompt(prompt, validate, max_tokens=None):
+    """
+    按配置的AI提供商发送prompt并校验响应
+    
+    参数:
+        prompt (str): 用户prompt
+        validate (callable): 解析并校验响应文本，无效时返回None
+        max_tokens (int, optional): 最大输出token数，默认由各提供商决定
+    
+    返回:
+        校验后的结果，失败时返回None
+    """
+    # 多提供商模式：按延迟对冲，第一个有效结果胜出
+    if AI_PROVIDER == 'chain':
+        provider, result = hedged_call(
+            lambda name: PROVIDER_CALLERS[name](prompt, max_tokens=max_tokens),
+            validate
+        )
+        if provider:
+            logger.info(f"多提供商分析完成，胜出: {provider}")
         else:
-            logger.error(f"未知的AI提供商: {AI_PROVIDER}")
-            return default_analysis_result(token_symbol)
-        
-        # 解析JSON结果
+            logger.error("所有AI提供商均分析失败")
+        return result
+    
+    # 根据配置的AI提供商调用相应的API
+    if AI_PROVIDER not in PROVIDER_CALLERS:
+        logger.error(f"未知的AI提供商: {AI_PROVIDER}")
+        return None
+    
+    response_content = PROVIDER_CALLERS[AI_PROVIDER](prompt, max_tokens=max_tokens)
+    
+    # 解析JSON结果
+    return validate(response_content)
+
+def build_batch_prompt(items):
+    """
+    构建一次分析多条推文的prompt
+    
+    参数:
+        items (list): (tweet_text, token_symbol) 元组列表
+    
+    返回:
+        str: prompt，要求按序号返回JSON数组
+    """
+    tweets_block = "\n\n".join(
+        f"[{index}] 代币: {token_symbol}\n推文内容: {tweet_text}"
+        for index, (tweet_text, token_symbol) in enumerate(items)
+    )
+    return f"""
+你是一个加密货币市场分析师，请逐条评估下列 {len(items)} 条推文对各自代币价格的潜在影响。
+
+{PROMPT_CRITERIA}
+
+{tweets_block}
+
+每条推文的输出格式：
+{PROMPT_OUTPUT_FORMAT}
+
+请以JSON格式输出：{{"results": [...]}}，数组中每个元素对应一条推文，包含以下字段：
+index (推文序号), event_type, impact_level, expected_volatility, key_factors (数组), historical_reference
+"""
+
+def parse_batch_response(response_content, expected=None):
+    """
+    解析批量分析的响应
+    
+    多提供商模式下校验结果为None的响应不会胜出，因此缺少结果的响应视为无效，由其他提供商或单条重试补上。
+    
+    参数:
+        response_content (str): AI返回的文本
+        expected (int, optional): 批次中的推文数，指定时必须每条推文都有有效结果
+    
+    返回:
+        dict: 推文序号到分析结果的映射，无法解析、没有任何有效结果或结果不完整时返回None
+    """
+    try:
+        data = json.loads(response_content)
+    except (json.JSONDecodeError, TypeError):
         try:
-            # 尝试直接解析JSON
-            result = json.loads(response_content)
-        except json.JSONDecodeError:
-            # 如果直接解析失败，尝试从文本中提取JSON部分
-            try:
-                json_str = extract_json_from_text(response_content)
-                result = json.loads(json_str)
-            except:
-                logger.error("无法解析AI响应为JSON格式")
-                return default_analysis_result(token_symbol)
-        
-        # 验证结果格式
-        required_fields = ['event_type', 'impact_level', 'expected_volatility', 'key_factors', 'historical_reference']
-        for field in required_fields:
-            if field not in result:
-                logger.warning(f"AI响应中缺少必要字段: {field}")
-                result[field] = "未提供" if field != 'key_factors' else []
+            data = json.loads(extract_json_from_text(response_content))
+        except:
+            logger.error("无法解析批量AI响应为JSON格式")
+            return None
+    
+    items = data.get('results') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        logger.error("批量AI响应中缺少results数组")
+        return None
+    
+    results = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('index'), int):
+            continue
+        index = item.pop('index')
+        if 'impact_level' not in item or (expected is not None and not 0 <= index < expected):
+            continue
+        for field in REQUIRED_FIELDS:
+            if field not in item:
+                item[field] = "未提供" if field != 'key_factors' else []
+        results[index] = item
+    
+    if not results:
+        logger.error("批量AI响应中没有有效的分析结果")
+        return None
+    if expected is not None and len(results) < expected:
+        logger.error(f"批量AI响应不完整: {len(results)}/{expected} 条")
+        return None
+    return results
+
+def analyze_tweets_batch(items, batch_size=None):
+    """
+    批量分析推文：每次请求打包最多batch_size条推文，分摊指令token和往返延迟
+    
+    预过滤与analyze_tweet一致；单条或批量分析缓存过的推文不再请求。批量结果以BATCH_PROMPT_VERSION
+    单独缓存，批量响应中缺失或无法解析的推文单独重试，结果按单条分析缓存。
+    
+    参数:
+        items (list): (tweet_text, token_symbol) 元组列表，代币可以各不相同
+        batch_size (int, optional): 每次请求的推文数，默认使用ANALYSIS_BATCH_SIZE
+    
+    返回:
+        list: 与items顺序一致的分析结果列表
+    """
+    items = list(items)
+    batch_size = max(1, batch_size or ANALYSIS_BATCH_SIZE)
+    results = [None] * len(items)
+    
+    # 先走预过滤和缓存，相同内容只分析一次
+    pending = OrderedDict()
+    for position, (tweet_text, token_symbol) in enumerate(items):
+        if PREFILTER_ENABLED:
+            prefiltered = prefilter_tweet(tweet_text)
+            if prefiltered is not None:
+                results[position] = prefiltered
+                continue
+        cache_key = analysis_cache_key(tweet_text, token_symbol)
+        if cache_key in pending:
+            pending[cache_key][1].append(position)
+            continue
+        batch_key = analysis_cache_key(tweet_text, token_symbol, prompt_version=BATCH_PROMPT_VERSION)
+        cached = analysis_cache.get(cache_key)
+        if cached is None:
+            cached = analysis_cache.get(batch_key)
+        if cached is not None:
+            results[position] = cached
+            continue
+        pending[cache_key] = ((tweet_text, token_symbol), [position], batch_key)
+    
+    keys = list(pending)
+    for start in range(0, len(keys), batch_size):
+        chunk_keys = keys[start:start + batch_size]
+        chunk = [pending[key][0] for key in chunk_keys]
         
-        return result
+        batch_results = None
+        if len(chunk) > 1:
+            # 多提供商对冲时只有完整的批量结果才能胜出；单一提供商时部分结果可用，缺失的推文单独重试
+            expected = len(chunk) if AI_PROVIDER == 'chain' else None
+            try:
+                batch_results = complete_prompt(
+                    build_batch_prompt(chunk),
+                    lambda response_content: parse_batch_response(response_content, expected),
+                    max_tokens=BATCH_MAX_TOKENS_PER_ITEM * len(chunk)
+                )
+            except Exception as e:
+                logger.error(f"批量分析推文时出错: {str(e)}")
+        batch_results = batch_results or {}
+        logger.info(f"批量分析 {len(chunk)} 条推文，成功解析 {len(batch_results)} 条")
         
-    except Exception as e:
-        logger.error(f"分析推文时出错: {str(e)}")
-        return default_analysis_result(token_symbol)
+        for index, key in enumerate(chunk_keys):
+            tweet_text, token_symbol = chunk[index]
+            result = batch_results.get(index)
+            cache_key, prompt_version = pending[key][2], BATCH_PROMPT_VERSION
+            if result is None:
+                # 批量结果中缺失或无效的推文单独重试
+                result = analyze_tweet_uncached(tweet_text, token_symbol)
+                cache_key, prompt_version = key, PROMPT_VERSION
+            if result is None:
+                result = default_analysis_result(token_symbol)
+            else:
+                analysis_cache.set(
+                    cache_key,
+                    result,
+                    token_symbol=token_symbol,
+                    provider=AI_PROVIDER,
+                    model=PROVIDER_MODELS.get(AI_PROVIDER, ''),
+                    prompt_version=prompt_version
+                )
+            for position in pending[key][1]:
+                results[position] = copy.deepcopy(result)
+    
+    return results
 
-def analyze_with_openai(prompt):
+def analyze_with_openai(prompt, max_tokens=None):
     """使用OpenAI API分析推文"""
     try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        client = get_openai_client()
+        options = {'max_tokens': max_tokens} if max_tokens else {}
         response = client.chat.completions.create(
             model=OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": "你是一个专业的加密货币市场分析师，请以JSON格式输出分析结果。"},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.2,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            **options
         )
         return response.choices[0].message.content
     except Exception as e:
         logger.error(f"OpenAI API调用失败: {str(e)}")
         raise
 
-def analyze_with_anthropic(prompt):
+def analyze_with_anthropic(prompt, max_tokens=None):
     """使用Anthropic Claude API分析推文"""
     try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        client = get_anthropic_client()
         response = client.messages.create(
             model=ANTHROPIC_MODEL,
-            max_tokens=1000,
-            system="你是一个专业的加密货币市场分析师，请以JSON格式输出分析结果。",
+            max_tokens=max_tokens or 1000,
+            system=SYSTEM_PROMPT,
             messages=[
                 {"role": "user", "content": prompt}
             ]
@@ -137,26 +598,23 @@ def analyze_with_anthropic(prompt):
         logger.error(f"Anthropic API调用失败: {str(e)}")
         raise
 
-def analyze_with_deepseek(prompt):
+def analyze_with_deepseek(prompt, max_tokens=None):
     """使用Deepseek API分析推文"""
     try:
-        headers = {
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "model": DEEPSEEK_MODEL,
             "messages": [
-                {"role": "system", "content": "你是一个专业的加密货币市场分析师，请以JSON格式输出分析结果。"},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ]
         }
+        if max_tokens:
+            data["max_tokens"] = max_tokens
         
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers=headers,
-            json=data
+        response = get_deepseek_session().post(
+            f"{DEEPSEEK_BASE_URL}/chat/completions",
+            json=data,
+            timeout=deepseek_timeout()
         )
         
         response_json = response.json()
@@ -169,6 +627,94 @@ def analyze_with_deepseek(prompt):
         logger.error(f"Deepseek API调用失败: {str(e)}")
         raise
 
+def stream_with_openai(prompt):
+    """以流式方式调用OpenAI API，逐段返回文本"""
+    try:
+        client = get_openai_client()
+        stream = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        logger.error(f"OpenAI API流式调用失败: {str(e)}")
+        raise
+
+def stream_with_anthropic(prompt):
+    """以流式方式调用Anthropic Claude API，逐段返回文本"""
+    try:
+        client = get_anthropic_client()
+        with client.messages.stream(
+            model=ANTHROPIC_MODEL,
+            max_tokens=1000,
+            system=SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+    except Exception as e:
+        logger.error(f"Anthropic API流式调用失败: {str(e)}")
+        raise
+
+def stream_with_deepseek(prompt):
+    """以流式方式调用Deepseek API，逐段返回文本"""
+    try:
+        data = {
+            "model": DEEPSEEK_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True
+        }
+        
+        with get_deepseek_session().post(
+            f"{DEEPSEEK_BASE_URL}/chat/completions",
+            json=data,
+            timeout=deepseek_timeout(),
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"Deepseek API返回状态码 {response.status_code}: {response.text[:200]}")
+            # 服务端事件流，每行形如 "data: {...}"，以 "data: [DONE]" 结束
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                payload = line[len('data:'):].strip()
+                if payload == '[DONE]':
+                    break
+                choices = json.loads(payload).get('choices') or []
+                content = choices[0].get('delta', {}).get('content') if choices else None
+                if content:
+                    yield content
+    except Exception as e:
+        logger.error(f"Deepseek API流式调用失败: {str(e)}")
+        raise
+
+# 各提供商的同步调用函数
+PROVIDER_CALLERS = {
+    'openai': analyze_with_openai,
+    'anthropic': analyze_with_anthropic,
+    'deepseek': analyze_with_deepseek
+}
+
+# 各提供商的流式调用函数；chain模式不支持流式，按非流式对冲处理
+PROVIDER_STREAMERS = {
+    'openai': stream_with_openai,
+    'anthropic': stream_with_anthropic,
+    'deepseek': stream_with_deepseek
+}
+
 def extract_json_from_text(text):
     """从文本中提取JSON部分"""
     # 尝试查找花括号位置
@@ -181,8 +727,9 @@ def extract_json_from_text(text):
         raise ValueError("无法在文本中找到JSON")
     
 def default_analysis_result(token_symbol):
-    """默认的分析结果，当AI分析失败时使用"""
+    """默认的分析结果，当AI分析失败时使用，analysis_failed标记其不是AI给出的结论"""
     return {
+        "analysis_failed": True,
         "event_type": "未能分析事件类型",
         "impact_level": "Non-Significant",
         "expected_volatility": "±0-1%",
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import logging
+
+from .ai_analyzer import (
+    AI_PROVIDER,
+    ANTHROPIC_MODEL,
+    DEEPSEEK_MODEL,
+    OPENAI_MODEL,
+    PROMPT_VERSION,
+    PROVIDER_MODELS,
+    SYSTEM_PROMPT,
+    analysis_cache,
+    analysis_cache_key,
+    build_prompt,
+    default_analysis_result,
+    parse_analysis_response
+)
+from .ai_clients import close_async_client, create_async_client
+from .ai_hedge import AI_PROVIDER_CHAIN, hedged_call_async
+from .prefilter import PREFILTER_ENABLED, prefilter_tweet
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每个AI提供商的默认并发数和每秒请求数上限（0表示不限速）
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 8))
+AI_RATE_LIMIT = float(os.getenv('AI_RATE_LIMIT', 0))
+
+
+def provider_concurrency(provider):
+    """提供商的并发上限，可用 AI_MAX_CONCURRENCY_<PROVIDER> 单独配置"""
+    return max(1, int(os.getenv(f'AI_MAX_CONCURRENCY_{provider.upper()}', AI_MAX_CONCURRENCY)))
+
+
+def provider_rate_limit(provider):
+    """提供商每秒请求数上限，可用 AI_RATE_LIMIT_<PROVIDER> 单独配置"""
+    return float(os.getenv(f'AI_RATE_LIMIT_{provider.upper()}', AI_RATE_LIMIT))
+
+
+class AsyncRateLimiter:
+    """异步令牌桶限速器"""
+
+    def __init__(self, rate, burst=None):
+        """
+        参数:
+            rate (float): 每秒补充的令牌数，0表示不限速
+            burst (int, optional): 桶容量，默认等于rate（至少为1）
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def call_openai_async(client, prompt):
+    """异步调用OpenAI API"""
+    response = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,
+        response_format={"type": "json_object"}
+    )
+    return response.choices[0].message.content
+
+
+async def call_anthropic_async(client, prompt):
+    """异步调用Anthropic Claude API"""
+    response = await client.messages.create(
+        model=ANTHROPIC_MODEL,
+        max_tokens=1000,
+        system=SYSTEM_PROMPT,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.content[0].text
+
+
+async def call_deepseek_async(client, prompt):
+    """异步调用Deepseek API"""
+    response = await client.post("/chat/completions", json={
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    })
+    response_json = response.json()
+    if 'choices' in response_json and len(response_json['choices']) > 0:
+        return response_json['choices'][0]['message']['content']
+    logger.error(f"Deepseek API响应格式异常: {response_json}")
+    raise Exception("Deepseek API响应格式异常")
+
+
+ASYNC_CALLERS = {
+    'openai': call_openai_async,
+    'anthropic': call_anthropic_async,
+    'deepseek': call_deepseek_async
+}
+
+
+class AsyncProvider:
+    """在一个事件循环内复用的提供商客户端及其并发、限速控制"""
+
+    def __init__(self, provider):
+        if provider not in ASYNC_CALLERS:
+            raise ValueError(f"未知的AI提供商: {provider}")
+        self.name = provider
+        self.client = create_async_client(provider)
+        self.semaphore = asyncio.Semaphore(provider_concurrency(provider))
+        self.limiter = AsyncRateLimiter(provider_rate_limit(provider))
+
+    async def complete(self, prompt):
+        """在并发和限速约束下发送一次请求，返回AI响应文本"""
+        async with self.semaphore:
+            await self.limiter.acquire()
+            return await ASYNC_CALLERS[self.name](self.client, prompt)
+
+    async def close(self):
+        await close_async_client(self.client)
+
+
+async def _run_blocking(func, *args):
+    # 缓存的MongoDB存储层是同步接口，放到线程池中执行以免阻塞事件循环
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def _request_analysis(providers, mode, prompt):
+    """单提供商直接请求；多提供商模式下按延迟对冲，落后的请求会被取消"""
+    if mode == 'chain':
+        winner, result = await hedged_call_async(
+            lambda name: providers[name].complete(prompt),
+            parse_analysis_response,
+            chain=list(providers)
+        )
+        if winner is None:
+            logger.error("所有AI提供商均分析失败")
+        return result
+    return parse_analysis_response(await providers[mode].complete(prompt))
+
+
+async def analyze_one_async(providers, mode, tweet_text, token_symbol):
+    """
+    异步分析单条推文，校验与失败兜底逻辑与analyze_tweet一致
+
+    参数:
+        providers (dict): 提供商名称到AsyncProvider的映射
+        mode (str): 提供商名称，或chain表示多提供商对冲
+        tweet_text (str): 推文内容
+        token_symbol (str): 代币符号
+
+    返回:
+        dict: 分析结果
+    """
+    if PREFILTER_ENABLED:
+        prefiltered = prefilter_tweet(tweet_text)
+        if prefiltered is not None:
+            return prefiltered
+
+    cache_key = analysis_cache_key(tweet_text, token_symbol, provider=mode)
+    cached = await _run_blocking(analysis_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        result = await _request_analysis(providers, mode, build_prompt(tweet_text, token_symbol))
+    except Exception as e:
+        logger.error(f"异步分析推文时出错: {str(e)}")
+        result = None
+
+    if result is None:
+        return default_analysis_result(token_symbol)
+
+    await _run_blocking(lambda: analysis_cache.set(
+        cache_key,
+        result,
+        token_symbol=token_symbol,
+        provider=mode,
+        model=PROVIDER_MODELS.get(mode, ''),
+        prompt_version=PROMPT_VERSION
+    ))
+    return result
+
+
+async def analyze_tweets_async(items, provider=None):
+    """
+    并发分析多条推文
+
+    参数:
+        items (list): (tweet_text, token_symbol) 元组列表
+        provider (str, optional): AI提供商或chain，默认使用AI_PROVIDER
+
+    返回:
+        list: 与items顺序一致的分析结果列表
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    mode = provider or AI_PROVIDER
+    providers = {}
+    try:
+        for name in (AI_PROVIDER_CHAIN if mode == 'chain' else [mode]):
+            providers[name] = AsyncProvider(name)
+    except ValueError as e:
+        logger.error(str(e))
+        for async_provider in providers.values():
+            await async_provider.close()
+        return [default_analysis_result(token_symbol) for _, token_symbol in items]
+
+    try:
+        # 同一批次中内容相同的推文只请求一次
+        tasks = {}
+        keys = []
+        for tweet_text, token_symbol in items:
+            key = analysis_cache_key(tweet_text, token_symbol, provider=mode)
+            keys.append(key)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(analyze_one_async(providers, mode, tweet_text, token_symbol))
+        await asyncio.gather(*tasks.values())
+        logger.info(f"异步分析完成: {len(items)} 条推文，实际分析 {len(tasks)} 条")
+        return [dict(tasks[key].result()) for key in keys]
+    finally:
+        for async_provider in providers.values():
+            await async_provider.close()
+
+
+def analyze_tweets_concurrently(items, provider=None):
+    """analyze_tweets_async的同步入口，供脚本和后台任务调用（不可在已运行的事件循环中调用）"""
+    return asyncio.run(analyze_tweets_async(items, provider))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+import anthropic
+import openai
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# AI提供商连接配置
+AI_CONNECT_TIMEOUT = float(os.getenv('AI_CONNECT_TIMEOUT', 5))
+AI_READ_TIMEOUT = float(os.getenv('AI_READ_TIMEOUT', 60))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 2))
+AI_POOL_SIZE = int(os.getenv('AI_POOL_SIZE', 10))
+
+# API地址，可指向本地桩服务用于测试
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL') or None
+DEEPSEEK_BASE_URL = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com/v1').rstrip('/')
+
+# 重试的HTTP状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 每个进程中每个提供商只创建一个客户端
+_clients = {}
+_clients_pid = None
+_lock = threading.Lock()
+
+
+def _httpx_timeout():
+    return httpx.Timeout(AI_READ_TIMEOUT, connect=AI_CONNECT_TIMEOUT)
+
+
+def _httpx_client():
+    """创建带keep-alive连接池的httpx客户端，供OpenAI/Anthropic SDK复用"""
+    return httpx.Client(
+        timeout=_httpx_timeout(),
+        limits=httpx.Limits(max_connections=AI_POOL_SIZE, max_keepalive_connections=AI_POOL_SIZE)
+    )
+
+
+def _create_openai_client():
+    kwargs = {
+        'api_key': os.getenv('OPENAI_API_KEY'),
+        'timeout': _httpx_timeout(),
+        'max_retries': AI_MAX_RETRIES,
+        'http_client': _httpx_client()
+    }
+    if OPENAI_BASE_URL:
+        kwargs['base_url'] = OPENAI_BASE_URL
+    return openai.OpenAI(**kwargs)
+
+
+def _create_anthropic_client():
+    kwargs = {
+        'api_key': os.getenv('ANTHROPIC_API_KEY'),
+        'timeout': _httpx_timeout(),
+        'max_retries': AI_MAX_RETRIES,
+        'http_client': _httpx_client()
+    }
+    if ANTHROPIC_BASE_URL:
+        kwargs['base_url'] = ANTHROPIC_BASE_URL
+    return anthropic.Anthropic(**kwargs)
+
+
+def _create_deepseek_session():
+    retry = Retry(
+        total=AI_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['POST']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AI_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
+        "Content-Type": "application/json"
+    })
+    return session
+
+
+_FACTORIES = {
+    'openai': _create_openai_client,
+    'anthropic': _create_anthropic_client,
+    'deepseek': _create_deepseek_session
+}
+
+
+def get_client(provider):
+    """
+    获取AI提供商的共享客户端，首次调用时创建
+
+    fork出的子进程会重新创建客户端，不与父进程共享连接。
+
+    参数:
+        provider (str): openai、anthropic或deepseek
+
+    返回:
+        openai.OpenAI | anthropic.Anthropic | requests.Session: 对应的客户端
+    """
+    global _clients, _clients_pid
+    if _clients_pid != os.getpid():
+        with _lock:
+            if _clients_pid != os.getpid():
+                _clients = {}
+                _clients_pid = os.getpid()
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(provider)
+        if client is None:
+            if provider not in _FACTORIES:
+                raise ValueError(f"未知的AI提供商: {provider}")
+            client = _FACTORIES[provider]()
+            _clients[provider] = client
+            logger.debug(f"已创建 {provider} 客户端")
+    return client
+
+
+def get_openai_client():
+    """获取共享的OpenAI客户端"""
+    return get_client('openai')
+
+
+def get_anthropic_client():
+    """获取共享的Anthropic客户端"""
+    return get_client('anthropic')
+
+
+def get_deepseek_session():
+    """获取共享的Deepseek HTTP会话"""
+    return get_client('deepseek')
+
+
+def deepseek_timeout():
+    """Deepseek请求的 (连接超时, 读取超时)"""
+    return (AI_CONNECT_TIMEOUT, AI_READ_TIMEOUT)
+
+
+def create_async_client(provider):
+    """
+    创建AI提供商的异步客户端
+
+    异步客户端绑定在创建它的事件循环上，因此不做进程级缓存，
+    由调用方在同一个事件循环内复用并在结束时关闭。
+
+    参数:
+        provider (str): openai、anthropic或deepseek
+
+    返回:
+        openai.AsyncOpenAI | anthropic.AsyncAnthropic | httpx.AsyncClient: 异步客户端
+    """
+    limits = httpx.Limits(max_connections=AI_POOL_SIZE, max_keepalive_connections=AI_POOL_SIZE)
+    if provider == 'openai':
+        kwargs = {
+            'api_key': os.getenv('OPENAI_API_KEY'),
+            'timeout': _httpx_timeout(),
+            'max_retries': AI_MAX_RETRIES,
+            'http_client': httpx.AsyncClient(timeout=_httpx_timeout(), limits=limits)
+        }
+        if OPENAI_BASE_URL:
+            kwargs['base_url'] = OPENAI_BASE_URL
+        return openai.AsyncOpenAI(**kwargs)
+    if provider == 'anthropic':
+        kwargs = {
+            'api_key': os.getenv('ANTHROPIC_API_KEY'),
+            'timeout': _httpx_timeout(),
+            'max_retries': AI_MAX_RETRIES,
+            'http_client': httpx.AsyncClient(timeout=_httpx_timeout(), limits=limits)
+        }
+        if ANTHROPIC_BASE_URL:
+            kwargs['base_url'] = ANTHROPIC_BASE_URL
+        return anthropic.AsyncAnthropic(**kwargs)
+    if provider == 'deepseek':
+        return httpx.AsyncClient(
+            base_url=DEEPSEEK_BASE_URL,
+            timeout=_httpx_timeout(),
+            limits=limits,
+            transport=httpx.AsyncHTTPTransport(retries=AI_MAX_RETRIES, limits=limits),
+            headers={
+                "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
+                "Content-Type": "application/json"
+            }
+        )
+    raise ValueError(f"未知的AI提供商: {provider}")
+
+
+async def close_async_client(client):
+    """关闭create_async_client创建的客户端"""
+    close = getattr(client, 'close', None) or getattr(client, 'aclose', None)
+    if close:
+        await close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 多提供商模式配置
+AI_PROVIDER_CHAIN = [name.strip().lower() for name in os.getenv('AI_PROVIDER_CHAIN', 'openai,deepseek,anthropic').split(',') if name.strip()]
+AI_HEDGE_DELAY = float(os.getenv('AI_HEDGE_DELAY', 8))
+AI_HEDGE_WORKERS = int(os.getenv('AI_HEDGE_WORKERS', 16))
+AI_HEALTH_WINDOW = int(os.getenv('AI_HEALTH_WINDOW', 50))
+
+
+class ProviderHealth:
+    """单个AI提供商最近若干次调用的延迟和错误率"""
+
+    def __init__(self, window=AI_HEALTH_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self._samples.append((seconds, ok))
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self._samples)
+        latencies = sorted(seconds for seconds, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            'calls': len(samples),
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'p50_latency': round(latencies[len(latencies) // 2], 3) if latencies else None,
+            'p90_latency': round(latencies[int(len(latencies) * 0.9)], 3) if latencies else None
+        }
+
+    def score(self):
+        """排序分数，越小越优先：中位延迟按错误率放大，没有样本时视为刚好等于对冲延迟"""
+        snapshot = self.snapshot()
+        latency = snapshot['p50_latency'] if snapshot['p50_latency'] is not None else AI_HEDGE_DELAY
+        if snapshot['calls'] and snapshot['p50_latency'] is None:
+            # 全部失败
+            latency = AI_HEDGE_DELAY * 10
+        return latency * (1 + 4 * snapshot['error_rate'])
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def provider_health(provider):
+    with _health_lock:
+        if provider not in _health:
+            _health[provider] = ProviderHealth()
+        return _health[provider]
+
+
+def get_provider_health():
+    """返回各提供商的滚动延迟和错误率"""
+    with _health_lock:
+        providers = list(_health.items())
+    return {name: dict(health.snapshot(), score=round(health.score(), 3)) for name, health in providers}
+
+
+def provider_order(chain=None):
+    """按滚动延迟和错误率对提供商链排序，分数相同时保持配置顺序"""
+    chain = chain or AI_PROVIDER_CHAIN
+    return sorted(chain, key=lambda provider: provider_health(provider).score())
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=AI_HEDGE_WORKERS, thread_name_prefix='ai-hedge')
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def _timed_call(provider, call, validate):
+    started = time.monotonic()
+    try:
+        result = validate(call(provider))
+    except Exception as e:
+        logger.warning(f"{provider} 调用失败: {str(e)}")
+        result = None
+    provider_health(provider).record(time.monotonic() - started, result is not None)
+    return result
+
+
+def hedged_call(call, validate, chain=None, delay=None):
+    """
+    对冲调用多个AI提供商，第一个返回有效结果的提供商胜出
+
+    先请求排名第一的提供商；超过delay秒仍未返回、或者返回失败时，再请求下一个提供商。
+    胜出后取消尚未开始的请求，已在进行中的请求结果会被丢弃（仍计入健康统计）。
+
+    参数:
+        call (callable): call(provider) 发送请求并返回响应文本
+        validate (callable): validate(response) 返回解析后的结果，无效时返回None
+        chain (list, optional): 提供商列表，默认使用AI_PROVIDER_CHAIN
+        delay (float, optional): 对冲延迟（秒），默认使用AI_HEDGE_DELAY
+
+    返回:
+        tuple: (胜出的提供商, 结果)，全部失败时返回 (None, None)
+    """
+    delay = AI_HEDGE_DELAY if delay is None else delay
+    remaining = deque(provider_order(chain))
+    executor = _get_executor()
+    pending = {}
+
+    def launch_next():
+        provider = remaining.popleft()
+        pending[executor.submit(_timed_call, provider, call, validate)] = provider
+
+    launch_next()
+    while pending:
+        done, _ = wait(list(pending), timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+        if not done:
+            # 当前请求太慢，对冲到下一个提供商
+            logger.info(f"{', '.join(pending.values())} 超过 {delay}s 未返回，对冲请求 {remaining[0]}")
+            launch_next()
+            continue
+        for future in done:
+            provider = pending.pop(future)
+            result = future.result()
+            if result is not None:
+                for loser in pending:
+                    loser.cancel()
+                return provider, result
+            # 失败时立即尝试下一个提供商
+            if remaining:
+                launch_next()
+    return None, None
+
+
+async def _timed_call_async(provider, call, validate):
+    started = time.monotonic()
+    try:
+        result = validate(await call(provider))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"{provider} 调用失败: {str(e)}")
+        result = None
+    provider_health(provider).record(time.monotonic() - started, result is not None)
+    return result
+
+
+async def hedged_call_async(call, validate, chain=None, delay=None):
+    """
+    hedged_call的异步版本，落后的请求会被真正取消
+
+    参数:
+        call (callable): 协程函数 call(provider)，返回响应文本
+        validate (callable): validate(response) 返回解析后的结果，无效时返回None
+        chain (list, optional): 提供商列表，默认使用AI_PROVIDER_CHAIN
+        delay (float, optional): 对冲延迟（秒），默认使用AI_HEDGE_DELAY
+
+    返回:
+        tuple: (胜出的提供商, 结果)，全部失败时返回 (None, None)
+    """
+    delay = AI_HEDGE_DELAY if delay is None else delay
+    remaining = deque(provider_order(chain))
+    pending = {}
+
+    def launch_next():
+        provider = remaining.popleft()
+        pending[asyncio.ensure_future(_timed_call_async(provider, call, validate))] = provider
+
+    launch_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(list(pending), timeout=delay if remaining else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"{', '.join(pending.values())} 超过 {delay}s 未返回，对冲请求 {remaining[0]}")
+                launch_next()
+                continue
+            for task in done:
+                provider = pending.pop(task)
+                result = task.result()
+                if result is not None:
+                    return provider, result
+                if remaining:
+                    launch_next()
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .notification_formatter import format_digest
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 合并窗口（秒），为0时不合并
+NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', 30))
+# 合并维度：token 表示同一聊天内按代币合并，chat 表示同一聊天内的所有通知合并
+NOTIFY_COALESCE_BY = os.getenv('NOTIFY_COALESCE_BY', 'token').lower()
+# 单条汇总消息最多包含的通知数，达到后立即发送
+NOTIFY_DIGEST_MAX = int(os.getenv('NOTIFY_DIGEST_MAX', 20))
+# 不参与合并、立即发送的影响等级
+URGENT_IMPACT_LEVELS = ['Extremely Bullish', 'Extremely Bearish']
+# 持久化窗口的检查间隔（秒）
+NOTIFY_FLUSH_POLL = float(os.getenv('NOTIFY_FLUSH_POLL', 1))
+# 窗口被领取后多久未完成视为发送中断，可被重新领取
+NOTIFY_FLUSH_LEASE = int(os.getenv('NOTIFY_FLUSH_LEASE', 60))
+
+# 汇总消息只需要的字段，持久化时不保存推文正文等其他字段
+DIGEST_FIELDS = ('tweet_id', 'token_symbol', 'twitter_username')
+DIGEST_ANALYSIS_FIELDS = ('impact_level', 'event_type', 'expected_volatility')
+
+
+def digest_item(tweet_data):
+    """提取生成汇总消息需要的字段"""
+    analysis = tweet_data.get('analysis') or {}
+    item = {field: tweet_data.get(field) for field in DIGEST_FIELDS}
+    item['analysis'] = {field: analysis.get(field) for field in DIGEST_ANALYSIS_FIELDS if analysis.get(field)}
+    return item
+
+
+class NotificationCoalescer:
+    """
+    在短时间窗口内合并同一代币（或同一聊天）的通知
+
+    窗口内只有一条通知时按原消息发送，多条时发送一条汇总消息；
+    重大利好/利空不等待窗口，立即发送。
+
+    配置MongoDB集合后，窗口中的通知在提交时即写入集合，由后台线程在窗口到期后发送，
+    进程重启或回收不会丢失尚未发送的通知；未配置或数据库不可用时使用进程内定时器。
+    """
+
+    def __init__(self, send, window=NOTIFY_COALESCE_WINDOW, by=NOTIFY_COALESCE_BY, max_items=NOTIFY_DIGEST_MAX):
+        """
+        初始化合并器
+
+        参数:
+            send (callable): send(chat_id, message, buttons) 发送一条消息，chat_id为None时使用默认聊天
+            window (float): 合并窗口（秒）
+            by (str): 合并维度，token 或 chat
+            max_items (int): 单条汇总消息最多包含的通知数
+        """
+        self.send = send
+        self.window = window
+        self.by = by
+        self.max_items = max(2, max_items)
+        self._collection_getter = None
+        self._pending = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'immediate': 0, 'coalesced': 0, 'digests': 0}
+
+    def configure(self, collection_getter):
+        """
+        启用MongoDB存储
+
+        参数:
+            collection_getter (callable): 返回窗口集合的函数，每次访问时调用以保证fork安全
+        """
+        self._collection_getter = collection_getter
+
+    def _collection(self):
+        if not self._collection_getter:
+            return None
+        try:
+            return self._collection_getter()
+        except Exception as e:
+            logger.warning(f"获取通知合并集合失败: {str(e)}")
+            return None
+
+    def start(self):
+        """启动持久化窗口的发送线程；应用启动时调用，fork出的子进程中再次调用时会重新创建线程"""
+        if not self._collection_getter:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="notification-coalescer", daemon=True)
+            self._thread.start()
+            logger.info("通知合并发送线程已启动")
+
+    def _key(self, tweet_data, chat_id):
+        if self.by == 'chat':
+            return (chat_id, None)
+        return (chat_id, (tweet_data.get('token_symbol') or '').upper())
+
+    def submit(self, tweet_data, message, chat_id=None, buttons=None):
+        """
+        提交一条已格式化的通知
+
+        参数:
+            tweet_data (dict): 推文及分析结果，用于生成汇总消息
+            message (str): 单独发送时使用的消息
+            chat_id (str, optional): 目标聊天
+            buttons (list, optional): 单独发送时附带的内联按钮，汇总消息不带按钮
+
+        返回:
+            bool: 是否已立即发送（False表示进入合并窗口）
+        """
+        impact_level = (tweet_data.get('analysis') or {}).get('impact_level')
+        if self.window <= 0 or impact_level in URGENT_IMPACT_LEVELS:
+            self._count('immediate')
+            self.send(chat_id, message, buttons)
+            return True
+
+        key = self._key(tweet_data, chat_id)
+        item = (digest_item(tweet_data), message, buttons)
+        collection = self._collection()
+        if collection is not None:
+            try:
+                self._submit_persistent(collection, key, item)
+                return False
+            except Exception as e:
+                logger.warning(f"写入通知合并窗口失败，改用进程内定时器: {str(e)}")
+        self._submit_memory(key, item)
+        return False
+
+    def _submit_persistent(self, collection, key, item):
+        """追加到该键当前打开的窗口，没有时创建新窗口"""
+        self.start()
+        chat_id, token = key
+        now = datetime.utcnow()
+        tweet_data, message, buttons = item
+        update = {
+            '$push': {'items': {'tweet_data': tweet_data, 'message': message, 'buttons': buttons}},
+            '$inc': {'count': 1},
+            '$setOnInsert': {'created_at': now, 'flush_at': now + timedelta(seconds=self.window)}
+        }
+        query = {'chat_id': chat_id, 'token': token, 'status': 'open'}
+        try:
+            window = collection.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            # 并发创建同一个窗口时唯一索引拒绝其中一个，此时窗口已存在，重试即为普通的追加
+            window = collection.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+        self._count('coalesced')
+        if window['count'] >= self.max_items:
+            # 窗口已满，立即领取并发送，之后的通知进入新窗口
+            claimed = self._claim(collection, {'_id': window['_id'], 'status': 'open'})
+            if claimed is not None:
+                self._emit_persistent(collection, claimed)
+
+    def _claim(self, collection, query):
+        now = datetime.utcnow()
+        return collection.find_one_and_update(
+            query,
+            {'$set': {'status': 'flushing', 'flush_at': now + timedelta(seconds=NOTIFY_FLUSH_LEASE)}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _emit_persistent(self, collection, window):
+        items = [(item['tweet_data'], item['message'], item.get('buttons')) for item in window.get('items', [])]
+        # 发送失败时保留窗口，租约过期后重新领取
+        if not items or self._emit((window.get('chat_id'), window.get('token')), items):
+            collection.delete_one({'_id': window['_id']})
+
+    def _run(self):
+        while True:
+            try:
+                self._flush_persistent()
+            except Exception as e:
+                logger.error(f"发送持久化的合并通知时出错: {str(e)}")
+            time.sleep(NOTIFY_FLUSH_POLL)
+
+    def _flush_persistent(self, force=False):
+        """领取并发送到期的窗口，发送中断（租约过期）的窗口会被重新领取"""
+        collection = self._collection()
+        if collection is None:
+            return
+        if force:
+            query = {'status': 'open'}
+        else:
+            query = {'status': {'$in': ['open', 'flushing']}, 'flush_at': {'$lte': datetime.utcnow()}}
+        while True:
+            window = self._claim(collection, query)
+            if window is None:
+                return
+            self._emit_persistent(collection, window)
+
+    def _submit_memory(self, key, item):
+        full = None
+        with self._lock:
+            items = self._pending.get(key)
+            if items is None:
+                items = self._pending[key] = []
+                timer = self._timers[key] = threading.Timer(self.window, self.flush, args=(key,))
+                timer.daemon = True
+                timer.start()
+            items.append(item)
+            self._stats['coalesced'] += 1
+            if len(items) >= self.max_items:
+                full = self._pending.pop(key)
+                self._timers.pop(key).cancel()
+        if full:
+            self._emit(key, full)
+
+    def flush(self, key=None):
+        """发送窗口内积累的通知，key为None时发送全部（包括持久化的窗口）"""
+        with self._lock:
+            if key is None:
+                batches = list(self._pending.items())
+                self._pending.clear()
+            else:
+                items = self._pending.pop(key, None)
+                batches = [(key, items)] if items else []
+            for batch_key, _ in batches:
+                timer = self._timers.pop(batch_key, None)
+                if timer is not None:
+                    timer.cancel()
+        for batch_key, items in batches:
+            self._emit(batch_key, items)
+        if key is None:
+            try:
+                self._flush_persistent(force=True)
+            except Exception as e:
+                logger.error(f"发送持久化的合并通知时出错: {str(e)}")
+
+    def _emit(self, key, items):
+        """发送一个窗口的通知，返回是否成功交给send"""
+        chat_id = key[0]
+        try:
+            if len(items) == 1:
+                _, message, buttons = items[0]
+                self.send(chat_id, message, buttons)
+                return True
+            self._count('digests')
+            self.send(chat_id, format_digest([item[0] for item in items], self.window), None)
+            logger.info(f"已合并发送 {len(items)} 条通知")
+            return True
+        except Exception as e:
+            logger.error(f"发送合并通知时出错: {str(e)}")
+            return False
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = sum(len(items) for items in self._pending.values())
+        collection = self._collection()
+        if collection is not None:
+            try:
+                stats['pending_windows'] = collection.count_documents({'status': 'open'})
+            except Exception as e:
+                logger.warning(f"统计通知合并窗口失败: {str(e)}")
+        stats.update(window=self.window, by=self.by, persistent=self._collection_getter is not None)
+        return stats
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 内存中记住的最近推文ID数量
+DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', 100000))
+
+
+class SeenTweetCache:
+    """
+    已处理推文ID的LRU缓存
+
+    只作为快速前置判断，数据库中tweets.tweet_id的唯一索引才是最终依据：
+    缓存未命中时仍可能是重复推文（例如其他worker进程处理过），由插入时的
+    DuplicateKeyError兜底。
+    """
+
+    def __init__(self, maxsize=DEDUP_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tweet_id):
+        """
+        查询推文ID是否已处理过
+
+        参数:
+            tweet_id (str): Twitter推文ID
+
+        返回:
+            str: 首次处理时保存的数据库ID，未见过时返回None
+        """
+        if not tweet_id:
+            return None
+        with self._lock:
+            document_id = self._items.get(tweet_id)
+            if document_id is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(tweet_id)
+            self.hits += 1
+            return document_id
+
+    def add(self, tweet_id, document_id):
+        """记录已处理的推文ID及其数据库ID"""
+        if not tweet_id:
+            return
+        with self._lock:
+            self._items[tweet_id] = str(document_id)
+            self._items.move_to_end(tweet_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "capacity": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import csv
+import glob
+import gzip
+import json
+import logging
+from datetime import datetime
+
+from .json_stream import json_default
+
+# 可选依赖：Parquet输出需要pyarrow，zstd压缩需要zstandard
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每批从游标读取并写出的文档数
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+# Parquet每个分片文件的最大行数，分片写完才会记录断点
+EXPORT_PARQUET_PART_ROWS = int(os.getenv('EXPORT_PARQUET_PART_ROWS', 100000))
+
+EXPORT_FORMATS = ['ndjson', 'csv', 'parquet']
+EXPORT_COMPRESSIONS = ['none', 'gzip', 'zstd']
+
+# CSV和Parquet的列，分析结果展开为独立的列
+EXPORT_COLUMNS = [
+    '_id', 'tweet_id', 'project_id', 'project_name', 'twitter_username', 'token_symbol', 'text',
+    'created_at', 'analysis_status', 'analyzed_at', 'impact_level', 'event_type',
+    'expected_volatility', 'key_factors', 'historical_reference'
+]
+
+_EXTENSIONS = {'ndjson': '.ndjson', 'csv': '.csv', 'parquet': ''}
+_COMPRESSED_EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def default_output_path(prefix, fmt, compression='none'):
+    """生成带时间戳的输出路径，Parquet输出为目录"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = _EXTENSIONS[fmt] + ('' if fmt == 'parquet' else _COMPRESSED_EXTENSIONS[compression])
+    return f"{prefix}_{timestamp}{suffix}"
+
+
+def flatten_tweet(document):
+    """将推文文档展开为CSV/Parquet的一行"""
+    analysis = document.get('analysis') or {}
+    row = {}
+    for column in EXPORT_COLUMNS:
+        value = analysis.get(column) if column in ('impact_level', 'event_type', 'expected_volatility',
+                                                   'key_factors', 'historical_reference') else document.get(column)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        elif value is not None and not isinstance(value, (str, int, float, bool)):
+            value = json_default(value)
+        row[column] = value
+    return row
+
+
+def _compress(data, compression):
+    """每批数据压缩为独立的gzip成员/zstd帧，拼接后仍是合法的压缩文件，断点处可以安全截断"""
+    if compression == 'gzip':
+        return gzip.compress(data)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+class _StreamWriter:
+    """NDJSON/CSV写出器：逐批追加到单个文件，断点记录为已写入的字节数"""
+
+    def __init__(self, path, fmt, compression, offset):
+        self.fmt = fmt
+        self.compression = compression
+        mode = 'r+b' if offset and os.path.exists(path) else 'wb'
+        self._file = open(path, mode)
+        # 丢弃上次中断时写了一半的批次
+        self._file.seek(offset)
+        self._file.truncate()
+        self.offset = offset
+
+    def write_batch(self, documents):
+        buffer = io.StringIO()
+        if self.fmt == 'ndjson':
+            for document in documents:
+                buffer.write(json.dumps(document, default=json_default, ensure_ascii=False))
+                buffer.write('\n')
+        else:
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+            if self.offset == 0:
+                writer.writeheader()
+            writer.writerows(flatten_tweet(document) for document in documents)
+        self._file.write(_compress(buffer.getvalue().encode('utf-8'), self.compression))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.offset = self._file.tell()
+        # 每批都是完整的记录，可以作为断点
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Parquet写出器：输出为目录，每个分片写满EXPORT_PARQUET_PART_ROWS行后关闭并记录断点"""
+
+    def __init__(self, path, compression, parts, part_rows=EXPORT_PARQUET_PART_ROWS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        # pyarrow默认使用snappy，None表示不压缩
+        self.codec = None if compression == 'none' else compression
+        self.parts = parts
+        self.part_rows = part_rows
+        self._schema = pyarrow.schema([(column, pyarrow.string()) for column in EXPORT_COLUMNS])
+        self._writer = None
+        self._rows = 0
+
+    def _part_path(self):
+        return os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+
+    def clear(self):
+        """删除目录中已有的分片，重新开始导出时调用，避免旧分片与新分片混在一起"""
+        for part_path in glob.glob(os.path.join(self.path, "part-*.parquet")):
+            os.remove(part_path)
+
+    def write_batch(self, documents):
+        if self._writer is None:
+            # 覆盖上次中断时未写完的分片
+            self._writer = pyarrow.parquet.ParquetWriter(self._part_path(), self._schema, compression=self.codec)
+            self._rows = 0
+        rows = [flatten_tweet(document) for document in documents]
+        columns = {column: [None if row[column] is None else str(row[column]) for row in rows] for column in EXPORT_COLUMNS}
+        self._writer.write_table(pyarrow.table(columns, schema=self._schema))
+        self._rows += len(rows)
+        if self._rows < self.part_rows:
+            return False
+        self._close_part()
+        return True
+
+    def _close_part(self):
+        self._writer.close()
+        self._writer = None
+        self.parts += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._close_part()
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_state(state_path, state):
+    # 先写临时文件再替换，避免中断时留下损坏的断点文件
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def export_documents(open_cursor, output, fmt='ndjson', compression='none', batch_size=None,
+                     resume=True, fingerprint=None, enrich=None):
+    """
+    将游标中的文档流式导出到文件，内存占用只与批次大小有关
+
+    断点保存在 output + '.state'，记录最后一条已落盘文档的_id；
+    再次运行时从该_id之后继续，已完成的导出再次运行会追加此后新增的文档。
+
+    参数:
+        open_cursor (callable): open_cursor(after_id, batch_size) 返回按_id升序的文档迭代器
+        output (str): 输出文件路径（Parquet为目录）
+        fmt (str): ndjson、csv或parquet
+        compression (str): none、gzip或zstd
+        batch_size (int, optional): 每批文档数，默认使用EXPORT_BATCH_SIZE
+        resume (bool): 是否从断点继续，False时覆盖已有输出
+        fingerprint (dict, optional): 导出条件，断点条件不一致时拒绝继续
+        enrich (callable, optional): enrich(batch) 在写出前补充字段，例如项目名称
+
+    返回:
+        dict: 本次导出的条数和最终断点
+
+    异常:
+        ValueError: 参数无效、缺少可选依赖或断点与导出条件不一致
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+    if fmt == 'parquet' and pyarrow is None:
+        raise ValueError("导出Parquet需要安装pyarrow: pip install pyarrow")
+    if fmt != 'parquet' and compression == 'zstd' and zstandard is None:
+        raise ValueError("zstd压缩需要安装zstandard: pip install zstandard")
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+
+    state_path = output.rstrip(os.sep) + '.state'
+    settings = {'format': fmt, 'compression': compression, 'fingerprint': fingerprint or {}}
+    state = _load_state(state_path) if resume else None
+    if state and {key: state.get(key) for key in settings} != settings:
+        raise ValueError(f"断点文件 {state_path} 的导出条件与本次不同，请使用相同参数或重新开始导出")
+    fresh = not state
+    if fresh:
+        state = dict(settings, last_id=None, exported=0, offset=0, parts=0)
+        # 不从断点继续时旧的断点作废，中断后只能从新的断点继续
+        if os.path.exists(state_path):
+            os.remove(state_path)
+    else:
+        logger.info(f"从断点继续导出，已导出 {state['exported']} 条，最后的_id: {state['last_id']}")
+
+    if fmt == 'parquet':
+        writer = _ParquetWriter(output, compression, state['parts'])
+        if fresh:
+            writer.clear()
+    else:
+        # 从头导出时以wb模式打开，已有文件被截断
+        writer = _StreamWriter(output, fmt, compression, state['offset'])
+
+    exported = 0
+    pending = 0
+    batch = []
+    last_id = None
+
+    def flush():
+        nonlocal batch, pending
+        if enrich:
+            enrich(batch)
+        checkpoint = writer.write_batch(batch)
+        pending += len(batch)
+        batch = []
+        if checkpoint:
+            commit()
+
+    def commit():
+        nonlocal pending
+        state.update(
+            last_id=str(last_id),
+            exported=state['exported'] + pending,
+            offset=getattr(writer, 'offset', 0),
+            parts=getattr(writer, 'parts', 0),
+            updated_at=datetime.utcnow().isoformat()
+        )
+        _save_state(state_path, state)
+        pending = 0
+
+    try:
+        after_id = state['last_id']
+        for document in open_cursor(after_id, batch_size):
+            batch.append(document)
+            last_id = document['_id']
+            exported += 1
+            if len(batch) >= batch_size:
+                flush()
+                if exported % (batch_size * 10) == 0:
+                    logger.info(f"已导出 {exported} 条")
+        if batch:
+            flush()
+        writer.close()
+        if pending:
+            commit()
+    except BaseException:
+        # 已落盘的部分保留在断点中，下次从断点继续
+        logger.error(f"导出中断，已保存断点: {state_path}")
+        raise
+
+    return {'exported': exported, 'total': state['exported'], 'last_id': state['last_id'], 'state_file': state_path}
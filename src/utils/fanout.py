@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+from .notification_formatter import notification_buttons
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 影响等级的强度，订阅的最低影响等级按强度比较，不区分利好和利空
+IMPACT_SEVERITY = {
+    "Non-Significant": 0,
+    "Bullish": 1,
+    "Bearish": 1,
+    "Extremely Bullish": 2,
+    "Extremely Bearish": 2
+}
+
+# 影响等级的方向，订阅可以只接收利好或只接收利空
+IMPACT_DIRECTION = {
+    "Bullish": "bullish",
+    "Extremely Bullish": "bullish",
+    "Bearish": "bearish",
+    "Extremely Bearish": "bearish"
+}
+# 订阅可选的方向，both表示利好和利空都接收
+SUBSCRIPTION_DIRECTIONS = ("both", "bullish", "bearish")
+
+# 订阅未指定最低影响等级和方向时的默认值
+DEFAULT_MIN_IMPACT_LEVEL = "Bullish"
+DEFAULT_DIRECTION = "both"
+
+# 项目没有配置订阅时发送到TELEGRAM_CHAT_ID（chat_id为None）
+DEFAULT_SUBSCRIPTIONS = [{
+    "chat_id": None, "min_impact_level": DEFAULT_MIN_IMPACT_LEVEL, "direction": DEFAULT_DIRECTION, "buttons": False
+}]
+
+
+def normalize_subscription(data):
+    """
+    校验并规范化一条订阅
+
+    参数:
+        data (dict): 包含chat_id、min_impact_level（可选）、direction（可选）和buttons（可选）
+
+    返回:
+        dict: 规范化后的订阅
+
+    异常:
+        ValueError: 缺少chat_id，或影响等级、方向无效
+    """
+    if not isinstance(data, dict) or data.get("chat_id") in (None, ""):
+        raise ValueError("订阅缺少chat_id")
+    min_impact_level = data.get("min_impact_level") or DEFAULT_MIN_IMPACT_LEVEL
+    if min_impact_level not in IMPACT_SEVERITY:
+        raise ValueError(f"无效的影响等级: {min_impact_level}")
+    direction = (data.get("direction") or DEFAULT_DIRECTION).lower()
+    if direction not in SUBSCRIPTION_DIRECTIONS:
+        raise ValueError(f"无效的方向: {direction}，可选值: {', '.join(SUBSCRIPTION_DIRECTIONS)}")
+    return {
+        "chat_id": str(data["chat_id"]),
+        "min_impact_level": min_impact_level,
+        "direction": direction,
+        "buttons": bool(data.get("buttons", False))
+    }
+
+
+def matching_subscriptions(subscriptions, impact_level):
+    """
+    筛选影响等级达到订阅阈值且方向一致的订阅，同一聊天只保留一条（任一订阅开启按钮即带按钮）
+
+    参数:
+        subscriptions (list): 订阅列表
+        impact_level (str): 推文的影响等级
+
+    返回:
+        list: 需要发送的订阅
+    """
+    severity = IMPACT_SEVERITY.get(impact_level, 0)
+    if severity == 0:
+        return []
+    direction = IMPACT_DIRECTION.get(impact_level)
+    matched = {}
+    for subscription in subscriptions or []:
+        threshold = IMPACT_SEVERITY.get(subscription.get("min_impact_level") or DEFAULT_MIN_IMPACT_LEVEL, 1)
+        if severity < max(threshold, 1):
+            continue
+        if (subscription.get("direction") or DEFAULT_DIRECTION) not in (DEFAULT_DIRECTION, direction):
+            continue
+        chat_id = subscription.get("chat_id")
+        if chat_id in matched:
+            matched[chat_id]["buttons"] = matched[chat_id]["buttons"] or bool(subscription.get("buttons"))
+        else:
+            matched[chat_id] = {"chat_id": chat_id, "buttons": bool(subscription.get("buttons"))}
+    return list(matched.values())
+
+
+def fan_out(tweet_data, subscriptions, formatter, send):
+    """
+    将一条通知发送给所有匹配的订阅
+
+    消息正文和按钮各只生成一次，再分发到每个聊天；实际发送由Telegram投递线程池并发完成。
+
+    参数:
+        tweet_data (dict): 推文及分析结果
+        subscriptions (list): 项目的订阅列表
+        formatter (callable): formatter(tweet_data) 生成消息正文
+        send (callable): send(chat_id, message, buttons) 发送或入队一条消息
+
+    返回:
+        int: 发送的聊天数
+    """
+    impact_level = (tweet_data.get("analysis") or {}).get("impact_level", "Non-Significant")
+    matched = matching_subscriptions(subscriptions, impact_level)
+    if not matched:
+        return 0
+
+    message = formatter(tweet_data)
+    buttons = notification_buttons(tweet_data) if any(item["buttons"] for item in matched) else None
+    for item in matched:
+        try:
+            send(item["chat_id"], message, buttons if item["buttons"] else None)
+        except Exception as e:
+            logger.error(f"向聊天 {item['chat_id']} 发送通知时出错: {str(e)}")
+    return len(matched)
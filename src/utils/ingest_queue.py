@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import uuid
+import queue
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from pymongo import ReturnDocument
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 推文处理队列配置
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 4))
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', 1000))
+# 未完成分析的推文多久（秒）没有进展后重新入队，以及检查间隔和每轮最多重新入队的数量
+INGEST_RETRY_AFTER = float(os.getenv('INGEST_RETRY_AFTER', 300))
+INGEST_RETRY_INTERVAL = float(os.getenv('INGEST_RETRY_INTERVAL', 60))
+INGEST_RETRY_BATCH = int(os.getenv('INGEST_RETRY_BATCH', 100))
+# 单条推文最多重新入队的次数，超过后保持failed等待人工处理
+INGEST_RETRY_MAX_ATTEMPTS = int(os.getenv('INGEST_RETRY_MAX_ATTEMPTS', 5))
+# 工作线程开始处理推文时领取的租约时长（秒），应大于单条推文的最长处理时间
+INGEST_LEASE_SECONDS = float(os.getenv('INGEST_LEASE_SECONDS', 600))
+# 需要重新入队的分析状态：pending（入队的进程已退出）、failed（处理出错）、rejected（队列已满）
+# 和processing（处理中的进程退出，租约已过期）
+RETRY_STATUSES = ['pending', 'failed', 'rejected', 'processing']
+# 领取和完成时清除的租约字段
+LEASE_FIELDS = {'lease_id': '', 'lease_owner': '', 'lease_until': ''}
+
+
+def worker_id():
+    """当前进程的标识（主机名:pid），记录在入队和领取的推文上，fork出的子进程各不相同"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_tweet(collection, document_id, lease_seconds=INGEST_LEASE_SECONDS):
+    """
+    工作线程开始处理推文前领取租约，pending变为processing
+
+    同一条推文可能因重新入队同时出现在多个进程的队列中，只有领取成功的线程会分析和发送通知。
+
+    参数:
+        collection (Collection): 推文集合
+        document_id (ObjectId): 推文的数据库ID
+        lease_seconds (float): 租约时长（秒），过期后由重试线程重新入队
+
+    返回:
+        str: 租约ID，推文已被其他线程领取或已完成时返回None
+    """
+    now = datetime.utcnow()
+    lease_id = uuid.uuid4().hex
+    result = collection.update_one(
+        {'_id': document_id, 'analysis_status': 'pending'},
+        {'$set': {
+            'analysis_status': 'processing',
+            'lease_id': lease_id,
+            'lease_owner': worker_id(),
+            'lease_until': now + timedelta(seconds=lease_seconds),
+            'status_changed_at': now
+        }}
+    )
+    return lease_id if result.modified_count else None
+
+
+class StageStats:
+    """单个处理阶段的耗时统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds, error=False):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+            "last_ms": round(self.last * 1000, 2)
+        }
+
+
+class IngestQueue:
+    """有界的推文处理队列，由固定数量的后台工作线程消费"""
+
+    def __init__(self, handler, workers=INGEST_WORKERS, maxsize=INGEST_QUEUE_SIZE, name="ingest", on_error=None):
+        """
+        初始化处理队列
+
+        参数:
+            handler (callable): 处理单个任务的函数，签名为 handler(job)
+            on_error (callable, optional): handler抛出异常时调用，签名为 on_error(job, error)
+            workers (int): 工作线程数量
+            maxsize (int): 队列最大长度，超过后拒绝入队
+            name (str): 队列名称，用于线程命名和日志
+        """
+        self.handler = handler
+        self.on_error = on_error
+        self.workers = max(1, workers)
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def start(self):
+        """启动工作线程（在gunicorn fork出的子进程中首次入队时自动调用）"""
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            # fork之后父进程的线程不会被继承，需要在子进程中重新创建
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._threads = []
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"推文处理队列已启动，工作线程数: {self.workers}, 队列上限: {self._queue.maxsize}")
+
+    def submit(self, job):
+        """
+        提交任务到队列
+
+        参数:
+            job: 任务对象，原样传给handler
+
+        返回:
+            bool: 入队是否成功，队列已满时返回False
+        """
+        self.start()
+        try:
+            self._queue.put_nowait((time.monotonic(), job))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            logger.warning(f"推文处理队列已满({self._queue.maxsize})，拒绝新任务")
+            return False
+
+    @contextmanager
+    def timed(self, stage):
+        """记录某个处理阶段的耗时，用法: with ingest_queue.timed('analysis'): ..."""
+        started = time.monotonic()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(stage, time.monotonic() - started, error)
+
+    def record(self, stage, seconds, error=False):
+        with self._stats_lock:
+            self._stats.setdefault(stage, StageStats()).record(seconds, error)
+
+    def stats(self):
+        """返回队列深度和各阶段耗时统计"""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "in_flight": self._in_flight,
+                "workers": self.workers,
+                "rejected": self._rejected,
+                "stages": {stage: stats.to_dict() for stage, stats in self._stats.items()}
+            }
+
+    def _run(self):
+        while True:
+            enqueued_at, job = self._queue.get()
+            with self._stats_lock:
+                self._in_flight += 1
+            self.record('queue_wait', time.monotonic() - enqueued_at)
+            try:
+                with self.timed('total'):
+                    self.handler(job)
+            except Exception as e:
+                logger.error(f"处理队列任务时出错: {str(e)}")
+                self._handle_error(job, e)
+            finally:
+                with self._stats_lock:
+                    self._in_flight -= 1
+                self._queue.task_done()
+
+    def _handle_error(self, job, error):
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(job, error)
+        except Exception as e:
+            logger.error(f"记录队列任务失败状态时出错: {str(e)}")
+
+
+class RetrySweeper:
+    """
+    定期把长时间未完成分析的推文重新放入处理队列
+
+    覆盖四种情况：入队的进程已退出、仍在其内存队列中的任务（pending）、处理出错的任务（failed）、
+    队列已满时被拒绝的任务（rejected）和处理中进程退出、租约已过期的任务（processing）。
+    推文通过原子的find_one_and_update领取，多个工作进程同时检查时同一条推文只会被其中一个重新入队。
+
+    每个进程的重试线程定期写入心跳；pending推文记录了入队的进程（queued_by），
+    该进程仍有心跳时推文还在其队列中等待，无论等待多久都不会被重新入队。
+    """
+
+    def __init__(self, ingest_queue, retry_after=INGEST_RETRY_AFTER, interval=INGEST_RETRY_INTERVAL,
+                 batch_size=INGEST_RETRY_BATCH, max_attempts=INGEST_RETRY_MAX_ATTEMPTS):
+        """
+        初始化重试线程
+
+        参数:
+            ingest_queue (IngestQueue): 推文处理队列
+            retry_after (float): 状态多久（秒）未变化后重新入队
+            interval (float): 检查间隔（秒）
+            batch_size (int): 每轮最多重新入队的推文数
+            max_attempts (int): 单条推文最多重新入队的次数
+        """
+        self.ingest_queue = ingest_queue
+        self.retry_after = retry_after
+        self.interval = max(1.0, interval)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._collection_getter = None
+        self._workers_getter = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._requeued = 0
+
+    def configure(self, collection_getter, workers_getter=None):
+        """
+        设置推文集合和进程心跳集合
+
+        参数:
+            collection_getter (callable): 返回推文集合的函数，每次访问时调用以保证fork安全
+            workers_getter (callable, optional): 返回心跳集合的函数；未设置时只认为当前进程存活
+        """
+        self._collection_getter = collection_getter
+        self._workers_getter = workers_getter
+
+    def start(self):
+        """启动重试线程；应用启动时调用，启动后立即检查一轮，fork出的子进程中再次调用时会重新创建线程"""
+        if not self._collection_getter:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="ingest-retry", daemon=True)
+            self._thread.start()
+            logger.info(f"推文重试线程已启动，{self.retry_after:g} 秒未完成的推文将重新入队")
+
+    def _run(self):
+        while True:
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"写入推文处理进程心跳时出错: {str(e)}")
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"重新入队未完成的推文时出错: {str(e)}")
+            time.sleep(self.interval)
+
+    def heartbeat(self):
+        """记录当前进程存活，其队列中的pending推文不会被其他进程重新入队"""
+        if self._workers_getter is None:
+            return
+        self._workers_getter().update_one(
+            {'_id': worker_id()}, {'$set': {'heartbeat_at': datetime.utcnow()}}, upsert=True
+        )
+
+    def _live_workers(self, now):
+        """最近仍有心跳的进程，心跳间隔为检查间隔"""
+        if self._workers_getter is None:
+            return [worker_id()]
+        since = now - timedelta(seconds=max(self.retry_after, self.interval * 3))
+        return [worker['_id'] for worker in self._workers_getter().find({'heartbeat_at': {'$gte': since}}, {'_id': 1})]
+
+    def sweep(self):
+        """
+        领取并重新入队一批未完成的推文
+
+        返回:
+            int: 重新入队的推文数
+        """
+        collection = self._collection_getter()
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.retry_after)
+        waiting = {'$or': [
+            {'analysis_status': {'$in': ['failed', 'rejected']}},
+            {'analysis_status': 'pending', 'queued_by': {'$nin': self._live_workers(now)}}
+        ]}
+        # 旧文档没有status_changed_at时按创建时间判断
+        stale = {'$or': [
+            {'status_changed_at': {'$lt': cutoff}},
+            {'status_changed_at': {'$exists': False}, 'created_at': {'$lt': cutoff}}
+        ]}
+        query = {
+            'analysis_attempts': {'$not': {'$gte': self.max_attempts}},
+            '$or': [
+                {'$and': [waiting, stale]},
+                {'analysis_status': 'processing', 'lease_until': {'$lt': now}}
+            ]
+        }
+        requeued = 0
+        while requeued < self.batch_size:
+            tweet = collection.find_one_and_update(
+                query,
+                {
+                    '$set': {'analysis_status': 'pending', 'status_changed_at': now, 'queued_by': worker_id()},
+                    '$unset': LEASE_FIELDS,
+                    '$inc': {'analysis_attempts': 1}
+                },
+                projection={'search': 0},
+                sort=[('status_changed_at', 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if tweet is None:
+                break
+            if not self.ingest_queue.submit(tweet):
+                # 队列已满，退回rejected并不计入重试次数，下一轮再试
+                collection.update_one(
+                    {'_id': tweet['_id']},
+                    {'$set': {'analysis_status': 'rejected'}, '$inc': {'analysis_attempts': -1}}
+                )
+                break
+            requeued += 1
+        if requeued:
+            with self._lock:
+                self._requeued += requeued
+            logger.info(f"已重新入队 {requeued} 条未完成分析的推文")
+        return requeued
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requeued': self._requeued,
+                'retry_after': self.retry_after,
+                'max_attempts': self.max_attempts,
+                'running': self._pid == os.getpid() and self._thread is not None
+            }
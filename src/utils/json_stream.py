@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+from datetime import datetime, date
+from bson import ObjectId
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每次向客户端输出的文档条数
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+
+def json_default(value):
+    """序列化MongoDB文档中JSON不支持的类型"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+def stream_json_array(documents, key, batch_size=STREAM_BATCH_SIZE, extra=None, tail=None):
+    """
+    以生成器的方式逐批输出 {"status": "success", key: [...]} 格式的JSON
+
+    文档从游标中逐条读取并序列化，每攒满batch_size条输出一次，
+    worker内存占用与结果集大小无关。
+
+    参数:
+        documents (iterable): 文档迭代器，通常是MongoDB游标
+        key (str): 数组字段名
+        batch_size (int): 每次输出的文档条数
+        extra (dict, optional): 追加在数组之前的其他字段
+        tail (callable, optional): tail(最后一个文档, 条数) 返回追加在数组之后的字段，如下一页游标
+
+    返回:
+        generator: 逐段产生JSON字符串
+    """
+    head = {"status": "success"}
+    head.update(extra or {})
+    yield json.dumps(head, default=json_default, ensure_ascii=False)[:-1] + f', "{key}": ['
+
+    count = 0
+    buffer = []
+    error = None
+    last = None
+    try:
+        for document in documents:
+            last = document
+            buffer.append(json.dumps(document, default=json_default, ensure_ascii=False))
+            if len(buffer) >= batch_size:
+                yield ("," if count else "") + ",".join(buffer)
+                count += len(buffer)
+                buffer = []
+        if buffer:
+            yield ("," if count else "") + ",".join(buffer)
+            count += len(buffer)
+    except Exception as e:
+        # 响应头已经发出，只能在JSON末尾附上错误信息
+        logger.error(f"流式输出JSON时出错: {str(e)}")
+        error = str(e)
+    finally:
+        close = getattr(documents, "close", None)
+        if close:
+            close()
+
+    logger.debug(f"流式输出完成，共 {count} 条")
+    if error:
+        yield "], " + json.dumps({"error": error}, ensure_ascii=False)[1:]
+    elif tail:
+        yield "], " + json.dumps(tail(last, count), default=json_default, ensure_ascii=False)[1:]
+    else:
+        yield "]}"
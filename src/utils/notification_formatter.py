@@ -78,6 +78,94 @@ def format_notification(tweet_data):
         # 返回简单的错误消息
         return f"⚠️ {tweet_data.get('token_symbol', '未知代币')} 有新推文，但格式化通知失败。"
 
+def format_early_notification(tweet_data):
+    """
+    格式化提前预警消息，只包含流式分析中最先得到的事件类型和影响等级
+    
+    参数:
+        tweet_data (dict): 包含推文和部分分析结果的字典
+    
+    返回:
+        str: 格式化后的Telegram富文本消息
+    """
+    try:
+        token_symbol = tweet_data.get('token_symbol', '未知代币')
+        twitter_username = tweet_data.get('twitter_username', '未知账号')
+        text = tweet_data.get('text', '无推文内容')
+        analysis = tweet_data.get('analysis', {})
+        
+        event_type = analysis.get('event_type', '未知事件')
+        impact_level = analysis.get('impact_level', 'Non-Significant')
+        
+        formatted_message = f"""
+⚡ <b>{token_symbol} 快速预警</b>
+
+<b>Twitter账号:</b> @{twitter_username}
+<b>事件类型:</b> {event_type}
+<b>影响等级:</b> {IMPACT_LEVEL_COLORS.get(impact_level, impact_level)}
+
+<b>推文内容:</b>
+<i>{text[:200]}{'...' if len(text) > 200 else ''}</i>
+
+<i>完整分析生成后将随后发送</i>"""
+        
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        formatted_message += f"\n\n<i>预警时间: {now} UTC</i>"
+        
+        tweet_id = tweet_data.get('tweet_id')
+        if tweet_id:
+            formatted_message += f"\n\n<a href='https://twitter.com/{twitter_username}/status/{tweet_id}'>查看原文</a>"
+        
+        return formatted_message
+        
+    except Exception as e:
+        logger.error(f"格式化提前预警消息时出错: {str(e)}")
+        return f"⚠️ {tweet_data.get('token_symbol', '未知代币')} 有新推文，但格式化通知失败。"
+
+def format_digest(items, window=None):
+    """
+    将一段时间内的多条通知合并为一条汇总消息
+    
+    参数:
+        items (list): 推文数据字典列表，每项包含analysis
+        window (float, optional): 合并窗口（秒），显示在标题中
+    
+    返回:
+        str: 格式化后的Telegram富文本消息
+    """
+    try:
+        tokens = sorted({item.get('token_symbol', '未知代币') for item in items})
+        title = tokens[0] if len(tokens) == 1 else '多个代币'
+        period = f"，{window:g}秒内" if window else ''
+        
+        formatted_message = f"📊 <b>{title} 市场预警汇总</b> ({len(items)}条{period})\n"
+        
+        for i, item in enumerate(items, 1):
+            analysis = item.get('analysis', {})
+            impact_level = analysis.get('impact_level', 'Non-Significant')
+            twitter_username = item.get('twitter_username', '未知账号')
+            line = (f"\n{i}. {IMPACT_LEVEL_COLORS.get(impact_level, impact_level)} "
+                    f"<b>{item.get('token_symbol', '未知代币')}</b> @{twitter_username}: "
+                    f"{analysis.get('event_type', '未知事件')}")
+            if analysis.get('expected_volatility'):
+                line += f" ({analysis['expected_volatility']})"
+            tweet_id = item.get('tweet_id')
+            if tweet_id:
+                line += f" <a href='https://twitter.com/{twitter_username}/status/{tweet_id}'>原文</a>"
+            # Telegram单条消息最多4096个字符
+            if len(formatted_message) + len(line) > 3900:
+                formatted_message += f"\n…其余 {len(items) - i + 1} 条省略"
+                break
+            formatted_message += line
+        
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        formatted_message += f"\n\n<i>汇总时间: {now} UTC</i>"
+        return formatted_message
+        
+    except Exception as e:
+        logger.error(f"格式化汇总消息时出错: {str(e)}")
+        return f"⚠️ 有 {len(items)} 条新预警，但格式化汇总消息失败。"
+
 def format_notification_with_buttons(tweet_data, trading_pairs=None):
     """
     格式化推文分析结果为带交易按钮的Telegram富文本消息
@@ -90,7 +178,19 @@ def format_notification_with_buttons(tweet_data, trading_pairs=None):
         tuple: (formatted_message, buttons)，格式化后的消息和按钮列表
     """
     formatted_message = format_notification(tweet_data)
+    return formatted_message, notification_buttons(tweet_data, trading_pairs)
+
+def notification_buttons(tweet_data, trading_pairs=None):
+    """
+    生成通知的内联按钮：查看原文和交易对链接
     
+    参数:
+        tweet_data (dict): 包含推文和分析结果的字典
+        trading_pairs (list): 交易对列表，格式为[{"text": "交易对名称", "url": "交易链接"}]
+    
+    返回:
+        list: 按钮列表
+    """
     # 创建按钮
     buttons = []
     
@@ -120,4 +220,4 @@ def format_notification_with_buttons(tweet_data, trading_pairs=None):
     elif trading_pairs:
         buttons.extend(trading_pairs)
     
-    return formatted_message, buttons 
\ No newline at end of file
+    return buttons 
\ No newline at end of file
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import logging
+import threading
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 预过滤配置
+PREFILTER_ENABLED = os.getenv('PREFILTER_ENABLED', 'True').lower() == 'true'
+# 得分不高于该值的推文直接判为无显著影响
+PREFILTER_SKIP_THRESHOLD = float(os.getenv('PREFILTER_SKIP_THRESHOLD', -2))
+# 去掉链接和@之后少于该字数的推文视为短推文
+PREFILTER_SHORT_LENGTH = int(os.getenv('PREFILTER_SHORT_LENGTH', 40))
+
+# 重大事件关键词：出现任何一个都必须交给AI分析
+SIGNIFICANT_TERMS = [
+    # 中文
+    '上线', '上币', '主网', '合作', '战略', '融资', '投资', '收购', '空投', '销毁', '回购', '解锁',
+    '监管', '批准', '诉讼', '起诉', '黑客', '攻击', '漏洞', '被盗', '暂停', '下架', '破产', '清算',
+    '升级', '硬分叉', '质押', '路线图', '发布', 'etf',
+    # 英文
+    'list', 'lists', 'listing', 'listed', 'mainnet', 'testnet', 'launch', 'partnership', 'partner', 'integration',
+    'acquisition', 'acquire', 'funding', 'raise', 'raised', 'investment', 'airdrop', 'burn', 'buyback',
+    'unlock', 'vesting', 'tokenomics', 'regulat*', 'sec', 'lawsuit', 'approval', 'approved', 'exploit',
+    'hack', 'hacked', 'vulnerability', 'breach', 'stolen', 'drained', 'paused', 'halt', 'delist',
+    'bankrupt*', 'insolven*', 'upgrade', 'hard fork', 'fork', 'staking', 'roadmap', 'announce',
+    'binance', 'coinbase', 'okx', 'etf', 'treasury', 'migration', 'snapshot', 'governance', 'proposal',
+]
+
+# 日常互动用语：只包含这些内容的推文基本不会影响币价
+TRIVIAL_TERMS = [
+    # 中文
+    '早安', '晚安', '早上好', '周末愉快', '节日快乐', '感谢', '谢谢', '社区', '表情包', '抽奖', '提醒',
+    # 英文
+    'gm', 'gn', 'gmgm', 'good morning', 'good night', 'happy friday', 'happy weekend', 'happy holidays',
+    'wagmi', 'lfg', 'ser', 'fren', 'frens', 'vibes', 'meme', 'memes', 'fan art', 'community art',
+    'thank you', 'thanks', 'shoutout', 'shout out', 'reminder', 'don\'t forget', 'join us', 'tune in',
+    'ama', 'spaces', 'twitter space', 'x space', 'live now', 'starting soon', 'giveaway', 'contest',
+    'caption this', 'who\'s ready', 'stay tuned', 'what\'s your favorite', 'tag a friend', 'merch',
+]
+
+URL_PATTERN = re.compile(r'https?://\S+')
+MENTION_PATTERN = re.compile(r'@\w+')
+HASHTAG_PATTERN = re.compile(r'#\w+')
+NUMBER_PATTERN = re.compile(r'\$?\d[\d,.]*\s*(%|[kmb]\b|million|billion|万|亿)', re.IGNORECASE)
+
+
+def _compile_terms(terms):
+    # 英文词按单词边界匹配，避免"gm"命中"algorithm"；以*结尾的词按前缀匹配；中文直接子串匹配
+    parts = []
+    for term in terms:
+        if term.isascii():
+            prefix = term.endswith('*')
+            parts.append(r'(?<![a-z0-9])' + re.escape(term.rstrip('*')) + ('' if prefix else r'(?![a-z0-9])'))
+        else:
+            parts.append(re.escape(term))
+    return re.compile('|'.join(parts), re.IGNORECASE)
+
+
+SIGNIFICANT_PATTERN = _compile_terms(SIGNIFICANT_TERMS)
+TRIVIAL_PATTERN = _compile_terms(TRIVIAL_TERMS)
+
+# 运行期间的预过滤统计
+_stats = {'checked': 0, 'skipped': 0}
+_stats_lock = threading.Lock()
+
+
+def score_tweet(tweet_text):
+    """
+    计算推文的"重要性"得分，越低越可能是无关紧要的日常推文
+
+    参数:
+        tweet_text (str): 推文内容
+
+    返回:
+        tuple: (得分, 判断依据列表)
+    """
+    text = tweet_text or ''
+    reasons = []
+    score = 0.0
+
+    significant = {match.group(0).lower().strip() for match in SIGNIFICANT_PATTERN.finditer(text)}
+    if significant:
+        score += 3 * len(significant)
+        reasons.append(f"重大事件关键词: {', '.join(sorted(significant))}")
+
+    trivial = {match.group(0).lower() for match in TRIVIAL_PATTERN.finditer(text)}
+    if trivial:
+        score -= 1.5 * len(trivial)
+        reasons.append(f"日常用语: {', '.join(sorted(trivial))}")
+
+    if NUMBER_PATTERN.search(text):
+        score += 2
+        reasons.append("包含金额或百分比")
+
+    # 去掉链接、@和话题后剩余的正文长度
+    stripped = HASHTAG_PATTERN.sub('', MENTION_PATTERN.sub('', URL_PATTERN.sub('', text)))
+    content_length = len(stripped.strip())
+    if content_length < PREFILTER_SHORT_LENGTH:
+        score -= 1
+        reasons.append(f"正文很短({content_length}字)")
+    if not stripped.strip():
+        score -= 1
+        reasons.append("只有链接或@")
+
+    if text.lstrip().lower().startswith('rt @'):
+        score -= 1
+        reasons.append("转推")
+
+    mentions = len(MENTION_PATTERN.findall(text))
+    if mentions >= 3:
+        score -= 1
+        reasons.append(f"@了{mentions}个账号")
+
+    return score, reasons
+
+
+def prefilter_tweet(tweet_text, threshold=None):
+    """
+    本地预分类，只对明显无关紧要的推文直接给出结论
+
+    参数:
+        tweet_text (str): 推文内容
+        threshold (float, optional): 跳过AI的得分阈值，默认使用PREFILTER_SKIP_THRESHOLD
+
+    返回:
+        dict: 可直接使用的分析结果；需要交给AI判断时返回None
+    """
+    threshold = PREFILTER_SKIP_THRESHOLD if threshold is None else threshold
+    score, reasons = score_tweet(tweet_text)
+    # 包含重大事件关键词的推文无论得分多少都交给AI
+    skipped = score <= threshold and not SIGNIFICANT_PATTERN.search(tweet_text or '')
+    with _stats_lock:
+        _stats['checked'] += 1
+        if skipped:
+            _stats['skipped'] += 1
+    if not skipped:
+        return None
+    return {
+        "event_type": "日常互动（本地预过滤）",
+        "impact_level": "Non-Significant",
+        "expected_volatility": "±0-1%",
+        "key_factors": reasons[:3] or ["未包含任何重大事件关键词"],
+        "historical_reference": "日常互动类推文通常不会引起明显的价格波动",
+        "source": "prefilter",
+        "prefilter_score": score
+    }
+
+
+def get_prefilter_stats():
+    """返回预过滤的检查数和跳过AI的比例"""
+    with _stats_lock:
+        checked, skipped = _stats['checked'], _stats['skipped']
+    return {
+        'enabled': PREFILTER_ENABLED,
+        'threshold': PREFILTER_SKIP_THRESHOLD,
+        'checked': checked,
+        'skipped': skipped,
+        'skip_rate': round(skipped / checked, 4) if checked else 0.0
+    }
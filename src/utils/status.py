@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 各探测结果的缓存时间（秒），到期后由后台线程刷新，/api/status只读取缓存
+STATUS_MONGO_TTL = float(os.getenv('STATUS_MONGO_TTL', 15))
+STATUS_TELEGRAM_TTL = float(os.getenv('STATUS_TELEGRAM_TTL', 300))
+STATUS_COUNTS_TTL = float(os.getenv('STATUS_COUNTS_TTL', 60))
+# 进程启动后首次查询状态时，最多等待首轮探测完成的秒数
+STATUS_INITIAL_WAIT = float(os.getenv('STATUS_INITIAL_WAIT', 3))
+
+# 进程启动时间，用于计算运行时间
+PROCESS_STARTED_AT = time.time()
+
+
+def uptime_seconds():
+    """当前进程已运行的秒数"""
+    return time.time() - PROCESS_STARTED_AT
+
+
+def format_uptime(seconds):
+    """将秒数格式化为 1天 2小时 3分钟"""
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    parts = []
+    if days:
+        parts.append(f"{days}天")
+    if days or hours:
+        parts.append(f"{hours}小时")
+    parts.append(f"{minutes}分钟")
+    return " ".join(parts)
+
+
+class CachedProbe:
+    """按TTL在后台刷新的单项探测，读取时只返回缓存的结果"""
+
+    def __init__(self, name, probe, ttl, default=None):
+        """
+        初始化探测
+
+        参数:
+            name (str): 探测名称
+            probe (callable): 无参数的探测函数，返回探测结果
+            ttl (float): 刷新间隔（秒）
+            default: 探测出错时的结果；为None时保留上一次成功的结果
+        """
+        self.name = name
+        self.probe = probe
+        self.ttl = max(1.0, ttl)
+        self.default = default
+        self.value = default
+        self.error = None
+        self.checked_at = None
+        self.duration_ms = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """执行一次探测并更新缓存"""
+        started = time.monotonic()
+        try:
+            value, error = self.probe(), None
+        except Exception as e:
+            value, error = self.value if self.default is None else self.default, str(e)
+            logger.error(f"状态探测 {self.name} 出错: {str(e)}")
+        with self._lock:
+            self.value = value
+            self.error = error
+            self.checked_at = datetime.utcnow()
+            self.duration_ms = round((time.monotonic() - started) * 1000, 1)
+        self.ready.set()
+
+    def run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.ttl)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'value': self.value,
+                'error': self.error,
+                'checked_at': self.checked_at.isoformat() if self.checked_at else None,
+                'duration_ms': self.duration_ms,
+                'ttl': self.ttl
+            }
+
+
+class StatusMonitor:
+    """
+    一组在后台线程中定期刷新的健康探测
+
+    每个探测使用独立的线程，较慢的探测（如Telegram getMe）不会拖慢其他探测；
+    无论有多少个仪表盘在轮询，数据库和Telegram接口只按TTL被访问。
+    """
+
+    def __init__(self, probes):
+        """
+        初始化监控
+
+        参数:
+            probes (list): CachedProbe列表
+        """
+        self.probes = {probe.name: probe for probe in probes}
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动探测线程（在gunicorn fork出的子进程中首次查询时自动调用）"""
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._threads = []
+            self._pid = os.getpid()
+            for probe in self.probes.values():
+                thread = threading.Thread(target=probe.run, name=f"status-{probe.name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"状态探测线程已启动: {', '.join(self.probes)}")
+
+    def snapshot(self, wait=STATUS_INITIAL_WAIT):
+        """
+        获取所有探测的缓存结果
+
+        参数:
+            wait (float): 尚未完成首轮探测时最多等待的秒数，之后返回已有的结果
+
+        返回:
+            dict: 探测名称到 {"value", "error", "checked_at", "duration_ms", "ttl"} 的映射
+        """
+        self.start()
+        deadline = time.monotonic() + wait
+        for probe in self.probes.values():
+            probe.ready.wait(max(0, deadline - time.monotonic()))
+        return {name: probe.snapshot() for name, probe in self.probes.items()}
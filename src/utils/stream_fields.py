@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class StreamingFieldParser:
+    """
+    增量解析流式输出的JSON对象，顶层的字符串字段一旦完整输出就立即返回
+
+    只跟踪最外层对象的字符串值，嵌套的对象和数组会被跳过；
+    JSON之前的说明文字或代码块标记不影响解析。
+    """
+
+    def __init__(self, fields):
+        self.fields = set(fields)
+        self.values = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._chars = []
+        self._expect_key = True
+        self._key = None
+
+    def feed(self, chunk):
+        """
+        输入新的文本片段
+
+        参数:
+            chunk (str): 流式响应中的一段文本
+
+        返回:
+            dict: 本次新完成的目标字段，没有时为空字典
+        """
+        found = {}
+        for char in chunk or '':
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(found)
+                    continue
+                self._chars.append(char)
+            elif char == '"':
+                self._in_string = True
+                self._chars = []
+            elif char in '{[':
+                self._depth += 1
+                if char == '{' and self._depth == 1:
+                    self._expect_key = True
+            elif char in '}]':
+                self._depth = max(0, self._depth - 1)
+            elif self._depth == 1:
+                if char == ':':
+                    self._expect_key = False
+                elif char == ',':
+                    self._expect_key = True
+                    self._key = None
+        return found
+
+    def _end_string(self, found):
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads('"' + ''.join(self._chars) + '"')
+        except ValueError:
+            value = ''.join(self._chars)
+        if self._expect_key:
+            self._key = value
+        elif self._key in self.fields and self._key not in self.values:
+            self.values[self._key] = value
+            found[self._key] = value
@@ -2,8 +2,18 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+import heapq
+import random
 import logging
+import uuid
+import itertools
+import threading
 import requests
+from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 import json
 
@@ -18,6 +28,565 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 
+# 连接配置
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 5))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 15))
+
+# 限流配置，默认值与Telegram的限制一致：全局每秒30条，单个私聊每秒1条，群组每分钟20条
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GROUP_RATE = float(os.getenv('TELEGRAM_GROUP_RATE', 20)) / 60
+
+# 发件箱投递配置
+TELEGRAM_DELIVERY_WORKERS = int(os.getenv('TELEGRAM_DELIVERY_WORKERS', 4))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', 8))
+TELEGRAM_BACKOFF_BASE = float(os.getenv('TELEGRAM_BACKOFF_BASE', 2))
+TELEGRAM_BACKOFF_MAX = float(os.getenv('TELEGRAM_BACKOFF_MAX', 300))
+# 消息被领取后多久未完成视为投递中断，可被重新领取
+TELEGRAM_OUTBOX_LEASE = int(os.getenv('TELEGRAM_OUTBOX_LEASE', 60))
+# 没有新消息时轮询发件箱的间隔（秒）
+TELEGRAM_OUTBOX_POLL = float(os.getenv('TELEGRAM_OUTBOX_POLL', 1))
+
+# 发件箱消息的状态
+OUTBOX_STATUSES = ['pending', 'sending', 'sent', 'failed']
+
+# 每个进程共享一个keep-alive会话
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """获取共享的Telegram HTTP会话，fork出的子进程会重新创建"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            # 重试由发件箱统一处理，连接池只负责复用连接
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(TELEGRAM_DELIVERY_WORKERS, 1) * 2)
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session_pid = os.getpid()
+    return _session
+
+def telegram_timeout():
+    """Telegram请求的 (连接超时, 读取超时)"""
+    return (TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT)
+
+class TokenBucket:
+    """进程内令牌桶，跨进程计数不可用时使用"""
+    
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self):
+        """有令牌时取走并返回0，否则返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+    
+    def release(self):
+        """归还一个未使用的令牌"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+class TelegramRateLimiter:
+    """进程内的全局和单个聊天两级限流"""
+    
+    def __init__(self):
+        self._global = TokenBucket(TELEGRAM_GLOBAL_RATE, capacity=TELEGRAM_GLOBAL_RATE)
+        self._chats = {}
+        self._lock = threading.Lock()
+    
+    def _chat_bucket(self, chat_id):
+        chat_id = str(chat_id)
+        with self._lock:
+            bucket = self._chats.get(chat_id)
+            if bucket is None:
+                # 群组和频道的chat_id为负数
+                rate = TELEGRAM_GROUP_RATE if chat_id.startswith('-') else TELEGRAM_CHAT_RATE
+                bucket = self._chats[chat_id] = TokenBucket(rate)
+            return bucket
+    
+    def acquire(self, chat_id):
+        """同时取得聊天和全局令牌时返回0，否则不占用令牌并返回需要等待的秒数"""
+        chat_bucket = self._chat_bucket(chat_id)
+        delay = chat_bucket.try_acquire()
+        if delay > 0:
+            return delay
+        delay = self._global.try_acquire()
+        if delay > 0:
+            chat_bucket.release()
+        return delay
+
+def rate_window(rate):
+    """将每秒速率转换为固定时间窗：(时间窗秒数, 时间窗内上限)"""
+    if rate >= 1:
+        return 1, int(rate)
+    return max(1, round(1 / rate)), 1
+
+class SharedRateLimiter:
+    """
+    跨进程限流：在MongoDB中按固定时间窗原子计数
+    
+    所有gunicorn工作进程共用同一组计数器，全局和单个聊天的速率限制在整个部署内生效，
+    而不是每个进程各有一份额度；计数集合未配置或不可用时退化为进程内令牌桶。
+    """
+    
+    def __init__(self):
+        self._collection_getter = None
+        self._local = TelegramRateLimiter()
+    
+    def configure(self, collection_getter):
+        """
+        启用跨进程计数
+        
+        参数:
+            collection_getter (callable): 返回计数集合的函数，每次访问时调用以保证fork安全
+        """
+        self._collection_getter = collection_getter
+    
+    def _collection(self):
+        if not self._collection_getter:
+            return None
+        try:
+            return self._collection_getter()
+        except Exception as e:
+            logger.warning(f"获取Telegram限流计数集合失败: {str(e)}")
+            return None
+    
+    @staticmethod
+    def limits(chat_id):
+        """返回chat_id适用的 [(计数键, 时间窗秒数, 时间窗内上限)]，单个聊天在前、全局在后"""
+        chat_id = str(chat_id)
+        if chat_id.startswith('-'):
+            # 群组按分钟计数，与Telegram的限制方式一致
+            chat_limit = (60, max(1, round(TELEGRAM_GROUP_RATE * 60)))
+        else:
+            chat_limit = rate_window(TELEGRAM_CHAT_RATE)
+        return [(f"chat:{chat_id}",) + chat_limit, ("global",) + rate_window(TELEGRAM_GLOBAL_RATE)]
+    
+    def _take(self, collection, key, window, limit):
+        """在当前时间窗内计数加一，超过上限时撤销并返回距下一个时间窗的秒数"""
+        now = time.time()
+        slot = int(now // window)
+        counter_id = f"{key}:{window}:{slot}"
+        update = {
+            '$inc': {'count': 1},
+            '$setOnInsert': {'expires_at': datetime.utcnow() + timedelta(seconds=window + 60)}
+        }
+        try:
+            counter = collection.find_one_and_update(
+                {'_id': counter_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # 并发创建同一个计数器时其中一个upsert会失败，此时计数器已存在，重试即为普通的$inc
+            counter = collection.find_one_and_update(
+                {'_id': counter_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        if counter['count'] <= limit:
+            return counter_id, 0.0
+        collection.update_one({'_id': counter_id}, {'$inc': {'count': -1}})
+        return None, (slot + 1) * window - now
+    
+    def acquire(self, chat_id):
+        """
+        取得向chat_id发送一条消息的额度，不阻塞
+        
+        返回:
+            float: 0表示已取得额度，否则为建议的等待秒数（此时不占用任何额度）
+        """
+        collection = self._collection()
+        if collection is None:
+            return self._local.acquire(chat_id)
+        taken = []
+        try:
+            for key, window, limit in self.limits(chat_id):
+                counter_id, delay = self._take(collection, key, window, limit)
+                if delay > 0:
+                    # 全局额度不足时归还已取得的聊天额度
+                    for taken_id in taken:
+                        collection.update_one({'_id': taken_id}, {'$inc': {'count': -1}})
+                    return delay
+                taken.append(counter_id)
+            return 0.0
+        except Exception as e:
+            logger.warning(f"跨进程限流计数失败，改用进程内限流: {str(e)}")
+            return self._local.acquire(chat_id)
+    
+    def wait(self, chat_id):
+        """阻塞到取得向chat_id发送的额度，返回等待的总秒数（用于同步发送）"""
+        waited = 0.0
+        while True:
+            delay = self.acquire(chat_id)
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+rate_limiter = SharedRateLimiter()
+
+def build_reply_markup(buttons):
+    """将按钮列表转换为内联键盘，每行最多2个按钮"""
+    inline_keyboard = []
+    row = []
+    for i, button in enumerate(buttons):
+        row.append({
+            "text": button["text"],
+            "url": button["url"]
+        })
+        if (i + 1) % 2 == 0 or i == len(buttons) - 1:
+            inline_keyboard.append(row)
+            row = []
+    return json.dumps({"inline_keyboard": inline_keyboard})
+
+def post_message(chat_id, text, parse_mode="HTML", reply_markup=None):
+    """
+    调用一次sendMessage，不做限流，调用者需先取得rate_limiter的额度
+    
+    参数:
+        chat_id (str): 目标聊天
+        text (str): 消息内容
+        parse_mode (str): 解析模式
+        reply_markup (str, optional): JSON格式的内联键盘
+    
+    返回:
+        tuple: (状态, 重试等待秒数, 错误信息)，状态为 sent、retry 或 failed
+    """
+    data = {
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": parse_mode,
+        "disable_web_page_preview": False
+    }
+    if reply_markup:
+        data["reply_markup"] = reply_markup
+    
+    try:
+        response = get_session().post(f"{TELEGRAM_API_URL}/sendMessage", data=data, timeout=telegram_timeout())
+    except requests.RequestException as e:
+        return 'retry', None, f"网络错误: {str(e)}"
+    
+    try:
+        response_json = response.json()
+    except ValueError:
+        response_json = {'description': response.text[:200]}
+    
+    if response.status_code == 200 and response_json.get('ok'):
+        return 'sent', None, None
+    error = f"{response.status_code}: {response_json.get('description', response_json)}"
+    if response.status_code == 429:
+        # 被限流时按Telegram给出的retry_after等待
+        retry_after = (response_json.get('parameters') or {}).get('retry_after')
+        return 'retry', float(retry_after) if retry_after else None, error
+    if response.status_code >= 500:
+        return 'retry', None, error
+    # 4xx（消息格式错误、机器人被移出群组等）重试也不会成功
+    return 'failed', None, error
+
+def deliver_message(chat_id, text, parse_mode="HTML", reply_markup=None):
+    """等待限流额度后调用一次sendMessage，返回值同post_message"""
+    rate_limiter.wait(chat_id)
+    return post_message(chat_id, text, parse_mode, reply_markup)
+
+def backoff_delay(attempts, retry_after=None):
+    """第attempts次失败后的重试等待秒数，优先使用Telegram给出的retry_after"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+    delay = min(TELEGRAM_BACKOFF_MAX, TELEGRAM_BACKOFF_BASE ** attempts)
+    return delay * random.uniform(0.5, 1)
+
+class TelegramOutbox:
+    """
+    持久化的通知发件箱
+    
+    配置MongoDB集合后，消息写入集合并由工作线程领取（带租约），进程重启后未投递的消息会继续发送；
+    未配置或数据库不可用时退化为进程内队列。
+    """
+    
+    def __init__(self):
+        self._collection_getter = None
+        self._memory = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def configure(self, collection_getter):
+        """
+        启用MongoDB存储
+        
+        参数:
+            collection_getter (callable): 返回发件箱集合的函数，每次访问时调用以保证fork安全
+        """
+        self._collection_getter = collection_getter
+    
+    def _collection(self):
+        if not self._collection_getter:
+            return None
+        try:
+            return self._collection_getter()
+        except Exception as e:
+            logger.warning(f"获取Telegram发件箱集合失败: {str(e)}")
+            return None
+    
+    def put(self, message):
+        """保存待发送的消息"""
+        now = datetime.utcnow()
+        message = dict(message, status='pending', attempts=0, created_at=now, next_attempt_at=now)
+        collection = self._collection()
+        if collection is not None:
+            try:
+                collection.insert_one(message)
+                return
+            except Exception as e:
+                logger.warning(f"写入Telegram发件箱失败，改用进程内队列: {str(e)}")
+                message.pop('_id', None)
+        with self._lock:
+            heapq.heappush(self._memory, (time.time(), next(self._sequence), message))
+    
+    def claim(self):
+        """领取一条到期的消息，没有时返回None"""
+        collection = self._collection()
+        if collection is not None:
+            now = datetime.utcnow()
+            try:
+                # 投递中的消息租约到期后视为中断，可以重新领取
+                # 每次领取生成新的租约ID，租约被其他进程重新领取后，原持有者的更新不再生效
+                message = collection.find_one_and_update(
+                    {'status': {'$in': ['pending', 'sending']}, 'next_attempt_at': {'$lte': now}},
+                    {'$set': {
+                        'status': 'sending',
+                        'lease_id': uuid.uuid4().hex,
+                        'next_attempt_at': now + timedelta(seconds=TELEGRAM_OUTBOX_LEASE)
+                    }},
+                    sort=[('next_attempt_at', 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if message is not None:
+                    return message
+            except Exception as e:
+                logger.warning(f"领取Telegram发件箱消息失败: {str(e)}")
+        with self._lock:
+            if self._memory and self._memory[0][0] <= time.time():
+                return heapq.heappop(self._memory)[2]
+        return None
+    
+    def complete(self, message):
+        self._update(message, {'status': 'sent', 'sent_at': datetime.utcnow()})
+    
+    def defer(self, message, delay):
+        """限流时释放租约并放回发件箱，不计入尝试次数"""
+        if '_id' not in message:
+            with self._lock:
+                heapq.heappush(self._memory, (time.time() + delay, next(self._sequence), message))
+            return
+        self._update(message, {
+            'status': 'pending',
+            'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)
+        })
+    
+    def retry(self, message, delay, error):
+        """安排重试，超过最大次数后标记为失败"""
+        attempts = message.get('attempts', 0) + 1
+        if attempts >= TELEGRAM_MAX_ATTEMPTS:
+            self.fail(message, error, attempts)
+            return
+        if '_id' not in message:
+            message.update(attempts=attempts, last_error=error)
+            with self._lock:
+                heapq.heappush(self._memory, (time.time() + delay, next(self._sequence), message))
+            return
+        self._update(message, {
+            'status': 'pending',
+            'attempts': attempts,
+            'last_error': error,
+            'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)
+        })
+    
+    def fail(self, message, error, attempts=None):
+        logger.error(f"Telegram通知投递失败，已放弃: {error}")
+        self._update(message, {
+            'status': 'failed',
+            'attempts': attempts if attempts is not None else message.get('attempts', 0) + 1,
+            'last_error': error
+        })
+    
+    def _update(self, message, fields):
+        if '_id' not in message:
+            return
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            # 只有仍持有租约时才更新，避免覆盖已被其他进程重新领取的消息
+            result = collection.update_one(
+                {'_id': message['_id'], 'lease_id': message.get('lease_id')},
+                {'$set': fields}
+            )
+            if result.matched_count == 0:
+                logger.warning(f"Telegram发件箱消息的租约已失效，忽略更新: {message['_id']}")
+        except Exception as e:
+            logger.warning(f"更新Telegram发件箱消息失败: {str(e)}")
+    
+    def stats(self):
+        counts = {}
+        collection = self._collection()
+        if collection is not None:
+            try:
+                # 每个状态单独计数，由status_next_attempt_at索引的前缀完成，不扫描文档
+                for status in OUTBOX_STATUSES:
+                    counts[status] = collection.count_documents({'status': status})
+            except Exception as e:
+                logger.warning(f"统计Telegram发件箱失败: {str(e)}")
+        with self._lock:
+            memory = len(self._memory)
+        return {'persistent': self._collection_getter is not None, 'memory_pending': memory, 'by_status': counts}
+
+outbox = TelegramOutbox()
+
+class TelegramDelivery:
+    """从发件箱领取消息并发送的后台工作线程"""
+    
+    def __init__(self, workers=TELEGRAM_DELIVERY_WORKERS):
+        self.workers = max(1, workers)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+        self._stats_lock = threading.Lock()
+    
+    def start(self):
+        """启动工作线程；应用启动时调用，fork出的子进程中再次调用时会重新创建线程"""
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._threads = []
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"telegram-delivery-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"Telegram投递线程已启动，线程数: {self.workers}")
+    
+    def notify(self):
+        """有新消息入队时唤醒工作线程"""
+        self._wakeup.set()
+    
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['outbox'] = outbox.stats()
+        return stats
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+    
+    def _run(self):
+        while True:
+            try:
+                message = outbox.claim()
+            except Exception as e:
+                logger.error(f"领取Telegram消息时出错: {str(e)}")
+                message = None
+            if message is None:
+                self._wakeup.wait(TELEGRAM_OUTBOX_POLL)
+                self._wakeup.clear()
+                continue
+            self._deliver(message)
+    
+    def _deliver(self, message):
+        # 先取得限流额度再发送；额度不足时释放租约放回发件箱，不在持有租约时等待
+        try:
+            delay = rate_limiter.acquire(message['chat_id'])
+        except Exception as e:
+            logger.error(f"获取Telegram限流额度时出错: {str(e)}")
+            delay = TELEGRAM_OUTBOX_POLL
+        if delay > 0:
+            outbox.defer(message, delay)
+            self._count('deferred')
+            return
+        try:
+            status, retry_after, error = post_message(
+                message['chat_id'],
+                message['text'],
+                message.get('parse_mode', 'HTML'),
+                message.get('reply_markup')
+            )
+        except Exception as e:
+            status, retry_after, error = 'retry', None, str(e)
+        if status == 'sent':
+            outbox.complete(message)
+            self._count('sent')
+        elif status == 'retry':
+            delay = backoff_delay(message.get('attempts', 0), retry_after)
+            logger.warning(f"Telegram通知发送失败，{delay:.1f}s后重试: {error}")
+            outbox.retry(message, delay, error)
+            self._count('retried')
+        else:
+            outbox.fail(message, error)
+            self._count('failed')
+
+delivery = TelegramDelivery()
+
+def configure_outbox(collection_getter):
+    """启用Telegram发件箱的MongoDB存储，collection_getter返回发件箱集合"""
+    outbox.configure(collection_getter)
+
+def configure_rate_limits(collection_getter):
+    """启用跨进程的Telegram限流计数，collection_getter返回计数集合"""
+    rate_limiter.configure(collection_getter)
+
+def start_delivery():
+    """
+    启动发件箱投递线程
+    
+    应在应用启动时调用，这样进程重启后发件箱中未完成的消息（pending和租约过期的sending）
+    会立即继续发送，而不必等到有新消息入队。
+    """
+    delivery.start()
+
+def get_delivery_stats():
+    """返回Telegram投递的计数和发件箱状态"""
+    return delivery.stats()
+
+def enqueue_notification(message, parse_mode="HTML", buttons=None, chat_id=None):
+    """
+    将通知放入发件箱，由后台线程按限流发送并在失败时重试
+    
+    参数:
+        message (str): 要发送的消息内容，支持HTML或Markdown格式
+        parse_mode (str): 解析模式，"HTML"或"MarkdownV2"
+        buttons (list, optional): 按钮列表，格式为[{"text": "按钮文本", "url": "按钮链接"}]
+        chat_id (str, optional): 目标聊天，默认使用TELEGRAM_CHAT_ID
+    
+    返回:
+        bool: 是否已入队
+    """
+    chat_id = chat_id or TELEGRAM_CHAT_ID
+    if not TELEGRAM_BOT_TOKEN or not chat_id:
+        logger.error("Telegram配置不完整，无法发送通知")
+        return False
+    
+    outbox.put({
+        'chat_id': str(chat_id),
+        'text': message,
+        'parse_mode': parse_mode,
+        'reply_markup': build_reply_markup(buttons) if buttons else None
+    })
+    delivery.start()
+    delivery.notify()
+    return True
+
 def send_notification(message, parse_mode="HTML"):
     """
     发送Telegram通知
@@ -34,24 +603,15 @@ def send_notification(message, parse_mode="HTML"):
         return False
     
     try:
-        url = f"{TELEGRAM_API_URL}/sendMessage"
-        data = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": parse_mode,
-            "disable_web_page_preview": False
-        }
+        status, _, error = deliver_message(TELEGRAM_CHAT_ID, message, parse_mode)
         
-        response = requests.post(url, data=data)
-        response_json = response.json()
-        
-        if response.status_code == 200 and response_json.get('ok'):
+        if status == 'sent':
             logger.info("通知发送成功")
             return True
         else:
-            logger.error(f"通知发送失败: {response_json}")
+            logger.error(f"通知发送失败: {error}")
             return False
-            
+    
     except Exception as e:
         logger.error(f"发送Telegram通知时出错: {str(e)}")
         return False
@@ -76,44 +636,15 @@ def send_notification_with_buttons(message, buttons=None, parse_mode="HTML"):
         return send_notification(message, parse_mode)
     
     try:
-        url = f"{TELEGRAM_API_URL}/sendMessage"
-        
-        # 创建内联键盘标记
-        inline_keyboard = []
-        row = []
-        for i, button in enumerate(buttons):
-            row.append({
-                "text": button["text"],
-                "url": button["url"]
-            })
-            
-            # 每行最多放置2个按钮
-            if (i + 1) % 2 == 0 or i == len(buttons) - 1:
-                inline_keyboard.append(row)
-                row = []
+        status, _, error = deliver_message(TELEGRAM_CHAT_ID, message, parse_mode, build_reply_markup(buttons))
         
-        reply_markup = {
-            "inline_keyboard": inline_keyboard
-        }
-        
-        data = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": parse_mode,
-            "disable_web_page_preview": False,
-            "reply_markup": json.dumps(reply_markup)
-        }
-        
-        response = requests.post(url, data=data)
-        response_json = response.json()
-        
-        if response.status_code == 200 and response_json.get('ok'):
+        if status == 'sent':
             logger.info("带按钮的通知发送成功")
             return True
         else:
-            logger.error(f"带按钮的通知发送失败: {response_json}")
+            logger.error(f"带按钮的通知发送失败: {error}")
             return False
-            
+    
     except Exception as e:
         logger.error(f"发送带按钮的Telegram通知时出错: {str(e)}")
         return False
@@ -131,7 +662,7 @@ def test_telegram_connection():
     
     try:
         url = f"{TELEGRAM_API_URL}/getMe"
-        response = requests.get(url)
+        response = get_session().get(url, timeout=telegram_timeout())
         response_json = response.json()
         
         if response.status_code == 200 and response_json.get('ok'):
@@ -155,7 +686,7 @@ def send_error_notification(error_message):
         error_message (str): 错误消息
     
     返回:
-        bool: 发送是否成功
+        bool: 是否已入队
     """
     message = f"⚠️ <b>XMonitor系统错误</b>\n\n<pre>{error_message}</pre>"
-    return send_notification(message) 
\ No newline at end of file
+    return enqueue_notification(message)
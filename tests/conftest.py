@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+import mongomock
+import pytest
+
+# 与app.py相同，以src为根导入models和utils
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# 导入app前设置：不在后台创建索引，日志写到临时目录
+os.environ.setdefault('MONGO_AUTO_INDEX', 'False')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'xmonitor-tests', 'xmonitor.log'))
+
+
+@pytest.fixture
+def db():
+    """内存中的MongoDB数据库，每个测试独立"""
+    return mongomock.MongoClient().xmonitor
+
+
+@pytest.fixture
+def use_db(db, monkeypatch):
+    """让指定模块的get_db返回内存数据库，用法: use_db(sentiment)"""
+    def patch(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, 'get_db', lambda: db)
+        return db
+    return patch
+
+
+@pytest.fixture
+def app_module(db, use_db, monkeypatch):
+    """导入app，所有已导入模块的get_db指向内存数据库，进程内的缓存每个测试重新创建"""
+    import app
+    from models.project import ProjectRegistry
+    from utils.dedup import SeenTweetCache
+    use_db(*[module for name, module in list(sys.modules.items())
+             if (name == 'app' or name.startswith(('models.', 'utils.'))) and hasattr(module, 'get_db')])
+    monkeypatch.setattr(app, 'seen_tweets', SeenTweetCache())
+    monkeypatch.setattr(app, 'project_registry', ProjectRegistry())
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
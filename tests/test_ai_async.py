@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ai_async
+from utils.ai_analyzer import AnalysisCache
+from utils.ai_async import AsyncRateLimiter, analyze_tweets_concurrently
+
+RESULT = {'event_type': 'Launch', 'impact_level': 'Bullish', 'expected_volatility': '±5%',
+          'key_factors': [], 'historical_reference': 'none'}
+
+
+@pytest.fixture
+def deepseek(monkeypatch):
+    """替换Deepseek异步调用，记录请求数和最大并发数"""
+    fake = SimpleNamespace(calls=0, running=0, peak=0, closed=0, response=json.dumps(RESULT))
+
+    async def call(client, prompt):
+        fake.calls += 1
+        fake.running += 1
+        fake.peak = max(fake.peak, fake.running)
+        await asyncio.sleep(0.01)
+        fake.running -= 1
+        return fake.response
+
+    async def close(client):
+        fake.closed += 1
+
+    monkeypatch.setenv('AI_MAX_CONCURRENCY_DEEPSEEK', '2')
+    monkeypatch.setitem(ai_async.ASYNC_CALLERS, 'deepseek', call)
+    monkeypatch.setattr(ai_async, 'create_async_client', lambda provider: object())
+    monkeypatch.setattr(ai_async, 'close_async_client', close)
+    monkeypatch.setattr(ai_async, 'analysis_cache', AnalysisCache())
+    return fake
+
+
+def test_concurrency_is_bounded(deepseek):
+    items = [(f'token burn round {i}', 'XMN') for i in range(6)]
+    results = analyze_tweets_concurrently(items, provider='deepseek')
+    assert results == [RESULT] * 6
+    assert (deepseek.calls, deepseek.peak, deepseek.closed) == (6, 2, 1)
+
+
+def test_duplicates_and_cached_tweets_requested_once(deepseek):
+    items = [('mainnet launch', 'XMN'), ('Mainnet launch', 'XMN'), ('gm frens', 'XMN')]
+    results = analyze_tweets_concurrently(items, provider='deepseek')
+    assert results[0] == results[1] == RESULT
+    assert results[2]['source'] == 'prefilter'
+    analyze_tweets_concurrently(items[:1], provider='deepseek')
+    assert deepseek.calls == 1
+
+
+def test_invalid_response_and_unknown_provider_fall_back(deepseek):
+    deepseek.response = 'not json'
+    assert analyze_tweets_concurrently([('mainnet launch', 'XMN')], provider='deepseek')[0]['analysis_failed']
+    assert analyze_tweets_concurrently([('mainnet launch', 'XMN')], provider='unknown')[0]['analysis_failed']
+
+
+def test_rate_limiter_spaces_requests():
+    async def run():
+        limiter = AsyncRateLimiter(20, burst=1)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        return time.monotonic() - started
+    assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from utils import ai_clients
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    monkeypatch.setattr(ai_clients, '_clients', {})
+    monkeypatch.setattr(ai_clients, '_clients_pid', None)
+    return ai_clients
+
+
+def test_session_reused_with_pool_and_retries(clients):
+    session = clients.get_deepseek_session()
+    assert clients.get_client('deepseek') is session
+    adapter = session.get_adapter('https://api.deepseek.com/v1/chat/completions')
+    assert adapter._pool_maxsize == clients.AI_POOL_SIZE
+    assert adapter.max_retries.total == clients.AI_MAX_RETRIES
+    assert 'POST' in adapter.max_retries.allowed_methods
+
+
+def test_clients_recreated_after_fork(clients, monkeypatch):
+    session = clients.get_deepseek_session()
+    child_pid = os.getpid() + 1
+    monkeypatch.setattr(clients.os, 'getpid', lambda: child_pid)
+    assert clients.get_deepseek_session() is not session
+
+
+def test_unknown_provider(clients):
+    with pytest.raises(ValueError):
+        clients.get_client('chain')
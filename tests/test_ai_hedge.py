@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+from utils.ai_hedge import hedged_call, hedged_call_async, provider_health, provider_order
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def chain():
+    """每个测试使用新的提供商名称，互不影响健康统计"""
+    prefix = f'provider{next(_names)}'
+    return [f'{prefix}-a', f'{prefix}-b']
+
+
+def validate(response):
+    return response if response != 'invalid' else None
+
+
+def test_slow_provider_is_hedged(chain):
+    first, second = chain
+    release = threading.Event()
+
+    def call(provider):
+        if provider == first:
+            release.wait(5)
+            return 'slow'
+        return 'fast'
+
+    try:
+        assert hedged_call(call, validate, chain, delay=0.05) == (second, 'fast')
+    finally:
+        release.set()
+
+
+def test_failure_moves_on_without_waiting(chain):
+    first, second = chain
+    started = time.monotonic()
+
+    def call(provider):
+        if provider == first:
+            raise RuntimeError('boom')
+        return 'ok'
+
+    assert hedged_call(call, validate, chain, delay=10) == (second, 'ok')
+    assert time.monotonic() - started < 5
+    assert provider_health(first).snapshot()['error_rate'] == 1.0
+
+
+def test_all_invalid(chain):
+    assert hedged_call(lambda provider: 'invalid', validate, chain, delay=10) == (None, None)
+    # 失败的提供商排到后面
+    provider_health(chain[1]).record(0.1, True)
+    assert provider_order(chain) == [chain[1], chain[0]]
+
+
+def test_async_cancels_losing_request(chain):
+    first, second = chain
+    cancelled = []
+
+    async def call(provider):
+        if provider == first:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(provider)
+                raise
+            return 'slow'
+        return 'fast'
+
+    async def run():
+        result = await hedged_call_async(call, validate, chain, delay=0.05)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == (second, 'fast')
+    assert cancelled == [first]
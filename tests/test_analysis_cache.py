@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ai_analyzer
+from utils.ai_analyzer import AnalysisCache, analysis_cache_key, analyze_tweet
+
+RESULT = {'event_type': 'Launch', 'impact_level': 'Bullish', 'expected_volatility': '±5-10%',
+          'key_factors': ['mainnet'], 'historical_reference': 'v1'}
+
+
+@pytest.fixture
+def provider(db, monkeypatch):
+    """替换AI提供商和分析缓存，记录实际发出的请求"""
+    fake = SimpleNamespace(response=json.dumps(RESULT), calls=[])
+
+    def call(prompt, max_tokens=None):
+        fake.calls.append(prompt)
+        return fake.response
+    cache = AnalysisCache()
+    cache.configure(lambda: db.analysis_cache)
+    monkeypatch.setattr(ai_analyzer, 'analysis_cache', cache)
+    monkeypatch.setattr(ai_analyzer, 'AI_PROVIDER', 'openai')
+    monkeypatch.setitem(ai_analyzer.PROVIDER_CALLERS, 'openai', call)
+    return fake
+
+
+def test_cache_key_normalizes_text():
+    key = analysis_cache_key('Mainnet  LIVE https://t.co/abc', 'xmn')
+    assert key == analysis_cache_key('mainnet live', 'XMN')
+    assert key != analysis_cache_key('mainnet live', 'OTHER')
+    assert key != analysis_cache_key('mainnet live', 'XMN', provider='deepseek')
+    assert key != analysis_cache_key('mainnet live', 'XMN', prompt_version='batch-1')
+
+
+def test_repeated_tweet_uses_cache(provider):
+    assert analyze_tweet('Mainnet launch https://t.co/a', 'XMN') == RESULT
+    assert analyze_tweet('mainnet launch https://t.co/b', 'XMN') == RESULT
+    assert len(provider.calls) == 1
+    assert ai_analyzer.analysis_cache.stats()['memory_hits'] == 1
+
+
+def test_cached_result_is_a_copy(provider):
+    analyze_tweet('Mainnet launch', 'XMN')['key_factors'].append('changed')
+    assert analyze_tweet('Mainnet launch', 'XMN')['key_factors'] == ['mainnet']
+
+
+def test_store_shared_between_processes(db, provider):
+    analyze_tweet('Mainnet launch', 'XMN')
+    # 新的进程内缓存为空，从MongoDB读取
+    other = AnalysisCache()
+    other.configure(lambda: db.analysis_cache)
+    assert other.get(analysis_cache_key('Mainnet launch', 'XMN')) == RESULT
+    assert other.stats()['store_hits'] == 1
+
+
+def test_failed_analysis_is_not_cached(db, provider):
+    provider.response = 'not json'
+    assert analyze_tweet('Mainnet launch', 'XMN')['analysis_failed']
+    assert db.analysis_cache.count_documents({}) == 0
+    provider.response = json.dumps(RESULT)
+    assert analyze_tweet('Mainnet launch', 'XMN') == RESULT
+    assert len(provider.calls) == 2
+
+
+def test_memory_cache_is_bounded():
+    cache = AnalysisCache(maxsize=1)
+    cache.set('a', RESULT)
+    cache.set('b', RESULT)
+    assert (cache.get('a'), cache.get('b')) == (None, RESULT)
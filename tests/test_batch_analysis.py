@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import re
+
+import pytest
+
+from utils import ai_analyzer
+from utils.ai_analyzer import AnalysisCache, analyze_tweets_batch, parse_batch_response
+
+
+def analysis(level):
+    return {'event_type': 'Launch', 'impact_level': level, 'expected_volatility': '±5%', 'key_factors': [],
+            'historical_reference': 'none'}
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """批量prompt返回除skip外每条推文的结果，单条prompt返回Bearish，记录每次请求的推文数"""
+    sent, skip = [], set()
+
+    def call(prompt, max_tokens=None):
+        indexes = [int(index) for index in re.findall(r'^\[(\d+)\] 代币', prompt, re.MULTILINE)]
+        sent.append(len(indexes) or 1)
+        if not indexes:
+            return json.dumps(analysis('Bearish'))
+        return json.dumps({'results': [dict(analysis('Bullish'), index=index)
+                                       for index in indexes if index not in skip]})
+    monkeypatch.setattr(ai_analyzer, 'analysis_cache', AnalysisCache())
+    monkeypatch.setattr(ai_analyzer, 'AI_PROVIDER', 'openai')
+    monkeypatch.setitem(ai_analyzer.PROVIDER_CALLERS, 'openai', call)
+    return sent, skip
+
+
+def test_parse_batch_response():
+    response = json.dumps({'results': [{'index': 1, 'impact_level': 'Bullish'}, {'index': 'x'}, {'index': 0}]})
+    assert parse_batch_response(response) == {1: dict(analysis('Bullish'), event_type='未提供',
+                                                      expected_volatility='未提供', historical_reference='未提供')}
+    # 指定条数时结果不完整视为无效
+    assert parse_batch_response(response, expected=2) is None
+    assert parse_batch_response('{"results": []}') is None
+    assert parse_batch_response('说明文字 {"results": [{"index": 0, "impact_level": "Bearish"}]}')[0]['impact_level'] == 'Bearish'
+
+
+def test_batch_packs_tweets_and_skips_duplicates(prompts):
+    sent, _ = prompts
+    items = [('mainnet launch', 'XMN'), ('Mainnet launch', 'XMN'), ('listing on binance', 'ABC'), ('token burn', 'XMN')]
+    results = analyze_tweets_batch(items, batch_size=2)
+    # 只剩一条的批次按单条prompt分析
+    assert [result['impact_level'] for result in results] == ['Bullish', 'Bullish', 'Bullish', 'Bearish']
+    assert sent == [2, 1]
+    # 再次分析时全部命中单条和批量结果的缓存
+    analyze_tweets_batch(items, batch_size=2)
+    assert sent == [2, 1]
+
+
+def test_missing_batch_results_retried_individually(prompts):
+    sent, skip = prompts
+    skip.add(1)
+    results = analyze_tweets_batch([('mainnet launch', 'XMN'), ('listing on binance', 'ABC')])
+    assert [result['impact_level'] for result in results] == ['Bullish', 'Bearish']
+    assert sent == [2, 1]
+
+
+def test_prefiltered_tweets_not_sent(prompts):
+    sent, _ = prompts
+    results = analyze_tweets_batch([('gm frens', 'XMN'), ('mainnet launch', 'XMN')])
+    assert results[0]['source'] == 'prefilter'
+    assert sent == [1]
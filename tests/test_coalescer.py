@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from utils.coalescer import NotificationCoalescer
+
+
+def tweet(tweet_id, token='XMN', level='Bullish'):
+    return {'tweet_id': tweet_id, 'token_symbol': token, 'twitter_username': 'xmn',
+            'analysis': {'impact_level': level, 'event_type': 'Launch', 'key_factors': ['a']}}
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+def make_coalescer(sent, db=None, **kwargs):
+    coalescer = NotificationCoalescer(lambda chat_id, message, buttons: sent.append((chat_id, message, buttons)),
+                                      window=60, **kwargs)
+    if db is not None:
+        coalescer.configure(lambda: db.notification_digests)
+        # 由测试调用flush发送，不启动后台线程
+        coalescer.start = lambda: None
+    return coalescer
+
+
+def test_single_notification_sent_unchanged(sent):
+    coalescer = make_coalescer(sent)
+    assert not coalescer.submit(tweet('1'), 'message 1', buttons=['b'])
+    assert sent == []
+    coalescer.flush()
+    assert sent == [(None, 'message 1', ['b'])]
+
+
+def test_burst_becomes_one_digest_per_token(sent):
+    coalescer = make_coalescer(sent)
+    coalescer.submit(tweet('1'), 'message 1')
+    coalescer.submit(tweet('2', token='xmn'), 'message 2')
+    coalescer.submit(tweet('3', token='ABC'), 'message 3', chat_id='chat')
+    coalescer.flush()
+    assert sorted((chat_id or '', buttons) for chat_id, _, buttons in sent) == [('', None), ('chat', None)]
+    digest = [message for chat_id, message, _ in sent if chat_id is None][0]
+    assert digest not in ('message 1', 'message 2')
+    assert coalescer.stats()['digests'] == 1
+
+
+def test_urgent_and_full_windows_sent_immediately(sent):
+    coalescer = make_coalescer(sent, max_items=2)
+    assert coalescer.submit(tweet('1', level='Extremely Bearish'), 'urgent')
+    assert sent == [(None, 'urgent', None)]
+    coalescer.submit(tweet('2'), 'message 2')
+    coalescer.submit(tweet('3'), 'message 3')
+    assert len(sent) == 2
+    assert coalescer.stats()['pending'] == 0
+
+
+def test_persistent_window_survives_restart(db, sent):
+    make_coalescer(sent, db).submit(tweet('1'), 'message 1')
+    make_coalescer(sent, db).submit(tweet('2'), 'message 2')
+    assert db.notification_digests.count_documents({'status': 'open'}) == 1
+    # 重启后的新实例发送之前进程写入的窗口
+    restarted = make_coalescer(sent, db)
+    restarted.flush()
+    assert len(sent) == 1
+    assert db.notification_digests.count_documents({}) == 0
+
+
+def test_failed_send_keeps_persistent_window(db):
+    def fail(chat_id, message, buttons):
+        raise RuntimeError('telegram down')
+    coalescer = NotificationCoalescer(fail, window=60)
+    coalescer.configure(lambda: db.notification_digests)
+    coalescer.start = lambda: None
+    coalescer.submit(tweet('1'), 'message 1')
+    coalescer.flush()
+    assert db.notification_digests.find_one()['status'] == 'flushing'
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from models import database
+
+
+@pytest.fixture
+def fresh_client():
+    database.close_client()
+    yield
+    database.close_client()
+
+
+def test_client_shared_within_process(fresh_client):
+    client = database.get_client()
+    assert database.get_client() is client
+    assert database.get_db().name == database.MONGO_DB_NAME
+    assert client.options.pool_options.max_pool_size == database.MONGO_MAX_POOL_SIZE
+
+
+def test_client_recreated_after_fork(fresh_client, monkeypatch):
+    client = database.get_client()
+    # 模拟gunicorn fork出的子进程
+    child_pid = os.getpid() + 1
+    monkeypatch.setattr(database.os, 'getpid', lambda: child_pid)
+    assert database.get_client() is not client
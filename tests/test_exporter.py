@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import csv
+import glob
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from utils.exporter import export_documents
+
+
+@pytest.fixture
+def tweets(db):
+    db.tweets.insert_many([
+        {'tweet_id': str(i), 'text': f'推文 {i}', 'created_at': datetime(2024, 1, 1, i),
+         'analysis': {'impact_level': 'Bullish', 'key_factors': ['a', 'b']}}
+        for i in range(7)
+    ])
+    return db.tweets
+
+
+def cursor_opener(collection, fail_after=None):
+    """按_id升序读取断点之后的文档，fail_after条后模拟中断"""
+    def open_cursor(after_id, batch_size):
+        query = {'_id': {'$gt': ObjectId(after_id)}} if after_id else {}
+        for count, document in enumerate(collection.find(query).sort('_id', 1)):
+            if fail_after is not None and count >= fail_after:
+                raise KeyboardInterrupt
+            yield document
+    return open_cursor
+
+
+def read_ndjson(path, compression='none'):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if compression == 'gzip':
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+@pytest.mark.parametrize('compression', ['none', 'gzip'])
+def test_resume_after_interruption(tmp_path, tweets, compression):
+    output = str(tmp_path / 'tweets.ndjson')
+    with pytest.raises(KeyboardInterrupt):
+        export_documents(cursor_opener(tweets, fail_after=5), output, compression=compression, batch_size=2)
+    with open(output + '.state', encoding='utf-8') as f:
+        assert json.load(f)['exported'] == 4
+
+    result = export_documents(cursor_opener(tweets), output, compression=compression, batch_size=2)
+    assert (result['exported'], result['total']) == (3, 7)
+    assert [row['tweet_id'] for row in read_ndjson(output, compression)] == [str(i) for i in range(7)]
+
+
+def test_completed_export_appends_new_documents(tmp_path, tweets):
+    output = str(tmp_path / 'tweets.ndjson')
+    export_documents(cursor_opener(tweets), output, batch_size=3)
+    tweets.insert_one({'tweet_id': '7', 'text': 'new', 'created_at': datetime(2024, 1, 2)})
+    result = export_documents(cursor_opener(tweets), output, batch_size=3)
+    assert (result['exported'], result['total']) == (1, 8)
+    assert len(read_ndjson(output)) == 8
+
+
+def test_restart_overwrites_output(tmp_path, tweets):
+    output = str(tmp_path / 'tweets.ndjson')
+    export_documents(cursor_opener(tweets), output, batch_size=3)
+    result = export_documents(cursor_opener(tweets), output, batch_size=3, resume=False)
+    assert (result['exported'], result['total']) == (7, 7)
+    assert len(read_ndjson(output)) == 7
+
+
+def test_csv_header_written_once_across_resume(tmp_path, tweets):
+    output = str(tmp_path / 'tweets.csv')
+    with pytest.raises(KeyboardInterrupt):
+        export_documents(cursor_opener(tweets, fail_after=3), output, fmt='csv', batch_size=2)
+    export_documents(cursor_opener(tweets), output, fmt='csv', batch_size=2)
+    with open(output, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['tweet_id'] for row in rows] == [str(i) for i in range(7)]
+    assert rows[0]['impact_level'] == 'Bullish'
+    assert json.loads(rows[0]['key_factors']) == ['a', 'b']
+
+
+def test_changed_conditions_rejected(tmp_path, tweets):
+    output = str(tmp_path / 'tweets.ndjson')
+    with pytest.raises(KeyboardInterrupt):
+        export_documents(cursor_opener(tweets, fail_after=3), output, batch_size=2, fingerprint={'project_ids': ['a']})
+    with pytest.raises(ValueError):
+        export_documents(cursor_opener(tweets), output, batch_size=2, fingerprint={'project_ids': ['b']})
+
+
+@pytest.mark.parametrize('fmt, compression', [('xml', 'none'), ('ndjson', 'bz2')])
+def test_invalid_format_or_compression(tmp_path, tweets, fmt, compression):
+    with pytest.raises(ValueError):
+        export_documents(cursor_opener(tweets), str(tmp_path / 'out'), fmt=fmt, compression=compression)
+
+
+def test_parquet_uncompressed_and_restart_clears_parts(tmp_path, tweets):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    output = str(tmp_path / 'tweets_parquet')
+    os.makedirs(output)
+    # 上一次导出留下的分片，重新开始时应被删除
+    for name in ('part-00000.parquet', 'part-00009.parquet'):
+        open(os.path.join(output, name), 'wb').close()
+
+    export_documents(cursor_opener(tweets), output, fmt='parquet', batch_size=2, resume=False)
+    parts = sorted(glob.glob(os.path.join(output, 'part-*.parquet')))
+    assert [os.path.basename(part) for part in parts] == ['part-00000.parquet']
+    assert pyarrow_parquet.read_table(parts[0]).num_rows == 7
+    assert pyarrow_parquet.ParquetFile(parts[0]).metadata.row_group(0).column(0).compression == 'UNCOMPRESSED'
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from utils.fanout import DEFAULT_SUBSCRIPTIONS, fan_out, matching_subscriptions, normalize_subscription
+
+
+def test_normalize_subscription_defaults():
+    assert normalize_subscription({'chat_id': -100}) == {
+        'chat_id': '-100', 'min_impact_level': 'Bullish', 'direction': 'both', 'buttons': False
+    }
+    assert normalize_subscription({'chat_id': '1', 'direction': 'Bearish'})['direction'] == 'bearish'
+
+
+@pytest.mark.parametrize('data', [
+    {},
+    {'chat_id': ''},
+    {'chat_id': '1', 'min_impact_level': 'Huge'},
+    {'chat_id': '1', 'direction': 'sideways'}
+])
+def test_normalize_subscription_rejects_invalid(data):
+    with pytest.raises(ValueError):
+        normalize_subscription(data)
+
+
+@pytest.mark.parametrize('impact_level, expected', [
+    ('Non-Significant', []),
+    ('Bullish', ['all', 'bulls']),
+    ('Extremely Bullish', ['all', 'bulls', 'extreme']),
+    ('Bearish', ['all', 'bears']),
+    ('Extremely Bearish', ['all', 'bears', 'extreme'])
+])
+def test_matching_by_threshold_and_direction(impact_level, expected):
+    subscriptions = [
+        {'chat_id': 'all', 'min_impact_level': 'Bullish'},
+        {'chat_id': 'bulls', 'min_impact_level': 'Bullish', 'direction': 'bullish'},
+        {'chat_id': 'bears', 'min_impact_level': 'Bearish', 'direction': 'bearish'},
+        {'chat_id': 'extreme', 'min_impact_level': 'Extremely Bullish'}
+    ]
+    assert [item['chat_id'] for item in matching_subscriptions(subscriptions, impact_level)] == expected
+
+
+def test_same_chat_merged_and_buttons_combined():
+    subscriptions = [
+        {'chat_id': '1', 'min_impact_level': 'Bullish', 'buttons': False},
+        {'chat_id': '1', 'min_impact_level': 'Extremely Bullish', 'buttons': True}
+    ]
+    assert matching_subscriptions(subscriptions, 'Extremely Bullish') == [{'chat_id': '1', 'buttons': True}]
+
+
+def test_fan_out_formats_once_and_survives_send_errors():
+    sent = []
+    formatted = []
+
+    def formatter(tweet_data):
+        formatted.append(tweet_data)
+        return 'message'
+
+    def send(chat_id, message, buttons):
+        if chat_id == 'broken':
+            raise RuntimeError('send failed')
+        sent.append((chat_id, message, buttons))
+
+    tweet_data = {'tweet_id': '1', 'twitter_username': 'project', 'analysis': {'impact_level': 'Bearish'}}
+    subscriptions = [{'chat_id': 'broken'}, {'chat_id': 'ok'}]
+    assert fan_out(tweet_data, subscriptions, formatter, send) == 2
+    assert len(formatted) == 1
+    assert sent == [('ok', 'message', None)]
+
+
+def test_default_subscription_targets_default_chat():
+    assert matching_subscriptions(DEFAULT_SUBSCRIPTIONS, 'Bullish') == [{'chat_id': None, 'buttons': False}]
+    assert matching_subscriptions(DEFAULT_SUBSCRIPTIONS, 'Non-Significant') == []
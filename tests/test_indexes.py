@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+from models.indexes import INDEX_SPECS, dedupe_tweets, ensure_indexes
+
+
+def declared(collection_name):
+    return sorted(index.document['name'] for index in INDEX_SPECS[collection_name])
+
+
+def test_ensure_indexes_creates_declared_indexes(db):
+    created = ensure_indexes(db)
+    assert {name: sorted(names) for name, names in created.items()} == {name: declared(name) for name in INDEX_SPECS}
+    assert set(declared('tweets')) <= set(db.tweets.index_information())
+    # 重复执行不会出错
+    assert ensure_indexes(db)['tweets'] == created['tweets']
+
+
+def test_unique_violation_does_not_block_other_indexes(db):
+    db.tweets.insert_many([{'tweet_id': '1', 'created_at': datetime(2024, 1, 1)}, {'tweet_id': '1'}])
+    created = ensure_indexes(db)
+    assert 'tweet_id_unique' not in created['tweets']
+    assert sorted(created['tweets'] + ['tweet_id_unique']) == declared('tweets')
+
+
+def test_project_username_keys_backfilled(db):
+    db.projects.insert_one({'name': 'XMonitor', 'twitter_username': 'XMN'})
+    ensure_indexes(db)
+    assert db.projects.find_one()['twitter_username_key'] == 'xmn'
+
+
+def test_dedupe_keeps_analyzed_then_earliest(db):
+    db.tweets.insert_many([
+        {'tweet_id': '1', 'analysis_status': 'pending', 'created_at': datetime(2024, 1, 1)},
+        {'tweet_id': '1', 'analysis_status': 'done', 'created_at': datetime(2024, 1, 2)},
+        {'tweet_id': '2', 'created_at': datetime(2024, 1, 2)},
+        {'tweet_id': '2', 'created_at': datetime(2024, 1, 1)},
+        {'tweet_id': '3', 'created_at': datetime(2024, 1, 1)}
+    ])
+    assert dedupe_tweets(db, dry_run=True) == (2, 2)
+    assert db.tweets.count_documents({}) == 5
+    assert dedupe_tweets(db) == (2, 2)
+    kept = {tweet['tweet_id']: tweet for tweet in db.tweets.find()}
+    assert (kept['1']['analysis_status'], kept['2']['created_at']) == ('done', datetime(2024, 1, 1))
+    assert 'tweet_id_unique' in ensure_indexes(db)['tweets']
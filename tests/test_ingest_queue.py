@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from utils.ingest_queue import RetrySweeper, claim_tweet, worker_id
+
+
+class FakeQueue:
+    """记录提交的任务，capacity条之后拒绝"""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.jobs = []
+
+    def submit(self, job):
+        if len(self.jobs) >= self.capacity:
+            return False
+        self.jobs.append(job)
+        return True
+
+
+def make_sweeper(db, queue, **kwargs):
+    sweeper = RetrySweeper(queue, retry_after=60, **kwargs)
+    sweeper.configure(lambda: db.tweets, lambda: db.ingest_workers)
+    return sweeper
+
+
+@pytest.fixture
+def stale(db):
+    old = datetime.utcnow() - timedelta(minutes=10)
+    db.tweets.insert_many([
+        {'tweet_id': 'failed', 'analysis_status': 'failed', 'status_changed_at': old, 'created_at': old},
+        {'tweet_id': 'rejected', 'analysis_status': 'rejected', 'status_changed_at': old, 'created_at': old},
+        # 旧文档没有status_changed_at，按created_at判断
+        {'tweet_id': 'legacy', 'analysis_status': 'pending', 'created_at': old},
+        {'tweet_id': 'recent', 'analysis_status': 'failed', 'status_changed_at': datetime.utcnow(), 'created_at': old},
+        {'tweet_id': 'done', 'analysis_status': 'done', 'status_changed_at': old, 'created_at': old},
+        {'tweet_id': 'exhausted', 'analysis_status': 'failed', 'analysis_attempts': 5, 'status_changed_at': old,
+         'created_at': old}
+    ])
+    return db.tweets
+
+
+def test_sweep_requeues_stale_unfinished_tweets(db, stale):
+    queue = FakeQueue()
+    assert make_sweeper(db, queue, max_attempts=5).sweep() == 3
+    assert sorted(job['tweet_id'] for job in queue.jobs) == ['failed', 'legacy', 'rejected']
+    assert all(job['analysis_status'] == 'pending' and job['analysis_attempts'] == 1 for job in queue.jobs)
+    # 刚重新入队的推文不会在下一轮再次领取
+    assert make_sweeper(db, queue, max_attempts=5).sweep() == 0
+
+
+def test_sweep_respects_batch_size(db, stale):
+    queue = FakeQueue()
+    sweeper = make_sweeper(db, queue, batch_size=2)
+    assert sweeper.sweep() == 2
+    assert sweeper.stats()['requeued'] == 2
+
+
+def test_full_queue_reverts_claim(db, stale):
+    queue = FakeQueue(capacity=1)
+    assert make_sweeper(db, queue).sweep() == 1
+    assert stale.count_documents({'analysis_attempts': 1}) == 1
+    # 队列已满时领取的推文退回rejected，不计入重试次数
+    assert stale.count_documents({'analysis_status': 'rejected', 'analysis_attempts': 0}) == 1
+
+
+def test_pending_in_live_worker_queue_is_not_swept(db):
+    old = datetime.utcnow() - timedelta(hours=1)
+    db.ingest_workers.insert_many([
+        {'_id': 'live:1', 'heartbeat_at': datetime.utcnow()},
+        {'_id': 'dead:2', 'heartbeat_at': old}
+    ])
+    db.tweets.insert_many([
+        # 在存活进程的队列中等待了很久，仍由该进程处理
+        {'tweet_id': 'waiting', 'analysis_status': 'pending', 'queued_by': 'live:1', 'status_changed_at': old},
+        {'tweet_id': 'orphaned', 'analysis_status': 'pending', 'queued_by': 'dead:2', 'status_changed_at': old}
+    ])
+    queue = FakeQueue()
+    sweeper = make_sweeper(db, queue)
+    sweeper.heartbeat()
+    assert sweeper.sweep() == 1
+    assert [job['tweet_id'] for job in queue.jobs] == ['orphaned']
+    assert queue.jobs[0]['queued_by'] == worker_id()
+    assert db.ingest_workers.find_one({'_id': worker_id()})['heartbeat_at'] is not None
+
+
+def test_processing_swept_only_after_lease_expires(db):
+    now = datetime.utcnow()
+    db.tweets.insert_many([
+        {'tweet_id': 'running', 'analysis_status': 'processing', 'lease_id': 'a',
+         'lease_until': now + timedelta(minutes=5), 'status_changed_at': now - timedelta(hours=1)},
+        {'tweet_id': 'crashed', 'analysis_status': 'processing', 'lease_id': 'b',
+         'lease_until': now - timedelta(seconds=1), 'status_changed_at': now - timedelta(minutes=11)}
+    ])
+    queue = FakeQueue()
+    assert make_sweeper(db, queue).sweep() == 1
+    assert [job['tweet_id'] for job in queue.jobs] == ['crashed']
+    assert queue.jobs[0]['analysis_status'] == 'pending'
+    assert 'lease_id' not in queue.jobs[0]
+
+
+def test_claim_tweet_is_exclusive(db):
+    document_id = db.tweets.insert_one({'tweet_id': '1', 'analysis_status': 'pending'}).inserted_id
+    lease_id = claim_tweet(db.tweets, document_id)
+    assert lease_id
+    assert claim_tweet(db.tweets, document_id) is None
+    stored = db.tweets.find_one({'_id': document_id})
+    assert (stored['analysis_status'], stored['lease_id'], stored['lease_owner']) == ('processing', lease_id, worker_id())
+
+
+@pytest.fixture
+def worker(app_module, db, monkeypatch):
+    """直接调用process_tweet_job，分析结果固定，记录发送的通知"""
+    sent = []
+    analysis = {'impact_level': 'Bullish', 'event_type': 'Launch', 'key_factors': ['a']}
+    monkeypatch.setattr(app_module, 'analyze_tweet', lambda text, symbol, on_early=None: dict(analysis))
+    monkeypatch.setattr(app_module.notification_coalescer, 'submit',
+                        lambda data, message, chat_id=None, buttons=None: sent.append(data['tweet_id']))
+    document = {'tweet_id': '1', 'project_id': 'p1', 'token_symbol': 'XMN', 'text': 'mainnet',
+                'created_at': datetime.utcnow(), 'analysis': {}, 'analysis_status': 'pending'}
+    document['_id'] = db.tweets.insert_one(dict(document)).inserted_id
+    return SimpleNamespace(document=document, sent=sent)
+
+
+def test_duplicate_queue_entries_analyze_and_notify_once(app_module, db, worker):
+    # 重新入队后同一条推文出现在两个队列中
+    app_module.process_tweet_job(dict(worker.document))
+    app_module.process_tweet_job(dict(worker.document))
+    assert worker.sent == ['1']
+    stored = db.tweets.find_one({'_id': worker.document['_id']})
+    assert stored['analysis_status'] == 'done'
+    assert 'lease_id' not in stored
+    assert db.sentiment_rollups.find_one({'project_id': 'p1', 'granularity': 'hour'})['total'] == 1
+
+
+def test_lost_lease_skips_write_and_notification(app_module, db, worker, monkeypatch):
+    def analyze_while_reclaimed(text, symbol, on_early=None):
+        # 分析期间租约过期，推文被其他进程重新领取
+        db.tweets.update_one({'_id': worker.document['_id']}, {'$set': {'lease_id': 'other'}})
+        return {'impact_level': 'Bearish'}
+    monkeypatch.setattr(app_module, 'analyze_tweet', analyze_while_reclaimed)
+    app_module.process_tweet_job(dict(worker.document))
+    assert worker.sent == []
+    stored = db.tweets.find_one({'_id': worker.document['_id']})
+    assert (stored['analysis_status'], stored['lease_id']) == ('processing', 'other')
+
+
+def test_mark_failed_requires_lease(app_module, db, worker):
+    job = dict(worker.document)
+    app_module.mark_tweet_failed(job, RuntimeError('boom'))
+    assert db.tweets.find_one({'_id': job['_id']})['analysis_status'] == 'pending'
+    job['lease_id'] = claim_tweet(db.tweets, job['_id'])
+    app_module.mark_tweet_failed(job, RuntimeError('boom'))
+    stored = db.tweets.find_one({'_id': job['_id']})
+    assert (stored['analysis_status'], stored['analysis_error']) == ('failed', 'boom')
+    assert 'lease_id' not in stored
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from models.pagination import MAX_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor, fetch_page
+
+
+def insert_tweets(collection, count, same_time=False):
+    started = datetime(2024, 1, 1)
+    collection.insert_many([
+        {'tweet_id': str(i), 'text': f'tweet {i}', 'created_at': started if same_time else started + timedelta(minutes=i)}
+        for i in range(count)
+    ])
+
+
+def test_cursor_round_trip():
+    document = {'created_at': datetime(2024, 1, 2, 3, 4, 5, 6000), '_id': ObjectId()}
+    assert decode_cursor(encode_cursor(document)) == (document['created_at'], document['_id'])
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', 'eyJ0IjoxfQ', '游标'])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(0) == 1
+    assert clamp_page_size('abc', default=20) == 20
+    assert clamp_page_size(MAX_PAGE_SIZE + 1) == MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize('same_time', [False, True])
+def test_fetch_page_walks_all_documents_once(db, same_time):
+    # created_at相同时按_id排序，翻页不重复也不遗漏
+    insert_tweets(db.tweets, 25, same_time)
+    seen = []
+    cursor = None
+    while True:
+        documents, cursor = fetch_page(db.tweets, {}, 10, cursor)
+        seen.extend(document['tweet_id'] for document in documents)
+        if not cursor:
+            break
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    if not same_time:
+        assert seen == [str(i) for i in reversed(range(25))]
+
+
+def test_fetch_page_last_page_has_no_cursor(db):
+    insert_tweets(db.tweets, 10)
+    documents, cursor = fetch_page(db.tweets, {}, 10)
+    assert len(documents) == 10
+    assert cursor is None
+
+
+def test_fetch_page_inclusive_projection_keeps_cursor_fields(db):
+    insert_tweets(db.tweets, 3)
+    documents, cursor = fetch_page(db.tweets, {}, 2, projection={'tweet_id': 1})
+    assert set(documents[0]) == {'_id', 'tweet_id', 'created_at'}
+    assert decode_cursor(cursor)[1] == documents[-1]['_id']
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from utils.prefilter import get_prefilter_stats, prefilter_tweet, score_tweet
+
+
+@pytest.mark.parametrize('text', ['gm frens', 'GM! Happy weekend ☀️', '早安 周末愉快', 'https://t.co/abc', 'RT @xmn: thanks'])
+def test_trivial_tweets_skip_ai(text):
+    result = prefilter_tweet(text)
+    assert (result['impact_level'], result['source']) == ('Non-Significant', 'prefilter')
+
+
+@pytest.mark.parametrize('text', ['gm, mainnet is live', '早安，币安上线了', 'gm frens, we got hacked', 'Regulators approve',
+                                  'We raised $5 million'])
+def test_significant_tweets_go_to_ai(text):
+    assert prefilter_tweet(text) is None
+
+
+def test_terms_match_whole_words():
+    # algorithm不应命中gm，listing命中list
+    assert score_tweet('New algorithm') == (-1, ['正文很短(13字)'])
+    assert prefilter_tweet('listing soon') is None
+
+
+def test_significant_term_overrides_threshold():
+    assert prefilter_tweet('gm gm gm launch', threshold=100) is None
+
+
+def test_stats_count_checked_and_skipped():
+    before = get_prefilter_stats()
+    prefilter_tweet('gm')
+    prefilter_tweet('mainnet launch')
+    after = get_prefilter_stats()
+    assert (after['checked'] - before['checked'], after['skipped'] - before['skipped']) == (2, 1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from models import project
+from models.project import ProjectRegistry
+
+
+@pytest.fixture
+def projects(use_db):
+    db = use_db(project)
+    db.projects.insert_one({'name': 'XMonitor', 'twitter_username': 'XMN', 'twitter_username_key': 'xmn'})
+    return db.projects
+
+
+def test_resolve_by_id_or_username(projects):
+    registry = ProjectRegistry()
+    stored = projects.find_one()
+    assert registry.resolve(twitter_username='xmn')['_id'] == stored['_id']
+    assert registry.resolve(project_id=str(stored['_id']))['name'] == 'XMonitor'
+    assert registry.resolve(project_id='not-an-id') is None
+    assert registry.stats()['refreshes'] == 1
+
+
+def test_invalidate_reaches_other_processes(projects):
+    # 两个实例相当于两个worker进程各自的缓存
+    worker, admin = ProjectRegistry(version_check=0), ProjectRegistry(version_check=0)
+    assert worker.resolve(twitter_username='xmn')['name'] == 'XMonitor'
+    projects.update_one({}, {'$set': {'name': 'Renamed'}})
+    admin.invalidate()
+    assert worker.resolve(twitter_username='xmn')['name'] == 'Renamed'
+    assert worker.stats()['refreshes'] == 2
+
+
+def test_version_checked_at_most_every_interval(projects):
+    worker = ProjectRegistry(version_check=3600)
+    worker.resolve(twitter_username='xmn')
+    projects.update_one({}, {'$set': {'name': 'Renamed'}})
+    ProjectRegistry().invalidate()
+    assert worker.resolve(twitter_username='xmn')['name'] == 'XMonitor'
+
+
+def test_negative_cache(projects):
+    registry = ProjectRegistry(negative_ttl=3600)
+    assert registry.resolve(twitter_username='new') is None
+    # 未调用invalidate就新增的项目，负缓存过期前仍返回None
+    projects.insert_one({'name': 'New', 'twitter_username': 'new', 'twitter_username_key': 'new'})
+    assert registry.resolve(twitter_username='new') is None
+    assert registry.stats()['negative'] == 1
+
+
+def test_new_project_fetched_without_reload(projects):
+    registry = ProjectRegistry(negative_ttl=0)
+    assert registry.resolve(twitter_username='new') is None
+    projects.insert_one({'name': 'New', 'twitter_username': 'new', 'twitter_username_key': 'new'})
+    assert registry.resolve(twitter_username='NEW')['name'] == 'New'
+    assert registry.stats()['refreshes'] == 1
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from models.search_terms import search_fields, search_query, tokenize
+
+
+def test_tokenize_mixed_text():
+    assert tokenize('Mainnet 主网上线 https://t.co/abc') == ['mainnet', '主网', '网上', '上线']
+    assert tokenize('Ｖ２ 币') == ['v2', '币']
+    assert tokenize(None) == []
+
+
+def test_search_fields():
+    fields = search_fields('主网上线', {'event_type': 'Launch', 'key_factors': ['TVL up', '空投']})
+    assert fields == {'text': '主网 网上 上线', 'event_type': 'launch', 'key_factors': 'tvl up 空投'}
+
+
+def test_search_query_requires_every_term():
+    assert search_query('mainnet launch') == '"mainnet" "launch"'
+
+
+def test_search_query_drops_stopwords_and_duplicates():
+    assert search_query('the launch of the mainnet launch') == '"launch" "mainnet"'
+    # 中文虚词作为分隔符，不与相邻的字组成检索词
+    assert search_query('主网的上线') == '"主网" "上线"'
+
+
+def test_search_query_only_stopwords_keeps_terms():
+    assert search_query('to be or') == '"to" "be" "or"'
+    assert search_query('') == ''
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import sentiment
+from models.sentiment import ALL_PROJECTS, bucket_start, fill_buckets, get_sentiment_series, record_impact
+
+
+@pytest.fixture
+def rollups(use_db):
+    return use_db(sentiment).sentiment_rollups
+
+
+def rollup(collection, project_id, granularity, bucket):
+    return collection.find_one({'project_id': project_id, 'granularity': granularity, 'bucket': bucket})
+
+
+def test_bucket_start():
+    moment = datetime(2024, 1, 2, 3, 4, 5, 6)
+    assert bucket_start(moment, 'hour') == datetime(2024, 1, 2, 3)
+    assert bucket_start(moment, 'day') == datetime(2024, 1, 2)
+
+
+def test_record_impact_updates_project_and_total(rollups):
+    created_at = datetime(2024, 1, 2, 3, 30)
+    assert record_impact('p1', created_at, 'Bullish')
+    assert record_impact('p2', created_at, 'Bearish')
+    assert rollup(rollups, 'p1', 'hour', datetime(2024, 1, 2, 3))['counts'] == {'Bullish': 1}
+    total = rollup(rollups, ALL_PROJECTS, 'day', datetime(2024, 1, 2))
+    assert (total['counts'], total['total']) == ({'Bullish': 1, 'Bearish': 1}, 2)
+
+
+def test_reanalysis_moves_count_without_double_counting(rollups):
+    created_at = datetime(2024, 1, 2, 3, 30)
+    record_impact('p1', created_at, 'Bullish')
+    assert record_impact('p1', created_at, 'Bearish', previous_level='Bullish')
+    document = rollup(rollups, 'p1', 'hour', datetime(2024, 1, 2, 3))
+    assert (document['counts'], document['total']) == ({'Bullish': 0, 'Bearish': 1}, 1)
+    # 等级未变化时不更新
+    assert not record_impact('p1', created_at, 'Bearish', previous_level='Bearish')
+    assert not record_impact('p1', created_at, None)
+
+
+def test_series_fills_empty_buckets(rollups):
+    record_impact('p1', datetime(2024, 1, 1, 2, 10), 'Bullish')
+    record_impact('p1', datetime(2024, 1, 1, 5, 10), 'Bearish')
+    series = get_sentiment_series(['p1'], 'hour', datetime(2024, 1, 1, 0, 30), datetime(2024, 1, 1, 7))
+    points = series['p1']
+    assert [point['bucket'].hour for point in points] == list(range(7))
+    assert [point['total'] for point in points] == [0, 0, 1, 0, 0, 1, 0]
+    assert points[0] == {'bucket': datetime(2024, 1, 1), 'counts': {}, 'total': 0}
+
+
+def test_series_without_data_is_all_zero(rollups):
+    series = get_sentiment_series(None, 'day', datetime(2024, 1, 1), datetime(2024, 1, 4))
+    assert [(point['bucket'].day, point['total']) for point in series[ALL_PROJECTS]] == [(1, 0), (2, 0), (3, 0)]
+
+
+def test_series_rejects_unknown_granularity(rollups):
+    with pytest.raises(ValueError):
+        get_sentiment_series(granularity='minute')
+
+
+def test_fill_buckets_defaults_to_first_point_until_now():
+    now_bucket = bucket_start(datetime.utcnow(), 'day')
+    first = now_bucket - timedelta(days=2)
+    points = [{'bucket': first, 'counts': {'Bullish': 3}, 'total': 3}]
+    filled = fill_buckets(points, 'day')
+    assert [point['bucket'] for point in filled] == [first, first + timedelta(days=1), now_bucket]
+    assert filled[0] is points[0]
+    assert fill_buckets([], 'day') == []
+
+
+def test_fill_buckets_keeps_most_recent_buckets():
+    since, until = datetime(2024, 1, 1), datetime(2024, 1, 1, 10)
+    filled = fill_buckets([], 'hour', since, until, max_buckets=3)
+    assert [point['bucket'].hour for point in filled] == [7, 8, 9]
+
+
+@pytest.fixture
+def legacy_tweets(use_db):
+    """没有analysis_status字段的早期推文，以及未完成分析的推文"""
+    from models import tweet
+    db = use_db(sentiment, tweet)
+    created_at = datetime(2024, 1, 1, 5, 10)
+    db.tweets.insert_many([
+        {'tweet_id': 'legacy', 'project_id': 'p1', 'created_at': created_at, 'analysis': {'impact_level': 'Bullish'}},
+        {'tweet_id': 'done', 'project_id': 'p1', 'created_at': created_at, 'analysis_status': 'done',
+         'analysis': {'impact_level': 'Bearish'}},
+        {'tweet_id': 'pending', 'project_id': 'p1', 'created_at': created_at, 'analysis_status': 'pending',
+         'analysis': {}},
+        {'tweet_id': 'unanalyzed', 'project_id': 'p1', 'created_at': created_at, 'analysis': {}}
+    ])
+    return db
+
+
+def test_rebuild_counts_legacy_tweets(legacy_tweets):
+    assert sentiment.rebuild_rollups() > 0
+    document = rollup(legacy_tweets.sentiment_rollups, 'p1', 'hour', datetime(2024, 1, 1, 5))
+    assert (document['counts'], document['total']) == ({'Bullish': 1, 'Bearish': 1}, 2)
+
+
+def test_reanalysing_legacy_tweet_does_not_double_count(legacy_tweets):
+    from models.tweet import Tweet
+    sentiment.rebuild_rollups()
+    legacy = legacy_tweets.tweets.find_one({'tweet_id': 'legacy'})
+    assert Tweet.save_analysis(legacy['_id'], 'p1', legacy['created_at'], 'text', {'impact_level': 'Bearish'})
+    document = rollup(legacy_tweets.sentiment_rollups, 'p1', 'hour', datetime(2024, 1, 1, 5))
+    assert (document['counts'], document['total']) == ({'Bullish': 0, 'Bearish': 2}, 2)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+
+from utils.status import CachedProbe, StatusMonitor, format_uptime
+
+
+def test_format_uptime():
+    assert format_uptime(59) == '0分钟'
+    assert format_uptime(3 * 3600 + 120) == '3小时 2分钟'
+    assert format_uptime(86400 + 60) == '1天 0小时 1分钟'
+
+
+def test_probe_error_uses_default_or_last_value():
+    results = iter([{'tweets': 1}, RuntimeError('down')])
+
+    def probe():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    counts = CachedProbe('counts', probe, 60)
+    counts.refresh()
+    counts.refresh()
+    assert (counts.snapshot()['value'], counts.snapshot()['error']) == ({'tweets': 1}, 'down')
+
+    mongodb = CachedProbe('mongodb', lambda: 1 / 0, 60, default=False)
+    mongodb.refresh()
+    assert mongodb.snapshot()['value'] is False
+    assert mongodb.snapshot()['checked_at'] is not None
+
+
+def test_snapshot_reads_cache_without_probing_again():
+    calls = []
+    monitor = StatusMonitor([CachedProbe('mongodb', lambda: calls.append(1) or True, 3600)])
+    first = monitor.snapshot(wait=5)
+    assert first['mongodb']['value'] is True
+    # 后台线程按TTL刷新，再次查询直接返回缓存
+    assert monitor.snapshot()['mongodb'] == first['mongodb']
+    assert len(calls) == 1
+
+
+def test_slow_probe_does_not_block_snapshot():
+    release = threading.Event()
+    monitor = StatusMonitor([
+        CachedProbe('fast', lambda: 'ok', 3600),
+        CachedProbe('slow', lambda: release.wait(5) and 'late', 3600)
+    ])
+    try:
+        probes = monitor.snapshot(wait=0.1)
+    finally:
+        release.set()
+    assert (probes['fast']['value'], probes['slow']['value'], probes['slow']['checked_at']) == ('ok', None, None)
+
+
+def test_status_api_reports_cached_probes(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'status_monitor', StatusMonitor([
+        CachedProbe('mongodb', lambda: True, 3600, default=False),
+        CachedProbe('telegram', lambda: 1 / 0, 3600, default=False),
+        CachedProbe('counts', lambda: {'projects': 2, 'tweets': 5}, 3600)
+    ]))
+    body = client.get('/api/status').get_json()
+    assert (body['mongodb_connected'], body['telegram_connected']) == (True, False)
+    assert (body['project_count'], body['tweet_count']) == (2, 5)
+    assert body['probes']['telegram']['error'] == 'division by zero'
+    assert body['last_updated'] is not None
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+
+from utils.stream_fields import StreamingFieldParser
+
+
+def feed_all(parser, chunks):
+    found = []
+    for chunk in chunks:
+        found.append(parser.feed(chunk))
+    return found
+
+
+def test_field_returned_as_soon_as_string_closes():
+    parser = StreamingFieldParser(['impact_level'])
+    found = feed_all(parser, ['{"impact_', 'level": "Bull', 'ish", "key_factors": ["a"', ']}'])
+    assert found == [{}, {}, {'impact_level': 'Bullish'}, {}]
+    assert parser.values == {'impact_level': 'Bullish'}
+
+
+def test_character_by_character_matches_json():
+    document = {
+        'event_type': '主网 "上线"',
+        'impact_level': 'Extremely Bullish',
+        'key_factors': ['impact_level inside array', {'impact_level': 'Bearish'}],
+        'historical_reference': 'back\\slash'
+    }
+    parser = StreamingFieldParser(['event_type', 'impact_level', 'historical_reference'])
+    feed_all(parser, json.dumps(document, ensure_ascii=False))
+    assert parser.values == {
+        'event_type': '主网 "上线"',
+        'impact_level': 'Extremely Bullish',
+        'historical_reference': 'back\\slash'
+    }
+
+
+def test_nested_values_are_ignored():
+    parser = StreamingFieldParser(['impact_level'])
+    feed_all(parser, ['{"details": {"impact_level": "Bearish"}, "impact_level": "Bullish"}'])
+    assert parser.values == {'impact_level': 'Bullish'}
+
+
+def test_leading_text_and_code_fence():
+    parser = StreamingFieldParser(['impact_level'])
+    feed_all(parser, ['分析结果如下：\n```json\n', '{"impact_level": "Non-Significant"}\n```'])
+    assert parser.values == {'impact_level': 'Non-Significant'}
+
+
+def test_first_value_wins():
+    parser = StreamingFieldParser(['impact_level'])
+    found = feed_all(parser, ['{"impact_level": "Bullish", "impact_level": "Bearish"}'])
+    assert found == [{'impact_level': 'Bullish'}]
+    assert parser.values == {'impact_level': 'Bullish'}
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from utils import telegram_bot
+from utils.telegram_bot import SharedRateLimiter, TelegramOutbox, rate_window
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    """固定限流使用的当前时间，避免测试跨越时间窗边界"""
+    clock = SimpleNamespace(now=1000.5)
+    fake_time = SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now, sleep=lambda seconds: None)
+    monkeypatch.setattr(telegram_bot, 'time', fake_time)
+    return clock
+
+
+@pytest.fixture
+def limiter_factory(db, frozen_time):
+    def create():
+        limiter = SharedRateLimiter()
+        limiter.configure(lambda: db.telegram_rate_limits)
+        return limiter
+    return create
+
+
+def test_rate_window():
+    assert rate_window(30) == (1, 30)
+    assert rate_window(1) == (1, 1)
+    assert rate_window(20 / 60) == (3, 1)
+
+
+def test_group_chats_use_minute_window():
+    assert SharedRateLimiter.limits('-100123')[0] == ('chat:-100123', 60, 20)
+    assert SharedRateLimiter.limits(123)[0] == ('chat:123', 1, 1)
+
+
+def test_chat_limit_shared_across_processes(db, limiter_factory):
+    # 两个实例模拟两个工作进程，共用同一组计数
+    first, second = limiter_factory(), limiter_factory()
+    assert first.acquire('123') == 0
+    assert second.acquire('123') == pytest.approx(0.5)
+    assert db.telegram_rate_limits.find_one({'_id': 'chat:123:1:1000'})['count'] == 1
+    assert second.acquire('456') == 0
+
+
+def test_next_window_releases_quota(limiter_factory, frozen_time):
+    limiter = limiter_factory()
+    assert limiter.acquire('123') == 0
+    assert limiter.acquire('123') > 0
+    frozen_time.now += 1
+    assert limiter.acquire('123') == 0
+
+
+def test_global_shortage_returns_chat_quota(db, limiter_factory, monkeypatch):
+    monkeypatch.setattr(telegram_bot, 'TELEGRAM_GLOBAL_RATE', 1)
+    limiter = limiter_factory()
+    assert limiter.acquire('123') == 0
+    assert limiter.acquire('456') > 0
+    assert db.telegram_rate_limits.find_one({'_id': 'chat:456:1:1000'})['count'] == 0
+    assert db.telegram_rate_limits.find_one({'_id': 'global:1:1000'})['count'] == 1
+
+
+def test_falls_back_to_local_limiter_without_database(frozen_time):
+    def unavailable():
+        raise RuntimeError('no database')
+    limiter = SharedRateLimiter()
+    limiter.configure(unavailable)
+    assert limiter.acquire('123') == 0
+
+
+@pytest.fixture
+def outbox(db):
+    outbox = TelegramOutbox()
+    outbox.configure(lambda: db.telegram_outbox)
+    return outbox
+
+
+def test_claim_takes_lease_and_complete_marks_sent(outbox):
+    outbox.put({'chat_id': '123', 'text': 'hello'})
+    message = outbox.claim()
+    assert message['status'] == 'sending'
+    assert message['lease_id']
+    # 租约期内不会被其他工作线程重复领取
+    assert outbox.claim() is None
+    outbox.complete(message)
+    assert outbox.stats()['by_status'] == {'pending': 0, 'sending': 0, 'sent': 1, 'failed': 0}
+
+
+def test_expired_lease_is_reclaimed_and_stale_update_ignored(db, outbox):
+    outbox.put({'chat_id': '123', 'text': 'hello'})
+    stale = outbox.claim()
+    db.telegram_outbox.update_one({'_id': stale['_id']}, {'$set': {'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)}})
+    reclaimed = outbox.claim()
+    assert reclaimed['_id'] == stale['_id']
+    assert reclaimed['lease_id'] != stale['lease_id']
+    outbox.complete(stale)
+    assert db.telegram_outbox.find_one({'_id': stale['_id']})['status'] == 'sending'
+    outbox.complete(reclaimed)
+    assert db.telegram_outbox.find_one({'_id': stale['_id']})['status'] == 'sent'
+
+
+def test_retry_until_max_attempts(db, outbox, monkeypatch):
+    monkeypatch.setattr(telegram_bot, 'TELEGRAM_MAX_ATTEMPTS', 2)
+    outbox.put({'chat_id': '123', 'text': 'hello'})
+    message = outbox.claim()
+    outbox.retry(message, 0, 'timeout')
+    stored = db.telegram_outbox.find_one({'_id': message['_id']})
+    assert (stored['status'], stored['attempts'], stored['last_error']) == ('pending', 1, 'timeout')
+    outbox.retry(outbox.claim(), 0, 'timeout')
+    stored = db.telegram_outbox.find_one({'_id': message['_id']})
+    assert (stored['status'], stored['attempts']) == ('failed', 2)
+
+
+def test_defer_does_not_count_attempt(db, outbox):
+    outbox.put({'chat_id': '123', 'text': 'hello'})
+    message = outbox.claim()
+    outbox.defer(message, 30)
+    stored = db.telegram_outbox.find_one({'_id': message['_id']})
+    assert (stored['status'], stored['attempts']) == ('pending', 0)
+    assert outbox.claim() is None
+
+
+def test_memory_queue_without_database():
+    outbox = TelegramOutbox()
+    outbox.put({'chat_id': '123', 'text': 'hello'})
+    message = outbox.claim()
+    assert message['text'] == 'hello'
+    outbox.defer(message, 60)
+    assert outbox.claim() is None
+    assert outbox.stats() == {'persistent': False, 'memory_pending': 1, 'by_status': {}}
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from models.tweet import TWEET_PROJECTIONS, Tweet, resolve_projection
+
+
+ANALYSIS = {'impact_level': 'Bullish', 'event_type': 'Launch', 'key_factors': ['TVL up'],
+            'historical_reference': 'v1 launch'}
+
+
+@pytest.fixture
+def stored(db):
+    document = {'tweet_id': '42', 'project_id': 'p1', 'twitter_username': 'xmn', 'token_symbol': 'XMN',
+                'text': 'mainnet', 'created_at': datetime(2024, 1, 1, 8), 'analysis': dict(ANALYSIS),
+                'analysis_status': 'done', 'search': {'text': 'mainnet'}}
+    document['_id'] = db.tweets.insert_one(dict(document)).inserted_id
+    return document
+
+
+def test_resolve_projection():
+    assert resolve_projection(None) == TWEET_PROJECTIONS['full']
+    assert resolve_projection('compact') is TWEET_PROJECTIONS['compact']
+    assert resolve_projection({'text': 1}) == {'text': 1}
+    with pytest.raises(ValueError):
+        resolve_projection('everything')
+
+
+def test_from_document_with_projection(db, stored):
+    document = db.tweets.find_one({'_id': stored['_id']}, TWEET_PROJECTIONS['compact'])
+    tweet = Tweet.from_document(document)
+    assert (tweet.tweet_id, tweet.text, tweet.created_at) == ('42', None, stored['created_at'])
+    assert tweet.analysis == {'impact_level': 'Bullish', 'event_type': 'Launch'}
+    # 缺少analysis时为空字典
+    assert Tweet.from_document({'tweet_id': '1'}).analysis == {}
+
+
+def test_parse_fields_param(app_module):
+    assert app_module.parse_fields_param(None) == TWEET_PROJECTIONS['full']
+    assert app_module.parse_fields_param('summary') == TWEET_PROJECTIONS['summary']
+    assert app_module.parse_fields_param('tweet_id, analysis.impact_level,') == {
+        'tweet_id': 1, 'analysis.impact_level': 1}
+    assert app_module.parse_fields_param(',') == TWEET_PROJECTIONS['full']
+    with pytest.raises(ValueError):
+        app_module.parse_fields_param('tweet_id,search')
+
+
+def test_list_returns_full_analysis_unless_summary_requested(client, stored):
+    tweet = client.get('/api/tweets').get_json()['tweets'][0]
+    assert tweet['analysis'] == ANALYSIS
+    assert 'search' not in tweet
+    tweet = client.get('/api/tweets?fields=summary').get_json()['tweets'][0]
+    assert tweet['analysis'] == {'impact_level': 'Bullish', 'event_type': 'Launch'}
+    assert client.get('/api/tweets?fields=search').status_code == 400
+
+
+@pytest.mark.parametrize('key', ['_id', 'tweet_id'])
+def test_tweet_detail(client, stored, key):
+    response = client.get(f"/api/tweets/{stored[key]}")
+    assert response.status_code == 200
+    tweet = response.get_json()['tweet']
+    assert (tweet['_id'], tweet['tweet_id'], tweet['analysis']) == (str(stored['_id']), '42', ANALYSIS)
+
+
+def test_tweet_detail_not_found(client, stored):
+    assert client.get(f'/api/tweets/{ObjectId()}').status_code == 404
+    assert client.get('/api/tweets/missing').status_code == 404
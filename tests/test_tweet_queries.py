@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from models import project, tweet
+from models.tweet import Tweet
+
+
+@pytest.fixture
+def stored(use_db):
+    db = use_db(project, tweet)
+    xmn, abc = db.projects.insert_many([{'name': 'XMonitor', 'token_symbol': 'XMN'},
+                                        {'name': 'ABC', 'token_symbol': 'ABC'}]).inserted_ids
+    started = datetime.utcnow() - timedelta(hours=12)
+    rows = [
+        (xmn, 'xmn', 'Bullish', 'Mainnet Launch', 0),
+        (xmn, 'xmn', 'Bearish', 'Security exploit', 1),
+        (abc, 'abc', 'Extremely Bearish', 'Exploit', 11),
+        (abc, 'abc', 'Non-Significant', 'Community', 11),
+        ('missing', 'ghost', 'Bullish', 'Listing', 11),
+    ]
+    db.tweets.insert_many([
+        {'tweet_id': str(i), 'project_id': str(project_id), 'twitter_username': username, 'text': event,
+         'created_at': started + timedelta(hours=hours, minutes=i), 'analysis': {'impact_level': level, 'event_type': event}}
+        for i, (project_id, username, level, event, hours) in enumerate(rows)
+    ])
+    return db, str(xmn), str(abc)
+
+
+class CountingCollection:
+    """记录find调用次数的集合代理"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        return self.collection.find(*args, **kwargs)
+
+
+def test_hydrate_projects_in_one_query(stored, monkeypatch):
+    db, xmn, abc = stored
+    projects = CountingCollection(db.projects)
+    monkeypatch.setattr(project, '_projects_collection', lambda: projects)
+    tweets, _ = Tweet.get_recent_tweets(with_projects=True)
+    assert projects.finds == 1
+    assert {tweet.tweet_id: tweet.project.name if tweet.project else None for tweet in tweets} == {
+        '0': 'XMonitor', '1': 'XMonitor', '2': 'ABC', '3': 'ABC', '4': None}
+
+
+def test_hydrate_projects_without_valid_ids(stored, monkeypatch):
+    db, _, _ = stored
+    projects = CountingCollection(db.projects)
+    monkeypatch.setattr(project, '_projects_collection', lambda: projects)
+    tweets = [Tweet.from_document({'project_id': 'missing'}), Tweet.from_document({})]
+    assert Tweet.hydrate_projects(tweets) == {}
+    assert projects.finds == 0
+    assert Tweet.hydrate_projects([Tweet.from_document({'project_id': str(ObjectId())})]) == {}
+
+
+def test_build_query():
+    assert Tweet.build_query(project_ids=['a', '', 'b'], impact_levels='Bearish', twitter_username=['x']) == {
+        'project_id': {'$in': ['a', 'b']}, 'analysis.impact_level': 'Bearish', 'twitter_username': 'x'}
+    query = Tweet.build_query(event_type='a.b', since='2024-01-01T08:00:00+08:00', until=datetime(2024, 2, 1))
+    assert query['analysis.event_type'] == {'$regex': r'a\.b', '$options': 'i'}
+    assert query['created_at'] == {'$gte': datetime(2024, 1, 1), '$lt': datetime(2024, 2, 1)}
+    assert Tweet.build_query() == {}
+    with pytest.raises(ValueError):
+        Tweet.build_query(since='yesterday')
+
+
+def test_find_combines_filters(stored):
+    _, xmn, abc = stored
+    tweets, _ = Tweet.find(project_ids=[xmn, abc], impact_levels=['Bearish', 'Extremely Bearish'], since='6h')
+    assert [tweet.tweet_id for tweet in tweets] == ['2']
+    tweets, _ = Tweet.find(event_type='EXPLOIT')
+    assert [tweet.tweet_id for tweet in tweets] == ['2', '1']
+
+
+def test_find_pages_through_filtered_results(stored):
+    _, xmn, _ = stored
+    tweets, cursor = Tweet.find(limit=1, project_ids=xmn)
+    assert [tweet.tweet_id for tweet in tweets] == ['1']
+    tweets, cursor = Tweet.find(limit=1, cursor=cursor, project_ids=xmn)
+    assert ([tweet.tweet_id for tweet in tweets], cursor) == (['0'], None)
+
+
+def test_tweets_api_filters(client, stored):
+    _, xmn, _ = stored
+    body = client.get(f'/api/tweets?project_id={xmn}&impact_level=Bullish,Bearish&fields=compact').get_json()
+    assert sorted(tweet['tweet_id'] for tweet in body['tweets']) == ['0', '1']
+    assert client.get('/api/tweets?since=yesterday').status_code == 400
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from utils.dedup import SeenTweetCache
+
+SECRET = 'test-secret'
+
+
+class FakeQueue:
+    """记录提交的任务，accept为False时模拟队列已满"""
+
+    def __init__(self):
+        self.accept = True
+        self.jobs = []
+
+    def submit(self, job):
+        if not self.accept:
+            return False
+        self.jobs.append(job)
+        return True
+
+
+@pytest.fixture
+def queue(app_module, db, monkeypatch):
+    monkeypatch.setenv('WEBHOOK_SECRET', SECRET)
+    fake = FakeQueue()
+    monkeypatch.setattr(app_module.ingest_queue, 'submit', fake.submit)
+    db.tweets.create_index('tweet_id', unique=True)
+    db.projects.insert_one({'name': 'XMonitor', 'twitter_username': 'xmn', 'token_symbol': 'XMN'})
+    return fake
+
+
+def post_tweet(client, tweet_id, username='xmn', text='mainnet'):
+    return client.post('/api/webhook/tweet', headers={'X-Webhook-Secret': SECRET},
+                       json={'id_str': tweet_id, 'text': text, 'user': {'screen_name': username}})
+
+
+def test_seen_tweet_cache_evicts_least_recently_used():
+    cache = SeenTweetCache(maxsize=2)
+    cache.add('1', 'a')
+    cache.add('2', 'b')
+    assert cache.get('1') == 'a'
+    cache.add('3', 'c')
+    assert (cache.get('2'), cache.get('1'), cache.get('3')) == (None, 'a', 'c')
+    assert cache.get(None) is None
+    assert cache.stats() == {'size': 2, 'capacity': 2, 'hits': 3, 'misses': 1}
+
+
+def test_webhook_requires_secret(client, queue):
+    response = client.post('/api/webhook/tweet', headers={'X-Webhook-Secret': 'wrong'}, json={'id_str': '1'})
+    assert response.status_code == 401
+    assert queue.jobs == []
+
+
+def test_duplicate_delivery_is_analyzed_once(app_module, client, queue, db):
+    first = post_tweet(client, '1')
+    assert first.status_code == 202
+    duplicate = post_tweet(client, '1')
+    assert duplicate.status_code == 200
+    assert duplicate.get_json() == {'status': 'success', 'message': '推文已处理过',
+                                    'tweet_id': first.get_json()['tweet_id'], 'duplicate': True}
+    assert len(queue.jobs) == 1
+    assert db.tweets.count_documents({}) == 1
+
+
+def test_duplicate_missed_by_cache_is_caught_by_unique_index(app_module, client, queue, monkeypatch):
+    first = post_tweet(client, '1')
+    # 其他worker进程处理过的推文不在本进程缓存中
+    monkeypatch.setattr(app_module, 'seen_tweets', SeenTweetCache())
+    duplicate = post_tweet(client, '1')
+    assert (duplicate.status_code, duplicate.get_json()['tweet_id']) == (200, first.get_json()['tweet_id'])
+    assert len(queue.jobs) == 1
+
+
+def test_rejected_tweet_is_requeued_on_redelivery(client, queue, db):
+    queue.accept = False
+    assert post_tweet(client, '1').status_code == 503
+    assert db.tweets.find_one({'tweet_id': '1'})['analysis_status'] == 'rejected'
+    queue.accept = True
+    response = post_tweet(client, '1')
+    assert response.status_code == 202
+    assert [job['tweet_id'] for job in queue.jobs] == ['1']
+    assert db.tweets.find_one({'tweet_id': '1'})['analysis_status'] == 'pending'
+
+
+def post_batch(client, tweets):
+    return client.post('/api/webhook/tweets/batch', headers={'X-Webhook-Secret': SECRET}, json={'tweets': tweets})
+
+
+def test_batch_reports_each_tweet(client, queue, db):
+    post_tweet(client, 'seen')
+    response = post_batch(client, [
+        {'id_str': '1', 'text': 'a', 'user': {'screen_name': 'xmn'}},
+        {'id_str': '1', 'text': 'a', 'user': {'screen_name': 'xmn'}},
+        {'id_str': 'seen', 'text': 'b', 'user': {'screen_name': 'xmn'}},
+        {'id_str': '2', 'text': 'c', 'user': {'screen_name': 'unknown'}},
+        'not a tweet'
+    ])
+    assert response.status_code == 202
+    body = response.get_json()
+    assert (body['accepted'], body['duplicates'], body['failed']) == (1, 2, 2)
+    assert [result['status'] for result in body['results']] == ['accepted', 'duplicate', 'duplicate', 'error', 'error']
+    assert body['results'][1]['duplicate_of'] == 0
+    assert [job['tweet_id'] for job in queue.jobs] == ['seen', '1']
+    assert db.tweets.count_documents({}) == 2
+
+
+def test_batch_duplicate_of_stored_tweet(app_module, client, queue, monkeypatch):
+    first = post_tweet(client, '1')
+    monkeypatch.setattr(app_module, 'seen_tweets', SeenTweetCache())
+    body = post_batch(client, [{'id_str': '1', 'user': {'screen_name': 'xmn'}},
+                               {'id_str': '2', 'user': {'screen_name': 'xmn'}}]).get_json()
+    assert body['results'][0] == {'index': 0, 'status': 'duplicate', 'tweet_id': first.get_json()['tweet_id']}
+    assert body['results'][1]['status'] == 'accepted'
+
+
+def test_batch_full_queue_marks_rejected(client, queue, db):
+    queue.accept = False
+    body = post_batch(client, [{'id_str': '1', 'user': {'screen_name': 'xmn'}}]).get_json()
+    assert body['results'][0]['message'] == '处理队列已满，请稍后重试'
+    assert db.tweets.find_one({'tweet_id': '1'})['analysis_status'] == 'rejected'
+
+
+def test_batch_rejects_invalid_body(app_module, client, queue, monkeypatch):
+    headers = {'X-Webhook-Secret': SECRET}
+    assert client.post('/api/webhook/tweets/batch', headers=headers, json={'tweets': {}}).status_code == 400
+    monkeypatch.setattr(app_module, 'WEBHOOK_BATCH_MAX', 1)
+    assert post_batch(client, [{}, {}]).status_code == 413